@@ -0,0 +1,471 @@
+# generate_test_corpus.py
+# Parametric synthetic corpus for sanitizer/scanner benchmarks: the generate_test_*_realistic.py
+# demo files (inert VBA/JS stubs, OLE placeholders, X-SAFEDOCS-MARKER) scaled to a target size.
+#
+# Every document is written directly (zipfile / hand-built PDF xref / RTF text), so no
+# reportlab/python-docx/python-pptx/openpyxl is needed and large parts are streamed into the zip.
+# Everything is inert: macros are text stubs in a fake vbaProject.bin, JavaScript is a
+# comment, embedded objects are random bytes behind an OLE header. Output is deterministic
+# for a given (kind, size, units, densities, seed).
+#
+# Knobs (per document):
+#   size      target file size (10KB .. 200MB); text and media are scaled to hit it (+-10%)
+#   units     pages (pdf, docx, rtf), slides (pptx), sheets (xlsx); default scales with size
+#   objects   embedded OLE objects per unit          urls     hyperlinks per unit
+#   annots    annotations / comments per unit       macros   macro stubs per document
+#   media     fraction of the size that is incompressible images (jpeg-like)
+#
+# Usage:
+#   python generate_test_corpus.py --out corpus --sizes 10KB,1MB,20MB
+#   python generate_test_corpus.py --out corpus --types pdf,xlsx --sizes 200MB --units 500 --urls 4 --macros 3
+# Writes <out>/<kind>_<size>[_<n>].<ext> plus <out>/manifest.json (the parameters of every file).
+from __future__ import annotations
+import argparse
+import io
+import json
+import random
+import re
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+KINDS = ("pdf", "docx", "pptx", "xlsx", "rtf")
+DEFAULT_DENSITY = {"objects": 0.2, "macros": 1, "annots": 0.5, "urls": 1.0, "media": 0.3}
+
+MARKER = "X-SAFEDOCS-MARKER"
+WORDS = ("quarterly review region summary budget forecast the of and to in for report team "
+         "customer revenue project status update meeting action item owner deadline risk").split()
+HITS = ["powershell.exe", "cmd.exe", "wscript.shell", "CreateObject", "eval(", "mshta", "rundll32"]
+VBA_STUB = ("Attribute VB_Name = \"Module{n}\"\nSub AutoOpen()\n"
+            "' PSEUDO-VBA: inert stub for benchmarks (DO NOT RUN) " + MARKER + ": MAL_TEST_VBA_STUB\n"
+            "    'MsgBox \"This is a safe inert stub\"\nEnd Sub\n")
+JS_STUB = "/* PSEUDO-JS: inert stub (text only) " + MARKER + ": MAL_TEST_PDF_JS_STUB */"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+JPEG_MAGIC = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+BYTES_PER_WORD = {"pdf": 2.4, "docx": 2.2, "pptx": 2.6, "xlsx": 3.0, "rtf": 7.0}   # first guess; calibrated
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+S = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PR = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT = "http://schemas.openxmlformats.org/package/2006/content-types"
+XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+
+
+# ---------------- shared helpers ----------------
+def parse_size(s: str) -> int:
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*", s.upper())
+    if not m:
+        raise ValueError(f"bad size: {s!r}")
+    return int(float(m.group(1)) * {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}[m.group(2)])
+
+def size_label(n: int) -> str:
+    for unit, f in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10)):
+        if n >= f and n % f == 0:
+            return f"{n // f}{unit}"
+    return f"{n}B"
+
+def _spread(density: float, i: int) -> int:
+    """How many of a per-unit density fall on unit i (fractions accumulate across units)."""
+    return int((i + 1) * density) - int(i * density)
+
+def _words(rnd: random.Random, n: int, hit_rate: float = 0.02) -> str:
+    return " ".join(rnd.choice(HITS) if rnd.random() < hit_rate else rnd.choice(WORDS) for _ in range(n))
+
+def _url(rnd: random.Random, i: int) -> str:
+    return f"https://evil.example/{i}/{rnd.getrandbits(32):08x}/payload.hta"
+
+def _jpeg(rnd: random.Random, n: int) -> bytes:
+    return JPEG_MAGIC + rnd.randbytes(max(0, n - len(JPEG_MAGIC)))
+
+def _ole(rnd: random.Random, n: int) -> bytes:
+    body = (b"OLE_PAYLOAD_STUB (inert) " + MARKER.encode() + b" ").ljust(64, b" ")
+    return OLE_MAGIC + body + rnd.randbytes(max(0, n - 72))
+
+def _vba(macros: int) -> bytes:
+    return OLE_MAGIC + "".join(VBA_STUB.format(n=i + 1) for i in range(macros)).encode("utf-8")
+
+def _esc(s: str) -> str:
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+def _rels(items: List[tuple]) -> str:
+    """items: (id, type suffix, target, external)"""
+    return (XML_DECL + f'<Relationships xmlns="{PR}">' + "".join(
+        f'<Relationship Id="{rid}" Type="{R}/{typ}" Target="{_esc(tgt)}"' + (' TargetMode="External"' if ext else "") + "/>"
+        for rid, typ, tgt, ext in items) + "</Relationships>")
+
+def _content_types(defaults: Dict[str, str], overrides: Dict[str, str]) -> str:
+    return (XML_DECL + f'<Types xmlns="{CT}">'
+            + "".join(f'<Default Extension="{e}" ContentType="{c}"/>' for e, c in defaults.items())
+            + "".join(f'<Override PartName="{p}" ContentType="{c}"/>' for p, c in overrides.items()) + "</Types>")
+
+OOXML_DEFAULTS = {"rels": "application/vnd.openxmlformats-package.relationships+xml", "xml": "application/xml",
+                  "jpeg": "image/jpeg", "bin": "application/vnd.openxmlformats-officedocument.oleObject"}
+CORE_CT = "application/vnd.openxmlformats-package.core-properties+xml"
+VBA_CT = "application/vnd.ms-office.vbaProject"
+
+def _core_props(kind: str) -> str:
+    return (XML_DECL + '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f"<dc:title>SafeDocs Benchmark Corpus - {kind.upper()} (INERT STUBS)</dc:title>"
+            f"<dc:description>{MARKER}: MAL_TEST_{kind.upper()}_STUB</dc:description></cp:coreProperties>")
+
+
+# ---------------- PDF ----------------
+def _pdf_str(s: str) -> str:
+    return "(" + s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def make_pdf(units: int, words: int, media: int, d: Dict[str, float], seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    objs: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objs.append(body); return len(objs)
+
+    def stream(head: str, data: bytes) -> int:
+        return add(f"<< {head} /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream")
+
+    catalog = add(b""); pages = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    js = [add(f"<< /S /JavaScript /JS {_pdf_str(JS_STUB)} >>".encode()) for _ in range(int(d["macros"]))]
+    embedded: List[str] = []
+    kids: List[int] = []
+    for i in range(units):
+        lines = [f"SafeDocs Benchmark Corpus - PDF page {i + 1} (INERT JS/HTML STUBS)", f"Marker: {MARKER}: MAL_TEST_PDF_JS_STUB"]
+        text = _words(rnd, words)
+        lines += [text[k:k + 90] for k in range(0, len(text), 90)]
+        content = "BT /F1 10 Tf 72 760 Td 12 TL " + " ".join(f"{_pdf_str(ln)} '" for ln in lines) + " ET"
+        res = f"/Font << /F1 {font} 0 R >>"
+        if media:
+            img = stream("/Type /XObject /Subtype /Image /Width 64 /Height 64 /ColorSpace /DeviceRGB "
+                         "/BitsPerComponent 8 /Filter /DCTDecode", _jpeg(rnd, media))
+            res += f" /XObject << /Im0 {img} 0 R >>"
+            content += " q 64 0 0 64 460 700 cm /Im0 Do Q"
+        body = zlib.compress(content.encode("latin-1", "replace"), 6)
+        cont = stream("/Filter /FlateDecode", body)
+        annots = []
+        for k in range(_spread(d["urls"], i)):
+            annots.append(add(f"<< /Type /Annot /Subtype /Link /Rect [72 {80 + 14 * k} 300 {92 + 14 * k}] "
+                              f"/A << /S /URI /URI {_pdf_str(_url(rnd, i))} >> >>".encode()))
+        for k in range(_spread(d["annots"], i)):
+            annots.append(add(f"<< /Type /Annot /Subtype /Text /Rect [20 {700 - 20 * k} 40 {720 - 20 * k}] "
+                              f"/Contents {_pdf_str('Reviewer note: ' + _words(rnd, 12))} >>".encode()))
+        for k in range(_spread(d["objects"], i)):
+            ef = stream("/Type /EmbeddedFile /Subtype /application#2Foctet-stream", _ole(rnd, 4096))
+            spec = add(f"<< /Type /Filespec /F (ole_{i}_{k}.bin) /EF << /F {ef} 0 R >> >>".encode())
+            embedded.append(f"{_pdf_str(f'ole_{i}_{k}.bin')} {spec} 0 R")
+        page = f"<< /Type /Page /Parent {pages} 0 R /MediaBox [0 0 612 792] /Resources << {res} >> /Contents {cont} 0 R"
+        if annots:
+            page += " /Annots [" + " ".join(f"{a} 0 R" for a in annots) + "]"
+        if js and i == 0:
+            page += f" /AA << /O {js[0]} 0 R >>"
+        kids.append(add((page + " >>").encode()))
+
+    objs[pages - 1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>".encode()
+    xmp = stream("/Type /Metadata /Subtype /XML", f'<x:xmpmeta xmlns:x="adobe:ns:meta/"><!-- {MARKER} --></x:xmpmeta>'.encode())
+    cat = f"<< /Type /Catalog /Pages {pages} 0 R /Metadata {xmp} 0 R"
+    if js:
+        cat += f" /OpenAction {js[0]} 0 R"
+    names = []
+    if embedded:
+        names.append(f"/EmbeddedFiles << /Names [{' '.join(embedded)}] >>")
+    if len(js) > 1:
+        names.append("/JavaScript << /Names [" + " ".join(f"(js{k}) {n} 0 R" for k, n in enumerate(js[1:])) + "] >>")
+    if names:
+        cat += " /Names << " + " ".join(names) + " >>"
+    objs[catalog - 1] = (cat + " >>").encode()
+    info = add(f"<< /Title (SafeDocs Benchmark Corpus - PDF) /Subject ({MARKER}: MAL_TEST_PDF_JS_STUB) >>".encode())
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for n, body in enumerate(objs, 1):
+        offsets.append(out.tell())
+        out.write(f"{n} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode())
+    out.write("".join(f"{o:010d} 00000 n \n" for o in offsets).encode())
+    out.write(f"trailer\n<< /Size {len(objs) + 1} /Root {catalog} 0 R /Info {info} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+# ---------------- OOXML ----------------
+def _zip_common(z: zipfile.ZipFile, kind: str, main_rel: tuple, macros: int, prefix: str) -> None:
+    z.writestr("_rels/.rels", _rels([main_rel, ("rId2", "metadata/core-properties", "docProps/core.xml", False)]))
+    z.writestr("docProps/core.xml", _core_props(kind))
+    if macros:
+        z.writestr(f"{prefix}/vbaProject.bin", _vba(macros))
+
+def make_docx(units: int, words: int, media: int, d: Dict[str, float], seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    buf = io.BytesIO()
+    rels = [("rIdVba", "vbaProject", "vbaProject.bin", False)] if d["macros"] else []
+    comments: List[str] = []
+    members: List[tuple] = []   # written once the streamed document.xml handle is closed
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        with z.open("word/document.xml", "w", force_zip64=True) as f:
+            f.write((XML_DECL + f'<w:document xmlns:w="{W}" xmlns:r="{R}" xmlns:a="{A}"><w:body>'
+                     f'<w:p><w:r><w:t>SafeDocs Benchmark Corpus - DOCX (INERT STUBS) {MARKER}: MAL_TEST_VBA_STUB</w:t></w:r></w:p>').encode())
+            per_para = 60
+            for i in range(units):
+                parts = []
+                if i == 0 and d["macros"]:
+                    parts.append(f"<w:p><w:r><w:t xml:space=\"preserve\">--- BEGIN PSEUDO-VBA-STUB --- {_esc(VBA_STUB.format(n=1))} --- END PSEUDO-VBA-STUB ---</w:t></w:r></w:p>")
+                left = words
+                while left > 0:
+                    n = min(per_para, left); left -= n
+                    parts.append(f"<w:p><w:r><w:t>{_esc(_words(rnd, n))}</w:t></w:r></w:p>")
+                for _ in range(_spread(d["urls"], i)):
+                    rid = f"rIdL{len(rels)}"; rels.append((rid, "hyperlink", _url(rnd, i), True))
+                    parts.append(f'<w:p><w:hyperlink r:id="{rid}"><w:r><w:t>click here</w:t></w:r></w:hyperlink></w:p>')
+                for _ in range(_spread(d["annots"], i)):
+                    cid = len(comments); comments.append(_words(rnd, 12))
+                    parts.append(f'<w:p><w:commentRangeStart w:id="{cid}"/><w:r><w:t>reviewed</w:t></w:r>'
+                                 f'<w:commentRangeEnd w:id="{cid}"/><w:r><w:commentReference w:id="{cid}"/></w:r></w:p>')
+                for k in range(_spread(d["objects"], i)):
+                    name = f"oleObject{i}_{k}.bin"; rid = f"rIdO{len(rels)}"
+                    members.append((f"word/embeddings/{name}", _ole(rnd, 4096))); rels.append((rid, "oleObject", f"embeddings/{name}", False))
+                    parts.append(f'<w:p><w:r><w:object><o:OLEObject xmlns:o="urn:schemas-microsoft-com:office:office" '
+                                 f'ProgID="Package" r:id="{rid}"/></w:object><w:t>OLE_PAYLOAD_STUB (inert)</w:t></w:r></w:p>')
+                if media:
+                    name = f"image{i}.jpeg"; rid = f"rIdM{len(rels)}"
+                    members.append((f"word/media/{name}", _jpeg(rnd, media))); rels.append((rid, "image", f"media/{name}", False))
+                    parts.append(f'<w:p><w:r><w:drawing><a:blip r:embed="{rid}"/></w:drawing></w:r></w:p>')
+                parts.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+                f.write("".join(parts).encode("utf-8"))
+            f.write(b"</w:body></w:document>")
+        for name, data in members:
+            z.writestr(name, data)
+        overrides = {"/word/document.xml": "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+                     "/docProps/core.xml": CORE_CT}
+        if comments:
+            rels.append(("rIdC", "comments", "comments.xml", False))
+            z.writestr("word/comments.xml", XML_DECL + f'<w:comments xmlns:w="{W}">' + "".join(
+                f'<w:comment w:id="{k}" w:author="Reviewer"><w:p><w:r><w:t>{_esc(c)}</w:t></w:r></w:p></w:comment>'
+                for k, c in enumerate(comments)) + "</w:comments>")
+            overrides["/word/comments.xml"] = "application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml"
+        if d["macros"]:
+            overrides["/word/vbaProject.bin"] = VBA_CT
+        z.writestr("word/_rels/document.xml.rels", _rels(rels))
+        z.writestr("[Content_Types].xml", _content_types(OOXML_DEFAULTS, overrides))
+        _zip_common(z, "docx", ("rId1", "officeDocument", "word/document.xml", False), int(d["macros"]), "word")
+    return buf.getvalue()
+
+def make_pptx(units: int, words: int, media: int, d: Dict[str, float], seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    buf = io.BytesIO()
+    slide_ct = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+    overrides = {"/ppt/presentation.xml": "application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml",
+                 "/docProps/core.xml": CORE_CT}
+    pres_rels = [("rIdVba", "vbaProject", "vbaProject.bin", False)] if d["macros"] else []
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(1, units + 1):
+            rels: List[tuple] = []
+            paras = [f"SafeDocs Benchmark Corpus - PPTX slide {i} (INERT JS STUBS)", f"Marker: {MARKER}: MAL_TEST_JS_STUB"]
+            paras += [_words(rnd, min(40, words - k)) for k in range(0, words, 40)]
+            runs = "".join(f"<a:p><a:r><a:t>{_esc(t)}</a:t></a:r></a:p>" for t in paras)
+            for _ in range(_spread(d["urls"], i - 1)):
+                rid = f"rIdL{len(rels)}"; rels.append((rid, "hyperlink", _url(rnd, i), True))
+                runs += f'<a:p><a:r><a:rPr><a:hlinkClick r:id="{rid}"/></a:rPr><a:t>click here</a:t></a:r></a:p>'
+            extra = ""
+            for k in range(_spread(d["objects"], i - 1)):
+                name = f"oleObject{i}_{k}.bin"; rid = f"rIdO{len(rels)}"
+                z.writestr(f"ppt/embeddings/{name}", _ole(rnd, 4096)); rels.append((rid, "oleObject", f"../embeddings/{name}", False))
+                extra += f'<p:graphicFrame><a:graphic><a:graphicData><p:oleObj progId="Package" r:id="{rid}"/></a:graphicData></a:graphic></p:graphicFrame>'
+            if media:
+                name = f"image{i}.jpeg"; rid = f"rIdM{len(rels)}"
+                z.writestr(f"ppt/media/{name}", _jpeg(rnd, media)); rels.append((rid, "image", f"../media/{name}", False))
+                extra += f'<p:pic><p:blipFill><a:blip r:embed="{rid}"/></p:blipFill></p:pic>'
+            n_comments = _spread(d["annots"], i - 1)
+            if n_comments:
+                rels.append(("rIdC", "comments", f"../comments/comment{i}.xml", False))
+                z.writestr(f"ppt/comments/comment{i}.xml", XML_DECL + f'<p:cmLst xmlns:p="{P}">' + "".join(
+                    f'<p:cm authorId="0" idx="{k}"><p:text>{_esc(_words(rnd, 12))}</p:text></p:cm>' for k in range(n_comments)) + "</p:cmLst>")
+                overrides[f"/ppt/comments/comment{i}.xml"] = "application/vnd.openxmlformats-officedocument.presentationml.comments+xml"
+            z.writestr(f"ppt/slides/slide{i}.xml",
+                       XML_DECL + f'<p:sld xmlns:p="{P}" xmlns:a="{A}" xmlns:r="{R}"><p:cSld><p:spTree>'
+                       f"<p:sp><p:txBody>{runs}</p:txBody></p:sp>{extra}</p:spTree></p:cSld></p:sld>")
+            if rels:
+                z.writestr(f"ppt/slides/_rels/slide{i}.xml.rels", _rels(rels))
+            overrides[f"/ppt/slides/slide{i}.xml"] = slide_ct
+            pres_rels.append((f"rId{i}", "slide", f"slides/slide{i}.xml", False))
+        ids = "".join(f'<p:sldId id="{255 + i}" r:id="rId{i}"/>' for i in range(1, units + 1))
+        z.writestr("ppt/presentation.xml", XML_DECL + f'<p:presentation xmlns:p="{P}" xmlns:r="{R}"><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>')
+        z.writestr("ppt/_rels/presentation.xml.rels", _rels(pres_rels))
+        if d["macros"]:
+            overrides["/ppt/vbaProject.bin"] = VBA_CT
+        z.writestr("[Content_Types].xml", _content_types(OOXML_DEFAULTS, overrides))
+        _zip_common(z, "pptx", ("rId1", "officeDocument", "ppt/presentation.xml", False), int(d["macros"]), "ppt")
+    return buf.getvalue()
+
+def _col(n: int) -> str:
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26); s = chr(65 + r) + s
+    return s
+
+def make_xlsx(units: int, words: int, media: int, d: Dict[str, float], seed: int = 0) -> bytes:
+    """units = sheets; words = text words per sheet (4 per text cell, 3 text + 3 number cells a row)."""
+    rnd = random.Random(seed)
+    buf = io.BytesIO()
+    overrides = {"/xl/workbook.xml": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml",
+                 "/docProps/core.xml": CORE_CT}
+    wb_rels = [("rIdVba", "vbaProject", "vbaProject.bin", False)] if d["macros"] else []
+    sheets = []
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(1, units + 1):
+            rows = max(1, words // 12)
+            rels: List[tuple] = []
+            links = []
+            members: List[tuple] = []
+            with z.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as f:
+                f.write((XML_DECL + f'<worksheet xmlns="{S}" xmlns:r="{R}"><sheetData>'
+                         f'<row r="1"><c r="A1" t="inlineStr"><is><t>SafeDocs Benchmark Corpus - XLSX (INERT STUBS) '
+                         f'{MARKER}: MAL_TEST_EXCEL_MACRO_STUB</t></is></c></row>').encode())
+                chunk = []
+                for r in range(2, rows + 2):
+                    cells = "".join(f'<c r="{_col(c)}{r}"><v>{rnd.randint(0, 99999)}</v></c>' if c % 2 else
+                                    f'<c r="{_col(c)}{r}" t="inlineStr"><is><t>{_esc(_words(rnd, 4))}</t></is></c>' for c in range(1, 7))
+                    chunk.append(f'<row r="{r}">{cells}</row>')
+                    if len(chunk) == 1000:
+                        f.write("".join(chunk).encode("utf-8")); chunk = []
+                f.write("".join(chunk).encode("utf-8"))
+                f.write(b"</sheetData>")
+                for k in range(_spread(d["urls"], i - 1)):
+                    rid = f"rIdL{len(rels)}"; rels.append((rid, "hyperlink", _url(rnd, i), True))
+                    links.append(f'<hyperlink ref="B{k + 2}" r:id="{rid}"/>')
+                if links:
+                    f.write(("<hyperlinks>" + "".join(links) + "</hyperlinks>").encode())
+                for k in range(_spread(d["objects"], i - 1)):
+                    name = f"oleObject{i}_{k}.bin"
+                    members.append((f"xl/embeddings/{name}", _ole(rnd, 4096))); rels.append((f"rIdO{len(rels)}", "oleObject", f"../embeddings/{name}", False))
+                if media:
+                    name = f"image{i}.jpeg"
+                    members.append((f"xl/media/{name}", _jpeg(rnd, media))); rels.append((f"rIdM{len(rels)}", "image", f"../media/{name}", False))
+                f.write(b"</worksheet>")
+            for name, data in members:
+                z.writestr(name, data)
+            n_comments = _spread(d["annots"], i - 1)
+            if n_comments:
+                rels.append(("rIdC", "comments", f"../comments{i}.xml", False))
+                z.writestr(f"xl/comments{i}.xml", XML_DECL + f'<comments xmlns="{S}"><authors><author>Reviewer</author></authors><commentList>'
+                           + "".join(f'<comment ref="A{k + 2}" authorId="0"><text><t>{_esc(_words(rnd, 12))}</t></text></comment>'
+                                     for k in range(n_comments)) + "</commentList></comments>")
+                overrides[f"/xl/comments{i}.xml"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.comments+xml"
+            if rels:
+                z.writestr(f"xl/worksheets/_rels/sheet{i}.xml.rels", _rels(rels))
+            overrides[f"/xl/worksheets/sheet{i}.xml"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+            wb_rels.append((f"rId{i}", "worksheet", f"worksheets/sheet{i}.xml", False))
+            sheets.append(f'<sheet name="Sheet{i}" sheetId="{i}" r:id="rId{i}"/>')
+        if d["macros"]:
+            sheets.append(f'<sheet name="vbaProject_placeholder" sheetId="{units + 1}" state="hidden" r:id="rId{units + 1}"/>')
+            z.writestr(f"xl/worksheets/sheet{units + 1}.xml", XML_DECL + f'<worksheet xmlns="{S}"><sheetData><row r="1"><c r="A1" t="inlineStr">'
+                       '<is><t>OLE_PAYLOAD_STUB: This is a harmless placeholder to simulate an embedded object.</t></is></c></row></sheetData></worksheet>')
+            overrides[f"/xl/worksheets/sheet{units + 1}.xml"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+            wb_rels.append((f"rId{units + 1}", "worksheet", f"worksheets/sheet{units + 1}.xml", False))
+            overrides["/xl/vbaProject.bin"] = VBA_CT
+        z.writestr("xl/workbook.xml", XML_DECL + f'<workbook xmlns="{S}" xmlns:r="{R}"><sheets>{"".join(sheets)}</sheets></workbook>')
+        z.writestr("xl/_rels/workbook.xml.rels", _rels(wb_rels))
+        z.writestr("[Content_Types].xml", _content_types(OOXML_DEFAULTS, overrides))
+        _zip_common(z, "xlsx", ("rId1", "officeDocument", "xl/workbook.xml", False), int(d["macros"]), "xl")
+    return buf.getvalue()
+
+
+# ---------------- RTF ----------------
+def _rtf_esc(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}")
+
+def make_rtf(units: int, words: int, media: int, d: Dict[str, float], seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    out = io.StringIO()
+    out.write("{\\rtf1\\ansi\\deff0{\\fonttbl{\\f0 Helvetica;}}"
+              f"{{\\info{{\\title SafeDocs Benchmark Corpus - RTF}}{{\\doccomm {MARKER}: MAL_TEST_RTF_STUB}}}}\\f0\\fs20 ")
+    for k in range(int(d["macros"])):
+        out.write("{\\field{\\*\\fldinst DDEAUTO \"inert-stub\" \"" + MARKER + f"\" \"{k}\"}}{{\\fldrslt inert}}}}"
+                  + "\\par --- BEGIN PSEUDO-VBA-STUB --- " + _rtf_esc(VBA_STUB.format(n=k + 1)).replace("\n", "\\line ") + " --- END PSEUDO-VBA-STUB ---\\par ")
+    for i in range(units):
+        out.write(f"SafeDocs Benchmark Corpus - RTF page {i + 1} (INERT STUBS)\\par ")
+        for k in range(0, words, 60):
+            out.write(_rtf_esc(_words(rnd, min(60, words - k))) + "\\par ")
+        for _ in range(_spread(d["urls"], i)):
+            u = _url(rnd, i)
+            out.write(f'{{\\field{{\\*\\fldinst HYPERLINK "{u}"}}{{\\fldrslt {u}}}}}\\par ')
+        for _ in range(_spread(d["annots"], i)):
+            out.write(f"reviewed{{\\*\\atnid SD}}{{\\*\\annotation {_rtf_esc(_words(rnd, 12))}}}\\par ")
+        for _ in range(_spread(d["objects"], i)):
+            out.write("{\\object\\objemb{\\*\\objclass Package}\\objw100\\objh100{\\*\\objdata "
+                      + _ole(rnd, 2048).hex() + "}{\\result OLE_PAYLOAD_STUB (inert)}}\\par ")
+        if media:
+            out.write("{\\pict\\jpegblip\\picw64\\pich64 " + _jpeg(rnd, media // 2).hex() + "}\\par ")
+        out.write("\\page ")
+    out.write("}")
+    return out.getvalue().encode("latin-1", "replace")
+
+
+MAKERS = {"pdf": make_pdf, "docx": make_docx, "pptx": make_pptx, "xlsx": make_xlsx, "rtf": make_rtf}
+
+def default_units(kind: str, size: int) -> int:
+    if kind == "xlsx":
+        return max(1, min(8, size // (32 << 20) + 1))
+    return max(1, min(2000, size // (96 << 10)))
+
+def generate(kind: str, size: int, units: Optional[int] = None, seed: int = 0, **density: float) -> bytes:
+    """One document of about `size` bytes (+-10%; tiny sizes are bounded below by the stubs)."""
+    d = {**DEFAULT_DENSITY, **{k: v for k, v in density.items() if v is not None}}
+    units = units or default_units(kind, size)
+    media = int(size * d["media"] / units) if d["media"] > 0 else 0
+    text = max(0, size - media * units)
+    words = max(1, int(text / units / BYTES_PER_WORD[kind]))
+    data = MAKERS[kind](units, words, media, d, seed)
+    for _ in range(3):   # rescale the text to the observed bytes/word
+        if abs(len(data) - size) <= size * 0.1:
+            break
+        fixed = len(MAKERS[kind](units, 1, media, d, seed))
+        per_word = max(0.1, (len(data) - fixed) / max(1, (words - 1) * units))
+        words = max(1, int((size - fixed) / units / per_word) + 1)
+        data = MAKERS[kind](units, words, media, d, seed)
+    return data
+
+def build_corpus(out_dir: Path, kinds: List[str], sizes: List[int], count: int = 1, units: Optional[int] = None,
+                 seed: int = 0, **density: float) -> List[Dict]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = []
+    for kind in kinds:
+        for size in sizes:
+            for n in range(count):
+                name = f"{kind}_{size_label(size)}" + (f"_{n}" if count > 1 else "") + f".{kind}"
+                data = generate(kind, size, units, seed + n, **density)
+                (out_dir / name).write_bytes(data)
+                manifest.append({"file": name, "kind": kind, "target_bytes": size, "size_bytes": len(data),
+                                 "units": units or default_units(kind, size), "seed": seed + n,
+                                 "density": {**DEFAULT_DENSITY, **{k: v for k, v in density.items() if v is not None}}})
+                print(f"Created {name:<28} {len(data):>12,} B")
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Parametric synthetic corpus (inert stubs) for sanitizer benchmarks")
+    ap.add_argument("--out", default="corpus")
+    ap.add_argument("--types", default=",".join(KINDS), help="comma list of " + "/".join(KINDS))
+    ap.add_argument("--sizes", default="10KB,1MB", help="comma list, e.g. 10KB,1MB,20MB,200MB")
+    ap.add_argument("--count", type=int, default=1, help="files per (type, size), different seeds")
+    ap.add_argument("--units", type=int, default=None, help="pages / slides / sheets (default scales with size)")
+    ap.add_argument("--seed", type=int, default=0)
+    for k, v in DEFAULT_DENSITY.items():
+        ap.add_argument(f"--{k}", type=float, default=None, help=f"default {v}")
+    args = ap.parse_args()
+
+    kinds = [k.strip().lower() for k in args.types.split(",") if k.strip()]
+    bad = [k for k in kinds if k not in MAKERS]
+    if bad:
+        ap.error(f"unknown type(s): {', '.join(bad)}")
+    build_corpus(Path(args.out), kinds, [parse_size(s) for s in args.sizes.split(",") if s.strip()], args.count,
+                 args.units, args.seed, **{k: getattr(args, k) for k in DEFAULT_DENSITY})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# admission.py
+# Admission control in front of the upload endpoints (/api/scan, /api/scan/jobs).
+#
+# Three limits, all checked before the request body is read:
+#   - ADMISSION_MAX_PER_USER  concurrent scans per account       -> 429 Too Many Requests
+#   - ADMISSION_MAX_GLOBAL    concurrent scans for this process  -> 503 Service Unavailable
+#   - ADMISSION_MAX_INFLIGHT_MB  bytes of uploads in flight      -> 503 Service Unavailable
+# The byte budget uses the request's Content-Length and is corrected to the real size
+# once the upload has been ingested. Rejections carry a Retry-After based on how long
+# admitted scans have recently held their slot.
+from __future__ import annotations
+import math
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+import settings
+
+
+class Ticket:
+    """One admitted scan. release() is idempotent; detach() hands ownership to a background job."""
+    __slots__ = ("_ctl", "user_id", "nbytes", "started", "detached", "_released")
+
+    def __init__(self, ctl: "AdmissionController", user_id: str, nbytes: int) -> None:
+        self._ctl = ctl
+        self.user_id = user_id
+        self.nbytes = nbytes
+        self.started = time.monotonic()
+        self.detached = False
+        self._released = False
+
+    def resize(self, nbytes: int) -> None:
+        if not self._released:
+            self._ctl._inflight_bytes += int(nbytes) - self.nbytes
+            self.nbytes = int(nbytes)
+
+    def detach(self) -> "Ticket":
+        self.detached = True
+        return self
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._ctl._release(self)
+
+
+class AdmissionController:
+    def __init__(self, max_per_user: int, max_global: int, max_inflight_bytes: int, retry_after_s: float) -> None:
+        self.max_per_user = max(1, int(max_per_user))
+        self.max_global = max(1, int(max_global))
+        self.max_inflight_bytes = max(1, int(max_inflight_bytes))
+        self.retry_after_s = float(retry_after_s)
+        self._per_user: Dict[str, int] = {}
+        self._active = 0
+        self._inflight_bytes = 0
+        self._hold_ewma_s: Optional[float] = None
+        self._stats = {"admitted": 0, "rejected_user": 0, "rejected_global": 0, "rejected_bytes": 0}
+
+    def _retry_after(self) -> int:
+        est = self._hold_ewma_s if self._hold_ewma_s is not None else self.retry_after_s
+        return max(1, int(math.ceil(est)))
+
+    def _reject(self, status: int, reason: str, detail: str) -> HTTPException:
+        self._stats[f"rejected_{reason}"] += 1
+        return HTTPException(status_code=status, detail=detail, headers={"Retry-After": str(self._retry_after())})
+
+    def acquire(self, user_id: str, nbytes: int) -> Ticket:
+        """Admit a scan or raise 429/503 with Retry-After. Never waits."""
+        nbytes = max(0, int(nbytes))
+        if self._per_user.get(user_id, 0) >= self.max_per_user:
+            raise self._reject(429, "user", f"Too many concurrent scans (limit {self.max_per_user} per user)")
+        if self._active >= self.max_global:
+            raise self._reject(503, "global", "Scanner is at capacity, please retry shortly")
+        # an upload larger than the whole budget is still admitted when nothing else is in flight
+        if self._inflight_bytes and self._inflight_bytes + nbytes > self.max_inflight_bytes:
+            raise self._reject(503, "bytes", "Upload byte budget exhausted, please retry shortly")
+
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        self._active += 1
+        self._inflight_bytes += nbytes
+        self._stats["admitted"] += 1
+        return Ticket(self, user_id, nbytes)
+
+    def _release(self, t: Ticket) -> None:
+        n = self._per_user.get(t.user_id, 0) - 1
+        if n > 0: self._per_user[t.user_id] = n
+        else:     self._per_user.pop(t.user_id, None)
+        self._active = max(0, self._active - 1)
+        self._inflight_bytes = max(0, self._inflight_bytes - t.nbytes)
+        held = time.monotonic() - t.started
+        self._hold_ewma_s = held if self._hold_ewma_s is None else 0.8 * self._hold_ewma_s + 0.2 * held
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "max_global": self.max_global,
+            "max_per_user": self.max_per_user,
+            "users_active": len(self._per_user),
+            "inflight_bytes": self._inflight_bytes,
+            "max_inflight_bytes": self.max_inflight_bytes,
+            "retry_after_s": self._retry_after(),
+            **self._stats,
+        }
+
+
+ADMISSION = AdmissionController(
+    settings.ADMISSION_MAX_PER_USER,
+    settings.ADMISSION_MAX_GLOBAL,
+    int(settings.ADMISSION_MAX_INFLIGHT_MB * 1024 * 1024),
+    settings.ADMISSION_RETRY_AFTER_S,
+)
@@ -1,56 +1,83 @@
 # api_server.py
 from __future__ import annotations
+import asyncio
+import base64
 import io
 import json
 import mimetypes
 import inspect
-import tempfile
 import hashlib
-from datetime import datetime, timezone
+import importlib
+import importlib.util
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from typing import Any, Dict, List
 
-from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Query
+from fastapi import FastAPI, UploadFile, File, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+import settings
+
+# scripts/ holds the shared helpers (sanitize_cache, scrub_terms, scrub_engine, sanitize_budget).
+# It also has its own scan_file.py etc., so it goes at the END of sys.path.
+if str(settings.SCRIPTS_DIR) not in sys.path:
+    sys.path.append(str(settings.SCRIPTS_DIR))
 
 # --- existing DB + auth (UNTOUCHED) ---
 from db import init_mongo, db, gfs_uploads, gfs_clean, gfs_reports
-from auth import router as auth_router, get_current_user
-from scan_file import scan_bytes
-
-# Sanitizers (prefer bytes versions if present; otherwise path-based)
-try:
-    from sanitize_pdf import sanitize_pdf_bytes as _sanitize_pdf_bytes
-except Exception:
-    _sanitize_pdf_bytes = None
-try:
-    from sanitize_pdf import sanitize_pdf as _sanitize_pdf_path
-except Exception:
-    _sanitize_pdf_path = None
-
-try:
-    from sanitize_ooxml import sanitize_ooxml_bytes as _sanitize_ooxml_bytes
-except Exception:
-    _sanitize_ooxml_bytes = None
-try:
-    from sanitize_ooxml import sanitize_ooxml as _sanitize_ooxml_path
-except Exception:
-    _sanitize_ooxml_path = None
-
-try:
-    from sanitize_rtf import sanitize_rtf_bytes as _sanitize_rtf_bytes
-except Exception:
-    _sanitize_rtf_bytes = None
-try:
-    from sanitize_rtf import sanitize_rtf as _sanitize_rtf_path
-except Exception:
-    _sanitize_rtf_path = None
-
+import passwords
+from auth import router as auth_router, get_current_user, get_current_user_readonly, user_id_from_token, user_cache_stats
+from scan_file import scan_bytes, apply_sanitizer_outcome
+from workers import POOL
+from verdict_cache import VERDICTS
+from sanitize_cache import SANITIZED
+from jobs import JOBS
+from audit_log import AUDIT
+from ingest import Ingested, Source, ingest_upload, load_source, max_upload_bytes
+from admission import ADMISSION, Ticket
+from user_stats import get_user_stats, record_scan_created, record_scan_verdict
+
+# Sanitizers (in-memory: *_buffer returns (bytes, result); *_bytes returns bytes only).
+# The full sanitizers in scripts/ (budgets, keyword-scrub dictionaries) come first; the
+# simpler top-level sanitize_*.py are the fallback. Top-level modules of the same name win
+# on sys.path, so the scripts/ sanitizers are loaded by file path under their own names.
+def _load_scripts_sanitizer(name: str):
+    path = settings.SCRIPTS_DIR / f"{name}.py"
+    if not path.exists():
+        return None
+    mod_name = f"safedocs_scripts_{name}"
+    try:
+        spec = importlib.util.spec_from_file_location(mod_name, path)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[mod_name] = mod   # sanitize_cache keys on fn.__module__ (DICT_VERSION lookup)
+        spec.loader.exec_module(mod)
+        return mod
+    except Exception as e:
+        sys.modules.pop(mod_name, None)
+        print(f"scripts/{name}.py unavailable, using the top-level sanitizer:", e)
+        return None
+
+def _sanitizer_fns(name: str):
+    """-> (name_buffer, name_bytes) from scripts/, else from the top-level module (None if missing)."""
+    mod = _load_scripts_sanitizer(name)
+    if mod is None:
+        try:
+            mod = importlib.import_module(name)
+        except Exception:
+            return None, None
+    return getattr(mod, f"{name}_buffer", None), getattr(mod, f"{name}_bytes", None)
+
+_sanitize_pdf_buffer, _sanitize_pdf_bytes = _sanitizer_fns("sanitize_pdf")
+_sanitize_ooxml_buffer, _sanitize_ooxml_bytes = _sanitizer_fns("sanitize_ooxml")
+_sanitize_rtf_buffer, _sanitize_rtf_bytes = _sanitizer_fns("sanitize_rtf")
 
 app = FastAPI(title="SafeDocs API", version="1.0.0")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # tighten for prod
+    allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -105,77 +132,52 @@ def _sanitize_with_available_tools(ext: str, content: bytes, filename: str) -> D
            "notes": [...],
            "error": "...",
            "changed": True|False,
+           "budget": {"stages": {...}, "tripped": [...], "degraded": bool},   # scripts/ sanitizers (sanitize_budget.py)
+           "degraded": "structural_only",   # only when the deep_scrub budget ran out
+           "cache": "hit"|"miss",   # sanitized-artifact cache (sanitize_cache.py), buffer sanitizers only
         }
       }
+    Everything runs in memory (no temp files). Runs in the scan pool, so the artifact cache
+    is the per-process SANITIZED over the shared blob directory.
     """
-    import os, tempfile
     meta: Dict[str, Any] = {}
     clean: bytes | None = None
     orig_sha = _sha256(content)
 
-    # 1) bytes-style (if defined)
-    try:
-        if ext == ".pdf" and _sanitize_pdf_bytes:
-            try:
-                b = _sanitize_pdf_bytes(content)
-                if isinstance(b, (bytes, bytearray)):
-                    clean = bytes(b); meta["engine"] = "sanitize_pdf_bytes"
-            except Exception as e:
-                meta["error"] = f"pdf_bytes_sanitize_error: {e}"
-        elif ext in (".docx", ".pptx", ".xlsx") and _sanitize_ooxml_bytes:
-            try:
-                b = _sanitize_ooxml_bytes(content, ext=ext.lstrip("."))
-                if isinstance(b, (bytes, bytearray)):
-                    clean = bytes(b); meta["engine"] = "sanitize_ooxml_bytes"
-            except Exception as e:
-                meta["error"] = f"ooxml_bytes_sanitize_error: {e}"
-        elif ext == ".rtf" and _sanitize_rtf_bytes:
-            try:
-                b = _sanitize_rtf_bytes(content)
-                if isinstance(b, (bytes, bytearray)):
-                    clean = bytes(b); meta["engine"] = "sanitize_rtf_bytes"
-            except Exception as e:
-                meta["error"] = f"rtf_bytes_sanitize_error: {e}"
-    except Exception as e:
-        meta["error"] = str(e)
-
-    # 2) path-based (always write out_path and read it back)
-    if clean is None:
-        with tempfile.TemporaryDirectory() as td:
-            in_path  = os.path.join(td, f"in{ext or '.bin'}")
-            out_path = os.path.join(td, f"out{ext or '.bin'}")
-            with open(in_path, "wb") as f: f.write(content)
-            try:
-                res = None
-                if ext == ".pdf" and _sanitize_pdf_path:
-                    res = _sanitize_pdf_path(in_path, out_path); meta["engine"] = "sanitize_pdf"
-                elif ext in (".docx", ".pptx", ".xlsx") and _sanitize_ooxml_path:
-                    try:
-                        res = _sanitize_ooxml_path(in_path, out_path)
-                    except TypeError:
-                        res = _sanitize_ooxml_path(in_path)
-                    meta["engine"] = "sanitize_ooxml"
-                elif ext == ".rtf" and _sanitize_rtf_path:
-                    res = _sanitize_rtf_path(in_path, out_path); meta["engine"] = "sanitize_rtf"
-                else:
-                    res = None
-
-                # capture hints
-                if isinstance(res, dict):
-                    if "removed" in res: meta["removed"] = res["removed"]
-                    if "notes" in res:   meta.setdefault("notes", []).extend(res["notes"])
-
-                # read sanitizer output (sanitizers should write output or copy original)
-                with open(out_path, "rb") as outf:
-                    clean = outf.read()
-            except Exception as e:
-                meta["error"] = f"path_sanitizer_error: {e}"
-                # try to read whatever exists, else fallback to original
-                try:
-                    with open(out_path, "rb") as outf:
-                        clean = outf.read()
-                except Exception:
-                    clean = content
+    if ext == ".pdf":
+        buf_fn, bytes_fn, kw, label = _sanitize_pdf_buffer, _sanitize_pdf_bytes, {}, "pdf"
+    elif ext in (".docx", ".pptx", ".xlsx"):
+        buf_fn, bytes_fn, kw, label = _sanitize_ooxml_buffer, _sanitize_ooxml_bytes, {"ext": ext.lstrip(".")}, "ooxml"
+    elif ext == ".rtf":
+        buf_fn, bytes_fn, kw, label = _sanitize_rtf_buffer, _sanitize_rtf_bytes, {}, "rtf"
+    else:
+        buf_fn = bytes_fn = None; kw = {}; label = ""
+
+    # 1) buffer-style: bytes + result (removed/notes)
+    if buf_fn is not None:
+        try:
+            b, res, hit = SANITIZED.sanitize(buf_fn, memoryview(content), sha=orig_sha, **kw)
+            if isinstance(b, (bytes, bytearray)):
+                clean = bytes(b); meta["engine"] = f"sanitize_{label}_buffer"
+                if SANITIZED.enabled: meta["cache"] = "hit" if hit else "miss"
+            if isinstance(res, dict):
+                if "removed" in res: meta["removed"] = res["removed"]
+                if "notes" in res:   meta.setdefault("notes", []).extend(res["notes"])
+                if res.get("error"): meta["error"] = res["error"]
+                if isinstance(res.get("budget"), dict):
+                    meta["budget"] = res["budget"]
+                    if res["budget"].get("degraded"): meta["degraded"] = "structural_only"
+        except Exception as e:
+            meta["error"] = f"{label}_buffer_sanitize_error: {e}"
+
+    # 2) bytes-style (older sanitizers without *_buffer)
+    if clean is None and bytes_fn is not None:
+        try:
+            b = bytes_fn(content, **kw)
+            if isinstance(b, (bytes, bytearray)):
+                clean = bytes(b); meta["engine"] = f"sanitize_{label}_bytes"
+        except Exception as e:
+            meta["error"] = f"{label}_bytes_sanitize_error: {e}"
 
     if clean is None:
         clean = content
@@ -185,6 +187,13 @@ def _sanitize_with_available_tools(ext: str, content: bytes, filename: str) -> D
     meta["changed"] = (_sha256(clean) != orig_sha)
     return {"clean_bytes": clean, "sanitizer": meta, "error": meta.get("error")}
 
+# ---- Worker-pool entry points (module-level so they pickle; read spooled uploads in the worker) ----
+def _scan_source(src: Source, filename: str, content_type: str, analyze_only: bool = False) -> Dict[str, Any]:
+    return scan_bytes(load_source(src), filename=filename, content_type=content_type, analyze_only=analyze_only)
+
+def _sanitize_source(ext: str, src: Source, filename: str) -> Dict[str, Any]:
+    return _sanitize_with_available_tools(ext, load_source(src), filename)
+
 # ---- Finding beautifier for user-readable "Findings" ----
 def _humanize_findings(raw_findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     nice = []
@@ -221,6 +230,13 @@ def _humanize_findings(raw_findings: List[Dict[str, Any]]) -> List[Dict[str, Any
 async def _startup():
     await init_mongo(app)
     print("✅ Database initialized")
+    POOL.start()
+    print(f"⚙️  Scan pool ready ({POOL.kind}, {POOL.workers} workers)")
+    stale = await _fail_stale_scans()
+    print(f"🧹 Marked {stale} interrupted scans failed")
+    purged = await VERDICTS.purge_stale()
+    print(f"🗃️  Verdict cache engine {VERDICTS.engine_key()} (purged {purged} stale entries)")
+    AUDIT.start()
     try:
         pref = getattr(auth_router, "prefix", "") or ""
         if pref.startswith("/api/"):
@@ -236,68 +252,63 @@ async def _startup():
 
 @app.on_event("shutdown")
 async def _shutdown():
+    await AUDIT.stop()
+    POOL.shutdown()
+    passwords.shutdown()
     print("👋 Shutting down SafeDocs API")
 
 @app.get("/api/health")
 def health():
-    return {"ok": True}
+    return {"ok": True, "scan_pool": POOL.stats(), "verdict_cache": VERDICTS.stats(), "jobs": JOBS.stats(), "admission": ADMISSION.stats(), "user_cache": user_cache_stats(), "audit": AUDIT.stats()}
 
-# ---------- Scan endpoint ----------
-@app.post("/api/scan")
-async def scan_endpoint(
-    file: UploadFile = File(...),
-    current_user: Dict[str, Any] = Depends(get_current_user),
-):
-    """
-    Flow:
-      1) Save original upload (GridFS)
-      2) Scan original (raw_scan)
-      3) Sanitize (bytes or path sanitizer by type)
-      4) **Re-scan sanitized bytes** (post_clean_scan)
-      5) Save clean file & JSON report (GridFS)
-      6) Insert scans row (DB) and return links
-    """
-    user_id = str(current_user["_id"])
-    filename = file.filename or "upload.bin"
-    content_type = _content_type_for(filename)
+# ---------- Scan pipeline ----------
+async def _no_emit(stage: str, data: Dict[str, Any] | None = None) -> None:
+    return None
 
-    raw = await file.read()
-    if not raw:
-        raise HTTPException(status_code=400, detail="Empty file")
+def _scan_fallback(filename: str, size: int, sha: str, err: str) -> Dict[str, Any]:
+    return {
+        "ok": False,
+        "verdict": "benign",
+        "risk_score": 0.0,
+        "model_scores": {"lgbm": 0.0, "tree": 0.0, "dl": 0.0, "rules": 0.0},
+        "meta": {"file": filename, "size_bytes": size, "sha256": sha},
+        "report": {"version": 1, "engine": "fallback", "verdict": "benign", "risk_score": 0.0},
+        "error": err,
+    }
 
-    sha = _sha256(raw)
-    ext = _ext_of(filename) or ""
+def _sanitizer_produced(meta: Dict[str, Any]) -> bool:
+    return meta.get("engine") not in (None, "passthrough") and not meta.get("error")
 
-    # 1) Save original upload
-    try:
-        uploads = gfs_uploads()
-        up_meta = {
-            "user_id": user_id,
-            "filename": filename,
-            "content_type": content_type,
-            "size": len(raw),
-            "sha256": sha,
-            "created_at": _now_iso(),
-        }
-        upload_id = await _maybe_await(uploads.upload_from_stream(filename, io.BytesIO(raw), metadata=up_meta))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed saving upload: {e}")
+async def _analyze_upload(upload: Ingested, filename: str, content_type: str, ext: str, emit=_no_emit) -> Dict[str, Any]:
+    """
+    CPU-heavy part of a scan (runs in the worker pool). Each artifact is sanitized
+    exactly once; both scans run analyze-only:
+      scan original -> sanitize original -> re-scan sanitized bytes.
+    Returns everything the report/response needs, including "clean_bytes".
+    emit(stage, data) is awaited after each step ("scanned", "sanitized", "rescanned").
+    """
+    sha = upload.sha256
 
-    # 2) Scan original
+    # Scan original (analysis only; sanitization happens once, below)
     try:
-        raw_result = scan_bytes(raw, filename=filename, content_type=content_type)
+        raw_result = await POOL.run("scan", _scan_source, upload.source, filename, content_type, True)
         if not isinstance(raw_result, dict):
             raise RuntimeError("scanner returned non-dict")
     except Exception as e:
-        raw_result = {
-            "ok": False,
-            "verdict": "benign",
-            "risk_score": 0.0,
-            "model_scores": {"lgbm": 0.0, "tree": 0.0, "dl": 0.0, "rules": 0.0},
-            "meta": {"file": filename, "size_bytes": len(raw), "sha256": sha},
-            "report": {"version": 1, "engine": "fallback", "verdict": "benign", "risk_score": 0.0},
-            "error": f"scan failure: {e}",
-        }
+        raw_result = _scan_fallback(filename, upload.size, sha, f"scan failure: {e}")
+    await emit("scanned", {"findings": len(raw_result.get("findings") or [])})
+
+    # Sanitize — ALWAYS use sanitizer output and record changed flag/notes
+    try:
+        san_out = await POOL.run("sanitize", _sanitize_source, ext, upload.source, filename)
+    except Exception as e:
+        san_out = {"clean_bytes": upload.read_bytes(), "sanitizer": {"engine": "passthrough", "error": str(e), "changed": False}}
+
+    clean_bytes = san_out["clean_bytes"]
+    sanitizer_meta = san_out.get("sanitizer") or {}
+    produced = _sanitizer_produced(sanitizer_meta)
+    apply_sanitizer_outcome(raw_result, produced)
+    await emit("sanitized", {"engine": sanitizer_meta.get("engine"), "changed": sanitizer_meta.get("changed")})
 
     verdict = raw_result.get("verdict")
     try:
@@ -315,47 +326,18 @@ async def scan_endpoint(
         or raw_result.get("report", {}).get("report", {}).get("findings")
         or []
     )
-    nice_findings = _humanize_findings(raw_findings)
     recommendations = raw_result.get("recommendations") or raw_result.get("report", {}).get("recommendations") or []
 
-    # 3) Sanitize — ALWAYS use sanitizer output and record changed flag/notes
-    try:
-        if isinstance(raw_result.get("clean_bytes"), (bytes, bytearray)):
-            san_out = {
-                "clean_bytes": bytes(raw_result["clean_bytes"]),
-                "sanitizer": {"engine": "scanner_clean_bytes", "changed": (_sha256(raw_result["clean_bytes"]) != sha)}
-            }
-        elif isinstance(raw_result.get("sanitized_bytes"), (bytes, bytearray)):
-            san_out = {
-                "clean_bytes": bytes(raw_result["sanitized_bytes"]),
-                "sanitizer": {"engine": "scanner_sanitized_bytes", "changed": (_sha256(raw_result["sanitized_bytes"]) != sha)}
-            }
-        else:
-            san_out = _sanitize_with_available_tools(ext, raw, filename)
-    except Exception as e:
-        san_out = {"clean_bytes": raw, "sanitizer": {"engine": "passthrough", "error": str(e), "changed": False}}
-
-    clean_bytes = san_out["clean_bytes"]
-    sanitizer_meta = san_out.get("sanitizer") or {}
-    sanitized_flag = True  # we always produce bytes; changed flag shows if modified
-
-    # 4) Re-scan sanitized bytes (this is the key bit you were missing)
+    # Re-scan sanitized bytes (analysis only: the artifact is already the sanitizer's output)
     clean_sha = _sha256(clean_bytes)
     clean_filename = f"{sha}_clean{ext or ''}".strip()
     try:
-        clean_result = scan_bytes(clean_bytes, filename=clean_filename, content_type=content_type)
+        clean_result = await POOL.run("rescan", _scan_source, clean_bytes, clean_filename, content_type, True)
         if not isinstance(clean_result, dict):
             raise RuntimeError("scanner returned non-dict (clean)")
+        apply_sanitizer_outcome(clean_result, produced)
     except Exception as e:
-        clean_result = {
-            "ok": False,
-            "verdict": "benign",
-            "risk_score": 0.0,
-            "model_scores": {"lgbm": 0.0, "tree": 0.0, "dl": 0.0, "rules": 0.0},
-            "meta": {"file": clean_filename, "size_bytes": len(clean_bytes), "sha256": clean_sha},
-            "report": {"version": 1, "engine": "fallback", "verdict": "benign", "risk_score": 0.0},
-            "error": f"scan failure (clean): {e}",
-        }
+        clean_result = _scan_fallback(clean_filename, len(clean_bytes), clean_sha, f"scan failure (clean): {e}")
 
     try:
         post_risk = float(clean_result.get("risk_score") or clean_result.get("report", {}).get("risk_score") or 0.0)
@@ -369,9 +351,185 @@ async def scan_endpoint(
         or clean_result.get("report", {}).get("report", {}).get("findings")
         or []
     )
+    await emit("rescanned", {"verdict": post_verdict, "risk_score": float(post_risk)})
+
+    return {
+        "verdict": verdict,
+        "risk_score": float(risk_score),
+        "signals": raw_signals,
+        "raw_findings": raw_findings,
+        "recommendations": recommendations,
+        "sanitizer": sanitizer_meta,
+        "clean_bytes": clean_bytes,
+        "clean_sha256": clean_sha,
+        "clean_filename": clean_filename,
+        "clean_size": len(clean_bytes),
+        "post_risk": float(post_risk),
+        "post_verdict": post_verdict,
+        "post_signals": post_signals,
+        "post_findings": post_findings,
+    }
 
-    # 5) Save clean file + report
+async def _read_cached_clean(clean_id: str) -> bytes | None:
+    """Bytes of a verdict-cache entry's sanitized object; None if it is gone (TTL, owner deleted it)."""
+    if not clean_id:
+        return None
     try:
+        gridout = await _maybe_await(gfs_clean().open_download_stream(_coerce_file_id(clean_id)))
+        return await _maybe_await(gridout.read())
+    except Exception:
+        return None
+
+async def _insert_scan_row(user_id: str, filename: str, content_type: str, upload: Ingested, status: str) -> Any:
+    """Create the scans row as soon as the upload lands so in-flight work is listed."""
+    created_at = datetime.now(timezone.utc)
+    res, counted = await asyncio.gather(
+        _maybe_await(db().scans.insert_one({
+            "user_id": user_id,
+            "upload_id": str(upload.upload_id),
+            "filename": filename,
+            "content_type": content_type,
+            "size": upload.size,
+            "sha256": upload.sha256,
+            "status": status,
+            "verdict": None,
+            "risk_score": None,
+            "created_at": created_at,
+        })),
+        record_scan_created(user_id, created_at),
+        return_exceptions=True,
+    )
+    if isinstance(counted, BaseException):
+        print("user stats update error:", counted)
+    if isinstance(res, BaseException):
+        # no row references the upload: remove it, like a failed persistence batch
+        await _delete_orphans([(gfs_uploads(), upload.upload_id)])
+        raise HTTPException(status_code=500, detail=f"Failed writing scans row: {res}")
+    return res.inserted_id
+
+async def _mark_scan_failed(scan_oid: Any, error: str) -> None:
+    try:
+        await _maybe_await(db().scans.update_one(
+            {"_id": scan_oid},
+            {"$set": {"status": "failed", "error": error, "completed_at": datetime.now(timezone.utc)}},
+        ))
+    except Exception as e:
+        print("scans row failure update error:", e)
+
+def _stale_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_S)
+
+def _is_stale(row: Dict[str, Any]) -> bool:
+    created = row.get("created_at")
+    if not isinstance(created, datetime) or row.get("status") not in ("queued", "processing"):
+        return False
+    if created.tzinfo is None:   # PyMongo returns naive UTC unless tz_aware
+        created = created.replace(tzinfo=timezone.utc)
+    return created < _stale_cutoff()
+
+async def _fail_stale_scans() -> int:
+    """Rows left "queued"/"processing" by a worker that died; older than JOB_STALE_S so jobs
+    still running in sibling API workers are left alone."""
+    try:
+        res = await _maybe_await(db().scans.update_many(
+            {"status": {"$in": ["queued", "processing"]}, "created_at": {"$lt": _stale_cutoff()}},
+            {"$set": {"status": "failed", "error": "interrupted (server restarted)", "completed_at": datetime.now(timezone.utc)}},
+        ))
+        return int(getattr(res, "modified_count", 0) or 0)
+    except Exception as e:
+        print("stale scans update error:", e)
+        return 0
+
+async def _timed(timings: Dict[str, float], key: str, aw) -> Any:
+    """Await aw and record its latency in timings[key] (ms), even if it fails."""
+    t0 = time.perf_counter()
+    try:
+        return await _maybe_await(aw)
+    finally:
+        timings[key] = round((time.perf_counter() - t0) * 1000.0, 2)
+
+async def _delete_orphans(objects: List[tuple]) -> None:
+    """Best-effort removal of GridFS objects written by a persistence batch that failed."""
+    for bucket, fid in objects:
+        try:
+            await _maybe_await(bucket.delete(fid))
+        except Exception as e:
+            print(f"orphan cleanup failed for {fid}: {e}")
+
+async def _run_scan_pipeline(
+    scan_oid: Any, user_id: str, filename: str, content_type: str, upload: Ingested, emit=_no_emit,
+) -> Dict[str, Any]:
+    """
+    Flow (CPU-heavy steps run in the scan worker pool, see workers.py):
+      1) Original upload already streamed to GridFS by ingest_upload     -> "stored"
+      2) Verdict cache lookup by (sha256, type, engine key) — a hit skips 3-5 and
+         copies the cached clean object, so every scan owns its own
+      3) Scan original (raw_scan)                                        -> "scanned"
+      4) Sanitize (bytes or path sanitizer by type)                      -> "sanitized"
+      5) **Re-scan sanitized bytes** (post_clean_scan)                   -> "rescanned"
+      6) Save clean file + JSON report (GridFS) and complete the scans
+         row concurrently; roll back the batch on partial failure        -> "persisted"
+    Returns the scan response payload. Raises HTTPException on persistence failures.
+    """
+    from bson import ObjectId
+
+    ext = _ext_of(filename) or ""
+    sha = upload.sha256
+    upload_id = upload.upload_id
+    timings: Dict[str, float] = {"upload_write_ms": upload.ingest_ms}
+    t_pipeline = time.perf_counter()
+
+    # 1) Original upload is already in GridFS; the status update overlaps with scanning
+    mark_processing = asyncio.ensure_future(_timed(
+        timings, "status_write_ms",
+        db().scans.update_one({"_id": scan_oid}, {"$set": {"status": "processing"}}),
+    ))
+    await emit("stored", {"upload_id": str(upload_id), "size": upload.size, "sha256": sha})
+
+    try:
+        # 2) Verdict cache. A hit is written as this user's own clean object (a copy of the
+        #    cached one), so deleting either scan or account never touches the other's.
+        #    A cached object that is gone (TTL, its owner deleted it) counts as a miss.
+        analysis = await VERDICTS.get(sha, ext, content_type)
+        clean_bytes = None
+        if analysis is not None:
+            clean_bytes = await _read_cached_clean(analysis.get("clean_id", ""))
+            if clean_bytes is None:
+                await VERDICTS.invalidate(sha)
+                analysis = None
+        cache_hit = analysis is not None
+
+        if cache_hit:
+            for stage in ("scanned", "sanitized", "rescanned"):
+                await emit(stage, {"cached": True})
+        else:
+            # 3-5) Scan, sanitize, re-scan
+            t0 = time.perf_counter()
+            analysis = await _analyze_upload(upload, filename, content_type, ext, emit)
+            timings["analyze_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+            clean_bytes = analysis.pop("clean_bytes")
+        analysis["clean_id"] = str(ObjectId())
+    finally:
+        try:
+            await mark_processing
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed updating scans row: {e}")
+
+    verdict = analysis["verdict"]
+    risk_score = analysis["risk_score"]
+    raw_findings = analysis["raw_findings"]
+    sanitizer_meta = analysis["sanitizer"]
+    sanitized_flag = True  # we always produce bytes; changed flag shows if modified
+    clean_filename = analysis["clean_filename"]
+    clean_id = analysis["clean_id"]
+    post_risk = analysis["post_risk"]
+    post_verdict = analysis["post_verdict"]
+    report_id = ObjectId()
+    written: List[tuple] = []   # (bucket, id) of GridFS objects this batch creates
+
+    # 6a) Start the clean-file write; it runs while the report is built
+    writes = []
+    if clean_bytes is not None:   # always set: sanitizer output or a copy of the cached object
         clean = gfs_clean()
         clean_meta = {
             "user_id": user_id,
@@ -381,151 +539,386 @@ async def scan_endpoint(
             "size": len(clean_bytes),
             "verdict": post_verdict,      # reflect verdict on the sanitized artifact
             "risk_score": post_risk,      # reflect risk on the sanitized artifact
-            "sha256": clean_sha,
-            "sanitized": sanitized_flag,
+            "sha256": analysis["clean_sha256"],
+            "sanitized": True,
             "sanitizer_meta": sanitizer_meta,
             "created_at": _now_iso(),
         }
-        clean_id = await _maybe_await(clean.upload_from_stream(clean_filename, io.BytesIO(clean_bytes), metadata=clean_meta))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed saving clean file: {e}")
+        clean_oid = _coerce_file_id(clean_id)
+        written.append((clean, clean_oid))
+        writes.append(asyncio.ensure_future(_timed(timings, "clean_write_ms", clean.upload_from_stream_with_id(
+            clean_oid, clean_filename, io.BytesIO(clean_bytes), metadata=clean_meta))))
 
-    # Build a comprehensive report
-    try:
-        report_doc = {
-            "version": 1,
-            "engine": "safedocs-ensemble",
-            "filename": filename,
-            "original_sha256": sha,
-            "size_bytes": len(raw),
-            "content_type": content_type,
+    # 6b) Build a comprehensive report
+    nice_findings = _humanize_findings(raw_findings)
+    report_doc = {
+        "version": 1,
+        "engine": "safedocs-ensemble",
+        "filename": filename,
+        "original_sha256": sha,
+        "size_bytes": upload.size,
+        "content_type": content_type,
 
-            # ORIGINAL scan result
-            "verdict": verdict,
-            "risk_score": float(risk_score),
-            "signals": raw_signals,
-            "findings": nice_findings,
-            "raw_findings": raw_findings,
-
-            # POST-SANITIZATION scan result
-            "post_clean_scan": {
-                "filename": clean_filename,
-                "sha256": clean_sha,
-                "risk_score": float(post_risk),
-                "verdict": post_verdict,
-                "signals": post_signals,
-                "findings": post_findings,
-                "delta_risk": float(post_risk - risk_score),
-            },
-
-            "recommendations": recommendations,
-            "sanitizer": sanitizer_meta,
-            "sanitized": sanitized_flag,
-            "clean_file": {
-                "filename": clean_filename,
-                "content_type": content_type,
-                "size_bytes": len(clean_bytes),
-                "gridfs_id": None,
-            },
-            "timestamps": {"uploaded_at": up_meta["created_at"], "scanned_at": _now_iso()},
-            "source_upload_id": str(upload_id),
-            "clean_id": None,
-            "user_id": user_id,
-        }
-        report_doc["clean_file"]["gridfs_id"] = str(clean_id)
-        report_doc["clean_id"] = str(clean_id)
+        # ORIGINAL scan result
+        "verdict": verdict,
+        "risk_score": float(risk_score),
+        "signals": analysis["signals"],
+        "findings": nice_findings,
+        "raw_findings": raw_findings,
 
-        reports = gfs_reports()
-        report_bytes = json.dumps(report_doc, indent=2, default=str).encode("utf-8")
-        report_meta = {
-            "user_id": user_id,
-            "upload_id": str(upload_id),
-            "clean_id": str(clean_id),
-            "filename": f"{sha}.report.json",
-            "created_at": _now_iso(),
-        }
-        report_id = await _maybe_await(reports.upload_from_stream(report_meta["filename"], io.BytesIO(report_bytes), metadata=report_meta))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed saving report: {e}")
+        # POST-SANITIZATION scan result
+        "post_clean_scan": {
+            "filename": clean_filename,
+            "sha256": analysis["clean_sha256"],
+            "risk_score": float(post_risk),
+            "verdict": post_verdict,
+            "signals": analysis["post_signals"],
+            "findings": analysis["post_findings"],
+            "delta_risk": float(post_risk - risk_score),
+        },
 
-    # 6) Persist scan record (DB shape preserved)
-    try:
-        scans_coll = db().scans
-        doc = {
-            "user_id": user_id,
-            "upload_id": str(upload_id),
-            "clean_id": str(report_doc["clean_id"]),
-            "report_id": str(report_id),
-            "filename": filename,
-            "clean_filename": clean_filename,
+        "recommendations": analysis["recommendations"],
+        "sanitizer": sanitizer_meta,
+        "sanitized": sanitized_flag,
+        "clean_file": {
+            "filename": clean_filename,
             "content_type": content_type,
-            "size": len(raw),
-            "sha256": sha,
-            "verdict": verdict,                 # original file verdict (keep as-is)
-            "risk_score": risk_score,           # original file risk
-            "created_at": datetime.now(timezone.utc),
-            # legacy url fields (dashboard will rebuild anyway)
-            "report_url": f"/report/{str(report_id)}.json",
-            "download_clean_url": f"/download/{str(report_doc['clean_id'])}",
-        }
-        res = scans_coll.insert_one(doc)
-        if inspect.isawaitable(res):
-            await res
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed writing scans row: {e}")
+            "size_bytes": analysis["clean_size"],
+            "gridfs_id": clean_id,
+        },
+        "cache": {"hit": cache_hit, "engine_key": VERDICTS.engine_key()},
+        "timestamps": {"uploaded_at": upload.created_at, "scanned_at": _now_iso()},
+        "source_upload_id": str(upload_id),
+        "clean_id": clean_id,
+        "user_id": user_id,
+    }
+    report_bytes = json.dumps(report_doc, indent=2, default=str).encode("utf-8")
+    report_meta = {
+        "user_id": user_id,
+        "upload_id": str(upload_id),
+        "clean_id": clean_id,
+        "filename": f"{sha}.report.json",
+        "sha256": _sha256(report_bytes),   # ETag for /api/report
+        "created_at": _now_iso(),
+    }
+    reports = gfs_reports()
+    written.append((reports, report_id))
+    writes.append(asyncio.ensure_future(_timed(timings, "report_write_ms", reports.upload_from_stream_with_id(
+        report_id, report_meta["filename"], io.BytesIO(report_bytes), metadata=report_meta))))
+
+    # 6c) Complete the scan record (DB shape preserved) alongside the GridFS writes
+    writes.append(asyncio.ensure_future(_timed(timings, "scan_row_write_ms", db().scans.update_one({"_id": scan_oid}, {"$set": {
+        "upload_id": str(upload_id),
+        "clean_id": clean_id,
+        "report_id": str(report_id),
+        "clean_filename": clean_filename,
+        "verdict": verdict,                 # original file verdict (keep as-is)
+        "risk_score": risk_score,           # original file risk
+        "cache_hit": cache_hit,
+        "status": "done",
+        "completed_at": datetime.now(timezone.utc),
+        # legacy url fields (dashboard will rebuild anyway)
+        "report_url": f"/report/{str(report_id)}.json",
+        "download_clean_url": f"/download/{clean_id}",
+    }}))))
+    # per-user counters for /api/me/stats (compensated below if the batch fails)
+    writes.append(asyncio.ensure_future(_timed(timings, "stats_write_ms", record_scan_verdict(user_id, verdict))))
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*writes, return_exceptions=True)
+    timings["persist_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        await _delete_orphans(written)
+        if not isinstance(results[-1], BaseException):
+            try:
+                await record_scan_verdict(user_id, verdict, delta=-1)
+            except Exception:
+                pass
+        try:
+            await _maybe_await(db().scans.update_one(
+                {"_id": scan_oid},
+                {"$set": {"status": "failed"}, "$unset": {"clean_id": "", "report_id": "", "report_url": "", "download_clean_url": ""}},
+            ))
+        except Exception:
+            pass
+        raise HTTPException(status_code=500, detail=f"Failed persisting scan: {errors[0]}")
+
+    if not cache_hit:
+        await VERDICTS.put(sha, ext, content_type, analysis)
+    timings["pipeline_ms"] = round((time.perf_counter() - t_pipeline) * 1000.0, 2)
 
     # Response (non-breaking, extra fields included)
-    return JSONResponse({
+    out = {
         "ok": True,
         "filename": filename,
         "content_type": content_type,
-        "size": len(raw),
+        "size": upload.size,
         "sha256": sha,
 
         # original
         "verdict": verdict,
         "risk_score": float(risk_score),
-        "signals": raw_signals,
-        "findings": _humanize_findings(raw_findings),
+        "signals": analysis["signals"],
+        "findings": nice_findings,
         "raw_findings": raw_findings,
-        "recommendations": recommendations,
+        "recommendations": analysis["recommendations"],
 
         # sanitizer + post-clean scan summary
         "sanitizer": sanitizer_meta,
         "sanitized": sanitized_flag,
         "post_clean_scan": {
             "filename": clean_filename,
-            "sha256": clean_sha,
+            "sha256": analysis["clean_sha256"],
             "risk_score": float(post_risk),
             "verdict": post_verdict,
             "delta_risk": float(post_risk - risk_score),
         },
+        "cache_hit": cache_hit,
+        "timings": timings,
 
         "report_id": str(report_id),
         "report_api": f"/report/{str(report_id)}.json",
-        "download_api": f"/download/{str(report_doc['clean_id'])}",
+        "download_api": f"/download/{clean_id}",
         "clean_filename": clean_filename,
         "scan_id": str(upload_id),
-    })
+        "job_id": str(scan_oid),
+    }
+    await emit("persisted", out)
+    return out
+
+# ---------- Upload size guard + admission control ----------
+_UPLOAD_PATHS = ("/api/scan", "/api/scan/jobs")
+_MULTIPART_SLACK = 64 * 1024   # boundary + part headers around the file body
+
+@app.middleware("http")
+async def _admit_uploads(request: Request, call_next):
+    """
+    Runs before the multipart body is read:
+      - 413 if Content-Length exceeds MAX_UPLOAD_MB
+      - 429/503 + Retry-After if the user, global or byte limits are hit (admission.py)
+    The ticket is released when the response is produced, unless the endpoint
+    detached it for a background job.
+    """
+    if request.method != "POST" or request.url.path not in _UPLOAD_PATHS:
+        return await call_next(request)
+
+    try:
+        declared = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        declared = 0
+    if declared > max_upload_bytes() + _MULTIPART_SLACK:
+        return JSONResponse(status_code=413, content={"detail": f"File exceeds {settings.MAX_UPLOAD_MB} MB limit"})
+
+    auth = request.headers.get("authorization") or ""
+    user_id = user_id_from_token(auth[7:]) if auth[:7].lower() == "bearer " else None
+    if not user_id:
+        return await call_next(request)   # the endpoint answers 401
+
+    try:
+        ticket = ADMISSION.acquire(user_id, max(0, declared - _MULTIPART_SLACK))
+    except HTTPException as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers)
+    request.state.admission = ticket
+    try:
+        return await call_next(request)
+    finally:
+        if not ticket.detached:
+            ticket.release()
+
+async def _ingest(file: UploadFile, user_id: str, request: Request) -> tuple[str, str, Ingested]:
+    filename = file.filename or "upload.bin"
+    content_type = _content_type_for(filename)
+    upload = await ingest_upload(file, gfs_uploads(), user_id, filename, content_type, _ext_of(filename))
+    ticket = getattr(request.state, "admission", None)
+    if ticket is not None:
+        ticket.resize(upload.size)
+    return filename, content_type, upload
+
+# ---------- Scan endpoint ----------
+@app.post("/api/scan")
+async def scan_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """Synchronous scan: runs the whole pipeline (see _run_scan_pipeline) before responding."""
+    user_id = str(current_user["_id"])
+    filename, content_type, upload = await _ingest(file, user_id, request)
+    try:
+        scan_oid = await _insert_scan_row(user_id, filename, content_type, upload, "processing")
+        try:
+            out = await _run_scan_pipeline(scan_oid, user_id, filename, content_type, upload)
+        except HTTPException as e:
+            await _mark_scan_failed(scan_oid, str(e.detail))
+            raise
+        except Exception as e:
+            await _mark_scan_failed(scan_oid, str(e))
+            raise HTTPException(status_code=500, detail=f"Scan failed: {e}")
+    finally:
+        upload.close()
+    return JSONResponse(out)
+
+# ---------- Scan jobs (202 Accepted + polling / SSE) ----------
+async def _run_scan_job(
+    scan_oid: Any, user_id: str, filename: str, content_type: str, upload: Ingested, ticket: Ticket | None = None,
+) -> None:
+    job_id = str(scan_oid)
+
+    async def emit(stage: str, data: Dict[str, Any] | None = None) -> None:
+        await JOBS.emit(job_id, stage, data)
+
+    try:
+        await _run_scan_pipeline(scan_oid, user_id, filename, content_type, upload, emit)
+    except Exception as e:
+        err = str(e.detail) if isinstance(e, HTTPException) else str(e)
+        await _mark_scan_failed(scan_oid, err)
+        await emit("failed", {"error": err})
+    finally:
+        upload.close()
+        if ticket is not None:
+            ticket.release()
+
+@app.post("/api/scan/jobs", status_code=202)
+async def create_scan_job(
+    request: Request,
+    file: UploadFile = File(...),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    user_id = str(current_user["_id"])
+    filename, content_type, upload = await _ingest(file, user_id, request)
+    try:
+        scan_oid = await _insert_scan_row(user_id, filename, content_type, upload, "queued")
+    except Exception:
+        upload.close()
+        raise
+    job_id = str(scan_oid)
+    job = JOBS.create(job_id, user_id, filename)
+    # the admission slot stays held until the background job finishes
+    ticket = getattr(request.state, "admission", None)
+    if ticket is not None:
+        ticket.detach()
+    job.task = asyncio.create_task(_run_scan_job(scan_oid, user_id, filename, content_type, upload, ticket))
+
+    return JSONResponse(status_code=202, content={
+        "ok": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_api": f"/scan/jobs/{job_id}",
+        "events_api": f"/scan/jobs/{job_id}/events",
+    }, headers={"Location": f"/api/scan/jobs/{job_id}"})
+
+async def _scan_row_for(job_id: str, user_id: str) -> Dict[str, Any] | None:
+    try:
+        return await _maybe_await(db().scans.find_one({"_id": _coerce_file_id(job_id), "user_id": user_id}))
+    except Exception:
+        return None
+
+def _job_from_row(job_id: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Status for jobs no longer (or never) tracked in this process, e.g. another worker or after restart."""
+    stale = _is_stale(row)
+    status = "failed" if stale else (row.get("status") or "done")
+    rid = str(row.get("report_id", "") or "")
+    cid = str(row.get("clean_id", "") or "")
+    return {
+        "job_id": job_id,
+        "filename": row.get("filename"),
+        "status": status if status in ("done", "failed") else "running",
+        "stage": {"done": "persisted", "failed": "failed"}.get(status, "stored" if row.get("upload_id") else "queued"),
+        "events": [],
+        "result": {
+            "verdict": row.get("verdict"),
+            "risk_score": row.get("risk_score"),
+            "report_api": f"/report/{rid}.json" if rid else None,
+            "download_api": f"/download/{cid}" if cid else None,
+        } if status == "done" else None,
+        "error": row.get("error") or ("interrupted (worker lost)" if stale else None),
+    }
+
+@app.get("/api/scan/jobs/{job_id}")
+async def scan_job_status(job_id: str, current_user: Dict[str, Any] = Depends(get_current_user_readonly)):
+    user_id = str(current_user["_id"])
+    job = JOBS.get(job_id)
+    if job is not None:
+        if job.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.snapshot()
+    row = await _scan_row_for(job_id, user_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_from_row(job_id, row)
+
+@app.get("/api/scan/jobs/{job_id}/events")
+async def scan_job_events(job_id: str, current_user: Dict[str, Any] = Depends(get_current_user_readonly)):
+    user_id = str(current_user["_id"])
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    job = JOBS.get(job_id)
+    if job is not None:
+        if job.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return StreamingResponse(JOBS.stream(job_id), media_type="text/event-stream", headers=headers)
+
+    row = await _scan_row_for(job_id, user_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    snap = _job_from_row(job_id, row)
+
+    async def _once():
+        ev = {"seq": 0, "stage": snap["stage"], "data": snap["result"] or {"error": snap["error"]}}
+        yield f"event: {ev['stage']}\ndata: {json.dumps(ev, default=str)}\n\n".encode("utf-8")
+    return StreamingResponse(_once(), media_type="text/event-stream", headers=headers)
 
 # ---------- My scans ----------
+# Keyset pagination on (created_at, _id), newest first. The cursor is opaque to clients:
+# urlsafe base64 of {"t": <created_at iso>, "id": <_id hex>} of the last item returned.
+_SCAN_LIST_FIELDS = {
+    "_id": 1, "filename": 1, "created_at": 1, "status": 1,
+    "verdict": 1, "risk_score": 1, "report_id": 1, "clean_id": 1,
+}
+
+def _encode_cursor(doc: Dict[str, Any]) -> str:
+    created = doc.get("created_at")
+    payload = {"t": created.isoformat() if isinstance(created, datetime) else created, "id": str(doc.get("_id"))}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Cursor -> query clause selecting rows strictly after it in (created_at desc, _id desc) order."""
+    from bson import ObjectId
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        t = datetime.fromisoformat(payload["t"])
+        oid = ObjectId(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [{"created_at": {"$lt": t}}, {"created_at": t, "_id": {"$lt": oid}}]}
+
 @app.get("/api/me/scans")
 async def me_scans(
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    current_user: Dict[str, Any] = Depends(get_current_user),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    offset: int = Query(0, ge=0, description="deprecated: use cursor"),
+    current_user: Dict[str, Any] = Depends(get_current_user_readonly),
 ):
     user_id = str(current_user["_id"])
     coll = db().scans
-    query = {"user_id": user_id}
-
-    cur = coll.find(query).sort("created_at", -1).skip(offset).limit(limit)
+    query: Dict[str, Any] = {"user_id": user_id}
+    if cursor:
+        query.update(_decode_cursor(cursor))
+
+    # served by the (user_id, created_at, _id) index; one extra row tells us if there is a next page
+    cur = coll.find(query, _SCAN_LIST_FIELDS).sort([("created_at", -1), ("_id", -1)])
+    if offset and not cursor:
+        cur = cur.skip(offset)
+    cur = cur.limit(limit + 1)
     items: List[Dict[str, Any]] = []
     if hasattr(cur, "to_list"):
-        docs = await cur.to_list(length=limit)
+        docs = await cur.to_list(length=limit + 1)
     else:
         docs = list(cur)
 
+    has_more = len(docs) > limit
+    docs = docs[:limit]
     for d in docs:
         rid = str(d.get("report_id", "") or "")
         cid = str(d.get("clean_id", "") or "")
@@ -533,49 +926,119 @@ async def me_scans(
             "scan_id": str(d.get("_id", "")),
             "filename": d.get("filename"),
             "created_at": d.get("created_at"),
+            "status": "failed" if _is_stale(d) else (d.get("status") or "done"),   # queued | processing | done | failed
             "verdict": d.get("verdict"),
-            "risk_score": float(d.get("risk_score", 0.0)),
+            "risk_score": float(d.get("risk_score") or 0.0),
             "report_url": f"/report/{rid}.json" if rid else None,
             "download_clean_url": f"/download/{cid}" if cid else None,
         })
 
-    return {"items": items, "limit": limit, "offset": offset}
+    next_cursor = _encode_cursor(docs[-1]) if has_more and docs else None
+    return {"items": items, "limit": limit, "offset": offset, "next_cursor": next_cursor}
 
 # ---------- My stats ----------
 @app.get("/api/me/stats")
-async def me_stats(current_user: Dict[str, Any] = Depends(get_current_user)):
-    user_id = str(current_user["_id"])
-    coll = db().scans
-    query = {"user_id": user_id}
-
-    total_res = coll.count_documents(query)
-    total = await total_res if inspect.isawaitable(total_res) else total_res
-
-    benign_res = coll.count_documents({**query, "verdict": "benign"})
-    benign = await benign_res if inspect.isawaitable(benign_res) else benign_res
+async def me_stats(current_user: Dict[str, Any] = Depends(get_current_user_readonly)):
+    """O(1) read of the per-user counters (see user_stats.py)."""
+    stats = await get_user_stats(str(current_user["_id"]))
+    return {
+        "total_scans": int(stats.get("total_scans") or 0),
+        "benign": int(stats.get("benign") or 0),
+        "malicious": int(stats.get("malicious") or 0),
+        "last_activity": stats.get("last_activity"),
+    }
 
-    malicious_res = coll.count_documents({**query, "verdict": "malicious"})
-    malicious = await malicious_res if inspect.isawaitable(malicious_res) else malicious_res
+# ---------- Conditional + range responses for GridFS objects ----------
+def _etag_for(gridout, meta: Dict[str, Any]) -> str:
+    """Strong ETag: stored sha256 when present; GridFS objects are immutable, so the id works otherwise."""
+    sha = meta.get("sha256")
+    return f'"{sha}"' if sha else f'"gridfs-{getattr(gridout, "_id", "")}"'
 
-    last_activity = None
-    cur = coll.find(query).sort("created_at", -1).limit(1)
-    if hasattr(cur, "to_list"):
-        docs = await cur.to_list(length=1)
-        if docs: last_activity = docs[0].get("created_at")
-    else:
-        for d in cur:
-            last_activity = d.get("created_at"); break
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [t.strip() for t in (header or "").split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
 
-    return {
-        "total_scans": int(total or 0),
-        "benign": int(benign or 0),
-        "malicious": int(malicious or 0),
-        "last_activity": last_activity,
-    }
+def _parse_range(header: str, size: int) -> tuple[int, int] | None | bool:
+    """
+    Single "bytes=a-b" / "bytes=a-" / "bytes=-n" range -> (start, end) inclusive.
+    None: no usable range (serve the full body). False: unsatisfiable (416).
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    spec = header[6:].strip()
+    try:
+        a, b = spec.split("-", 1)
+        if a == "":
+            n = int(b)
+            if n <= 0: return False
+            return max(0, size - n), size - 1
+        start = int(a)
+        end = int(b) if b else size - 1
+    except ValueError:
+        return None
+    if end < start:
+        return None
+    if start >= size:
+        return False
+    return start, min(end, size - 1)
+
+async def _gridfs_response(request: Request, gridout, meta: Dict[str, Any], media: str, headers: Dict[str, str] | None = None):
+    size = int(getattr(gridout, "length", 0) or 0)
+    etag = _etag_for(gridout, meta)
+    headers = dict(headers or {})
+    headers.update({"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "private, no-cache"})
+    uploaded = getattr(gridout, "upload_date", None)
+    if isinstance(uploaded, datetime):
+        if uploaded.tzinfo is None:
+            uploaded = uploaded.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(uploaded.astimezone(timezone.utc), usegmt=True)
+
+    # 304 Not Modified (If-None-Match wins over If-Modified-Since)
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        if _etag_matches(inm, etag):
+            return Response(status_code=304, headers=headers)
+    elif isinstance(uploaded, datetime) and request.headers.get("if-modified-since"):
+        try:
+            ims = parsedate_to_datetime(request.headers["if-modified-since"])
+            if uploaded.replace(microsecond=0) <= ims:
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    # Range (ignored when If-Range names another version, even an unsatisfiable one: RFC 9110 13.1.5)
+    rng = _parse_range(request.headers.get("range", ""), size)
+    if_range = request.headers.get("if-range")
+    if rng is not None and if_range and if_range.strip() != etag:
+        rng = None
+    if rng is False:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = rng if rng else (0, size - 1)
+    remaining = end - start + 1 if size else 0
+    if start:
+        # GridFS seeks to chunk start // chunkSize instead of reading from chunk zero
+        await _maybe_await(gridout.seek(start))
+
+    async def _aiter():
+        left = remaining
+        while left > 0:
+            chunk = await _maybe_await(gridout.readchunk())
+            if not chunk: break
+            if len(chunk) > left:
+                chunk = chunk[:left]
+            left -= len(chunk)
+            yield chunk
+
+    headers["Content-Length"] = str(remaining)
+    if rng:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return StreamingResponse(_aiter(), status_code=206, media_type=media, headers=headers)
+    return StreamingResponse(_aiter(), media_type=media, headers=headers)
 
 # ---------- Fetch JSON report ----------
 @app.get("/api/report/{report_id}.json")
-async def get_report(report_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
+async def get_report(report_id: str, request: Request, current_user: Dict[str, Any] = Depends(get_current_user_readonly)):
     bucket = gfs_reports()
     try:
         fid = _coerce_file_id(report_id)
@@ -587,21 +1050,11 @@ async def get_report(report_id: str, current_user: Dict[str, Any] = Depends(get_
     if meta.get("user_id") != str(current_user["_id"]):
         raise HTTPException(status_code=404, detail="Report not found")
 
-    if hasattr(gridout, "readchunk"):
-        async def _aiter():
-            while True:
-                chunk = await _maybe_await(gridout.readchunk())
-                if not chunk: break
-                yield chunk
-        return StreamingResponse(_aiter(), media_type="application/json")
-    else:
-        def _iter():
-            for chunk in gridout: yield chunk
-        return StreamingResponse(_iter(), media_type="application/json")
+    return await _gridfs_response(request, gridout, meta, "application/json")
 
 # ---------- Download clean file ----------
 @app.get("/api/download/{file_id}")
-async def download_clean(file_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
+async def download_clean(file_id: str, request: Request, current_user: Dict[str, Any] = Depends(get_current_user_readonly)):
     bucket = gfs_clean()
     try:
         fid = _coerce_file_id(file_id)
@@ -616,15 +1069,4 @@ async def download_clean(file_id: str, current_user: Dict[str, Any] = Depends(ge
     filename = meta.get("filename") or "clean.bin"
     media = meta.get("content_type") or "application/octet-stream"
     headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
-
-    if hasattr(gridout, "readchunk"):
-        async def _aiter():
-            while True:
-                chunk = await _maybe_await(gridout.readchunk())
-                if not chunk: break
-                yield chunk
-        return StreamingResponse(_aiter(), media_type=media, headers=headers)
-    else:
-        def _iter():
-            for chunk in gridout: yield chunk
-        return StreamingResponse(_iter(), media_type=media, headers=headers)
+    return await _gridfs_response(request, gridout, meta, media, headers)
@@ -0,0 +1,143 @@
+# audit_log.py
+# Buffered audit writer behind db.audit().
+#
+# Events are queued in memory and a background task writes them to db.audit with
+# insert_many when AUDIT_BATCH_SIZE events are waiting or AUDIT_FLUSH_MS has passed.
+# A batch that fails or takes longer than AUDIT_WRITE_TIMEOUT_S goes to the local
+# append-only JSONL file AUDIT_FALLBACK_PATH instead, as does anything beyond
+# AUDIT_MAX_QUEUE, so the request path never waits on Mongo. File writes go through one
+# dedicated thread, so spills never interleave. stop() drains the queue.
+#
+# Every event gets its ObjectId _id at enqueue and batches are inserted in order, so a
+# write that timed out after Mongo committed (or committed a prefix) is not lost or
+# doubled. Fallback lines are canonical Extended JSON (bson.json_util), which keeps the
+# ObjectId _id and datetime types: load_fallback() reads them back, and
+# insert_many(..., ordered=False) then skips the ones already stored as duplicate keys.
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+
+import settings
+from db import db
+
+
+class AuditWriter:
+    def __init__(self, batch_size: int, flush_ms: float, write_timeout_s: float, max_queue: int, fallback_path: str) -> None:
+        self.batch_size = max(1, int(batch_size))
+        self.flush_s = max(0.01, float(flush_ms) / 1000.0)
+        self.write_timeout_s = float(write_timeout_s)
+        self.max_queue = max(self.batch_size, int(max_queue))
+        self.fallback_path = fallback_path
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._spills: Set[asyncio.Future] = set()
+        self._file_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-fallback")
+        self._stats = {"enqueued": 0, "written": 0, "batches": 0, "fallback": 0, "dropped": 0, "last_flush_ms": 0.0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await self._task
+            if self._spills:
+                await asyncio.gather(*self._spills, return_exceptions=True)
+        finally:
+            self._task = None
+
+    def enqueue(self, ev: Dict[str, Any]) -> None:
+        self._stats["enqueued"] += 1
+        ev.setdefault("_id", ObjectId())   # idempotency key for retried / replayed writes
+        self._queue.append(ev)
+        if len(self._queue) > self.max_queue:
+            # Mongo is not keeping up: spill the oldest batch to disk, off the event loop
+            spill = [self._queue.popleft() for _ in range(self.batch_size)]
+            fut = asyncio.get_running_loop().run_in_executor(self._file_io, self._write_fallback, spill)
+            self._spills.add(fut)
+            fut.add_done_callback(self._spills.discard)
+        if len(self._queue) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while self._queue:
+                await self._flush_batch()
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    break
+            if self._stopping and not self._queue:
+                return
+
+    async def _flush_batch(self) -> None:
+        batch: List[Dict[str, Any]] = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(db().audit.insert_many(batch, ordered=True), timeout=self.write_timeout_s)
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+        except BulkWriteError as e:
+            # ordered: everything before the first failed event is stored
+            n = int(e.details.get("nInserted", 0))
+            self._stats["written"] += n
+            print("audit batch write failed, using fallback file:", repr(e))
+            await asyncio.get_running_loop().run_in_executor(self._file_io, self._write_fallback, batch[n:])
+        except Exception as e:
+            # may have committed before the timeout fired: the fallback keeps the _ids
+            print("audit batch write failed, using fallback file:", repr(e))
+            await asyncio.get_running_loop().run_in_executor(self._file_io, self._write_fallback, batch)
+        self._stats["last_flush_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+
+    def _write_fallback(self, batch: List[Dict[str, Any]]) -> None:
+        """Runs only on the single _file_io thread (it also owns the fallback/dropped counters)."""
+        try:
+            with open(self.fallback_path, "a", encoding="utf-8") as f:
+                for ev in batch:
+                    f.write(json_util.dumps(ev, json_options=json_util.CANONICAL_JSON_OPTIONS) + "\n")
+            self._stats["fallback"] += len(batch)
+        except Exception as e:
+            self._stats["dropped"] += len(batch)
+            print("audit fallback write failed:", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self.running, "queued": len(self._queue), **self._stats}
+
+
+def load_fallback(path: str) -> List[Dict[str, Any]]:
+    """Events from a fallback file, with their original _id / datetime types, ready for
+    db.audit.insert_many(events, ordered=False) (already-stored events fail as duplicates)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json_util.loads(line) for line in f if line.strip()]
+
+
+AUDIT = AuditWriter(
+    settings.AUDIT_BATCH_SIZE,
+    settings.AUDIT_FLUSH_MS,
+    settings.AUDIT_WRITE_TIMEOUT_S,
+    settings.AUDIT_MAX_QUEUE,
+    str(settings.AUDIT_FALLBACK_PATH),
+)
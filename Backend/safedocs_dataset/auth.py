@@ -1,9 +1,10 @@
 # auth.py
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
-import bcrypt
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
@@ -11,12 +12,24 @@ from pydantic import BaseModel
 from bson import ObjectId
 
 from db import db, audit
+from passwords import hash_password_async, verify_password_async, needs_rehash
 
 # ---- Settings ----
 JWT_SECRET = os.getenv("JWT_SECRET", "CHANGE_ME_SUPER_SECRET")
 JWT_ALG = os.getenv("JWT_ALG", "HS256")
 JWT_EXPIRES_MIN = int(os.getenv("JWT_EXPIRES_MIN", "10080"))  # 7 days
 
+# Authenticated-user cache (per process). A short TTL bounds staleness across workers;
+# change_password / delete_account invalidate explicitly in the worker that served them.
+USER_CACHE_TTL_S = float(os.getenv("USER_CACHE_TTL_S", "30"))
+USER_CACHE_MAX = int(os.getenv("USER_CACHE_MAX", "4096"))
+# Read-only endpoints may trust the JWT claims alone (no user lookup at all).
+# Revocation on this path is per process: delete_account blocks the token only in the
+# worker that served it, and a password change blocks nothing. With several workers, a
+# deleted user's or pre-change token keeps working on read-only endpoints until it
+# expires (JWT_EXPIRES_MIN). Enable only where that window is acceptable.
+AUTH_CLAIMS_FAST_PATH = os.getenv("AUTH_CLAIMS_FAST_PATH", "0").lower() in ("1", "true", "yes")
+
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -38,17 +51,6 @@ def _now_utc():
     return datetime.now(timezone.utc)
 
 
-def hash_password(pw: str) -> str:
-    return bcrypt.hashpw(pw.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
-
-def verify_password(pw: str, hashed: str) -> bool:
-    try:
-        return bcrypt.checkpw(pw.encode("utf-8"), hashed.encode("utf-8"))
-    except Exception:
-        return False
-
-
 def create_access_token(user_id: str, email: str) -> str:
     exp = _now_utc() + timedelta(minutes=JWT_EXPIRES_MIN)
     payload = {"sub": user_id, "email": email, "exp": exp}
@@ -66,6 +68,79 @@ async def _get_user_by_id(uid: str) -> Optional[dict]:
         return None
 
 
+# ---- Authenticated-user cache ----
+class _UserCache:
+    """TTL + LRU cache of user documents keyed by (user id, token)."""
+
+    def __init__(self, ttl_s: float, max_items: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_items = max(0, max_items)
+        self._items: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+        self._revoked: "OrderedDict[str, float]" = OrderedDict()   # deleted users (claims fast path)
+        self.hits = 0
+        self.misses = 0
+        self.claims_hits = 0
+        self._lookup_ms_ewma: Optional[float] = None
+
+    def get(self, uid: str, token: str) -> Optional[dict]:
+        key = (uid, token)
+        item = self._items.get(key)
+        if item is not None and item[0] > time.monotonic():
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+        if item is not None:
+            del self._items[key]
+        return None
+
+    def put(self, uid: str, token: str, user: dict, lookup_ms: float) -> None:
+        self.misses += 1
+        self._lookup_ms_ewma = lookup_ms if self._lookup_ms_ewma is None else 0.9 * self._lookup_ms_ewma + 0.1 * lookup_ms
+        if self.max_items <= 0 or self.ttl_s <= 0:
+            return
+        self._items[(uid, token)] = (time.monotonic() + self.ttl_s, user)
+        self._items.move_to_end((uid, token))
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def invalidate(self, uid: str, revoke: bool = False) -> None:
+        for key in [k for k in self._items if k[0] == uid]:
+            del self._items[key]
+        if revoke:
+            self._revoked[uid] = time.time()
+            while len(self._revoked) > 10000:
+                self._revoked.popitem(last=False)
+
+    def is_revoked(self, uid: str) -> bool:
+        return uid in self._revoked
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        avg = self._lookup_ms_ewma or 0.0
+        return {
+            "size": len(self._items),
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "claims_fast_path": self.claims_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "lookup_ms_avg": round(avg, 2),
+            "saved_ms_est": round((self.hits + self.claims_hits) * avg, 1),
+        }
+
+
+_USER_CACHE = _UserCache(USER_CACHE_TTL_S, USER_CACHE_MAX)
+
+
+def invalidate_user(uid: str, revoke: bool = False) -> None:
+    """Drop cached documents for a user (revoke=True also blocks the claims-only path)."""
+    _USER_CACHE.invalidate(str(uid), revoke=revoke)
+
+
+def user_cache_stats() -> dict:
+    return _USER_CACHE.stats()
+
+
 def _pick_hash_field(user: dict) -> Optional[str]:
     # Back-compat: old docs may have 'password'; new ones have 'password_hash'
     if not user:
@@ -77,8 +152,17 @@ def _pick_hash_field(user: dict) -> Optional[str]:
     return None
 
 
+def user_id_from_token(token: str) -> Optional[str]:
+    """Decode a bearer token without a Mongo lookup; None if it is missing or invalid."""
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+        return payload.get("sub") or None
+    except JWTError:
+        return None
+
+
 # ---- Dependencies ----
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+def _claims_or_401(token: str) -> dict:
     credentials_error = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -90,13 +174,41 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
             raise credentials_error
     except JWTError:
         raise credentials_error
+    return payload
 
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    payload = _claims_or_401(token)
+    uid = payload["sub"]
+
+    user = _USER_CACHE.get(uid, token)
+    if user is not None:
+        return user
+
+    t0 = time.perf_counter()
     user = await _get_user_by_id(uid)
     if not user:
-        raise credentials_error
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    _USER_CACHE.put(uid, token, user, (time.perf_counter() - t0) * 1000.0)
     return user
 
 
+async def get_current_user_readonly(token: str = Depends(oauth2_scheme)) -> dict:
+    """
+    For read-only endpoints that only need the caller's id. With AUTH_CLAIMS_FAST_PATH
+    the signed JWT claims are trusted as-is ({"_id", "email"}), skipping the user lookup;
+    otherwise this is get_current_user. Revocation here is per process (see the flag).
+    """
+    if not AUTH_CLAIMS_FAST_PATH:
+        return await get_current_user(token)
+    payload = _claims_or_401(token)
+    uid = payload["sub"]
+    if _USER_CACHE.is_revoked(uid):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    _USER_CACHE.claims_hits += 1
+    return {"_id": uid, "email": payload.get("email"), "claims_only": True}
+
+
 # ---- Routes ----
 @router.post("/signup", response_model=TokenOut)
 async def signup(body: UserCreate):
@@ -111,7 +223,7 @@ async def signup(body: UserCreate):
     doc = {
         "email": email,
         "name": (body.name or "").strip(),
-        "password_hash": hash_password(body.password),
+        "password_hash": await hash_password_async(body.password),
         "created_at": _now_utc(),
         "updated_at": _now_utc(),
         "last_login_at": None,
@@ -134,17 +246,20 @@ async def login(form: OAuth2PasswordRequestForm = Depends()):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     hashed = _pick_hash_field(user)
-    if not hashed or not verify_password(pw, hashed):
+    if not hashed or not await verify_password_async(pw, hashed):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    update = {"$set": {"last_login_at": _now_utc()}}
     # If legacy field 'password' exists, migrate
     if "password" in user and "password_hash" not in user:
-        await db().users.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"password_hash": user["password"], "updated_at": _now_utc()}, "$unset": {"password": ""}},
-        )
-
-    await db().users.update_one({"_id": user["_id"]}, {"$set": {"last_login_at": _now_utc()}})
+        update["$set"].update({"password_hash": hashed, "updated_at": _now_utc()})
+        update["$unset"] = {"password": ""}
+    # Hash made with a different BCRYPT_ROUNDS: upgrade it while we have the plaintext
+    if needs_rehash(hashed):
+        update["$set"].update({"password_hash": await hash_password_async(pw), "updated_at": _now_utc()})
+
+    await db().users.update_one({"_id": user["_id"]}, update)
+    invalidate_user(str(user["_id"]))
     token = create_access_token(str(user["_id"]), email)
     await audit("login", str(user["_id"]), {"email": email})
     return {"access_token": token, "token_type": "bearer"}
@@ -170,14 +285,15 @@ class ChangePasswordBody(BaseModel):
 @router.post("/change-password")
 async def change_password(body: ChangePasswordBody, user: dict = Depends(get_current_user)):
     hashed = _pick_hash_field(user)
-    if not hashed or not verify_password(body.old_password, hashed):
+    if not hashed or not await verify_password_async(body.old_password, hashed):
         raise HTTPException(status_code=400, detail="Old password is incorrect")
 
-    new_hash = hash_password(body.new_password)
+    new_hash = await hash_password_async(body.new_password)
     await db().users.update_one(
         {"_id": user["_id"]},
         {"$set": {"password_hash": new_hash, "updated_at": _now_utc()}},
     )
+    invalidate_user(str(user["_id"]))
     await audit("change_password", str(user["_id"]), {})
     return {"ok": True}
 
@@ -187,6 +303,8 @@ async def delete_account(user: dict = Depends(get_current_user)):
     uid = str(user["_id"])
     await db().files.delete_many({"user_id": uid})
     await db().reports.delete_many({"user_id": uid})
+    await db().user_stats.delete_one({"_id": uid})
     await db().users.delete_one({"_id": user["_id"]})
+    invalidate_user(uid, revoke=True)
     await audit("delete_account", uid, {})
     return {"ok": True}
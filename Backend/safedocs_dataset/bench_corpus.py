@@ -0,0 +1,247 @@
+# bench_corpus.py
+# Sanitizer + scanner throughput over a synthetic corpus (../generate_test_corpus.py).
+#
+# Every tool runs in its own fresh (spawned) process, so peak RSS is the tool's own:
+#   sanitize_pdf / sanitize_ooxml / sanitize_rtf   the full sanitizers in scripts/ (*_buffer)
+#   scan                                           the API scanner (scan_file.scan_bytes, analyze-only)
+# After a warm-up call (dictionary load, imports) each file is run --repeat times. Results are
+# grouped by (tool, type, size): files, MB/s, files/s, p50/p95/p99 latency and peak RSS
+# (VmHWM, reset per group through /proc/self/clear_refs where allowed). Groups run smallest
+# size first: RSS rarely shrinks back, so a small group after a large one would inherit its peak.
+#
+# Usage:
+#   python bench_corpus.py --generate --sizes 10KB,1MB,20MB --json bench_corpus.json
+#   python bench_corpus.py --corpus out/bench_corpus --tools sanitize_pdf,scan --repeat 5
+#   python bench_corpus.py --corpus out/bench_corpus --json new.json --compare old.json
+# The JSON carries the commit (git rev-parse) and the corpus manifest, so files from different
+# commits can be compared with --compare.
+from __future__ import annotations
+import argparse
+import importlib.util
+import json
+import math
+import multiprocessing as mp
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+TOOLS = {
+    "sanitize_pdf": ("pdf",),
+    "sanitize_ooxml": ("docx", "pptx", "xlsx"),
+    "sanitize_rtf": ("rtf",),
+    "scan": ("pdf", "docx", "pptx", "xlsx", "rtf"),
+}
+
+
+# ---------------- child process ----------------
+def _status_kb(field: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return float(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _reset_peak() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")   # resets VmHWM to the current RSS
+        return True
+    except OSError:
+        return False
+
+def _peak_mb() -> Optional[float]:
+    kb = _status_kb("VmHWM")
+    if kb is None:
+        try:
+            import resource
+            kb = float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+        except Exception:
+            return None
+    return round(kb / 1024.0, 1)
+
+def _load_tool(tool: str):
+    """-> fn(data, kind) for one tool. scripts/ goes first on sys.path (full sanitizers)."""
+    sys.path.insert(0, str(HERE / "scripts"))
+    if tool == "sanitize_pdf":
+        from sanitize_pdf import sanitize_pdf_buffer
+        return lambda data, kind: sanitize_pdf_buffer(data)
+    if tool == "sanitize_ooxml":
+        from sanitize_ooxml import sanitize_ooxml_buffer
+        return lambda data, kind: sanitize_ooxml_buffer(data, ext=kind)
+    if tool == "sanitize_rtf":
+        from sanitize_rtf import sanitize_rtf_buffer
+        return lambda data, kind: sanitize_rtf_buffer(data)
+    # scripts/ has its own scan_file.py (CLI); load the API scanner explicitly
+    spec = importlib.util.spec_from_file_location("scan_file", HERE / "scan_file.py")
+    scan_file = importlib.util.module_from_spec(spec)
+    sys.modules["scan_file"] = scan_file
+    spec.loader.exec_module(scan_file)
+    return lambda data, kind: scan_file.scan_bytes(data, filename=f"bench.{kind}", analyze_only=True)
+
+def _run_tool(tool: str, groups: Dict[str, List[Tuple[str, str]]], repeat: int) -> Dict:
+    """groups: "kind/size" -> [(path, kind)]. Runs in a fresh process."""
+    t0 = time.perf_counter()
+    try:
+        fn = _load_tool(tool)
+    except Exception as e:
+        return {"error": f"import failed: {e}"}
+    first = next(iter(groups.values()))[0]
+    fn(Path(first[0]).read_bytes(), first[1])   # warm-up: dictionary / engine / model load
+    out: Dict = {"warmup_s": round(time.perf_counter() - t0, 3), "baseline_rss_mb": round((_status_kb("VmRSS") or 0) / 1024.0, 1),
+                 "peak_reset": _reset_peak(), "groups": {}}
+    for key, files in groups.items():
+        _reset_peak()
+        lat: List[float] = []
+        nbytes = errors = 0
+        for path, kind in files:
+            data = Path(path).read_bytes()
+            for _ in range(repeat):
+                t = time.perf_counter()
+                try:
+                    fn(data, kind)
+                except Exception:
+                    errors += 1
+                lat.append(time.perf_counter() - t)
+                nbytes += len(data)
+        out["groups"][key] = {"files": len(files), "runs": len(lat), "bytes": nbytes, "latencies": lat,
+                              "errors": errors, "peak_rss_mb": _peak_mb()}
+    return out
+
+
+# ---------------- parent ----------------
+def _pct(sorted_vals: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+def _summarize(tool: str, key: str, g: Dict) -> Dict:
+    lat = sorted(g["latencies"])
+    total = sum(lat)
+    kind, size = key.split("/", 1)
+    return {
+        "tool": tool, "type": kind, "size": size, "files": g["files"], "runs": g["runs"], "bytes": g["bytes"],
+        "seconds": round(total, 4),
+        "mb_per_s": round(g["bytes"] / 1048576.0 / total, 2) if total else None,
+        "files_per_s": round(g["runs"] / total, 2) if total else None,
+        "p50_ms": round(_pct(lat, 50) * 1000.0, 2),
+        "p95_ms": round(_pct(lat, 95) * 1000.0, 2),
+        "p99_ms": round(_pct(lat, 99) * 1000.0, 2),
+        "peak_rss_mb": g["peak_rss_mb"],
+        "errors": g["errors"],
+    }
+
+def _load_corpus(corpus: Path) -> List[Dict]:
+    manifest = corpus / "manifest.json"
+    if manifest.exists():
+        return json.loads(manifest.read_text(encoding="utf-8"))
+    rows = []
+    for p in sorted(corpus.iterdir()):
+        kind = p.suffix.lower().lstrip(".")
+        if p.is_file() and kind in TOOLS["scan"]:
+            rows.append({"file": p.name, "kind": kind, "size_bytes": p.stat().st_size, "target_bytes": p.stat().st_size})
+    return rows
+
+def _size_label(row: Dict) -> str:
+    sys.path.insert(0, str(HERE.parent))
+    from generate_test_corpus import size_label
+    return size_label(int(row.get("target_bytes") or row["size_bytes"]))
+
+def _commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+def _compare(base: Dict, rows: List[Dict]) -> None:
+    old = {(r["tool"], r["type"], r["size"]): r for r in base.get("results", [])}
+    print(f"\nvs {base.get('commit') or base.get('label') or 'baseline'}:")
+    for r in rows:
+        o = old.get((r["tool"], r["type"], r["size"]))
+        if not o or not o.get("mb_per_s") or not r.get("mb_per_s"):
+            continue
+        d_tp = 100.0 * (r["mb_per_s"] - o["mb_per_s"]) / o["mb_per_s"]
+        d_p95 = 100.0 * (r["p95_ms"] - o["p95_ms"]) / o["p95_ms"] if o["p95_ms"] else 0.0
+        d_rss = (r["peak_rss_mb"] or 0) - (o.get("peak_rss_mb") or 0)
+        print(f"  {r['tool']:<15} {r['type']:<5} {r['size']:>6}  MB/s {d_tp:+7.1f}%  p95 {d_p95:+7.1f}%  peak RSS {d_rss:+8.1f} MB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Sanitizer/scanner throughput over a synthetic corpus")
+    ap.add_argument("--corpus", default=str(HERE / "out" / "bench_corpus"))
+    ap.add_argument("--generate", action="store_true", help="(re)build the corpus first (../generate_test_corpus.py)")
+    ap.add_argument("--types", default="pdf,docx,pptx,xlsx,rtf")
+    ap.add_argument("--sizes", default="10KB,1MB,20MB")
+    ap.add_argument("--count", type=int, default=3, help="files per (type, size) when generating")
+    ap.add_argument("--units", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    for k in ("objects", "macros", "annots", "urls", "media"):
+        ap.add_argument(f"--{k}", type=float, default=None, help="density (see generate_test_corpus.py)")
+    ap.add_argument("--tools", default=",".join(TOOLS))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--label", default="", help="free-form run label stored in the JSON")
+    ap.add_argument("--json", default="")
+    ap.add_argument("--compare", default="", help="earlier --json output to diff against")
+    args = ap.parse_args()
+
+    corpus = Path(args.corpus)
+    if args.generate:
+        sys.path.insert(0, str(HERE.parent))
+        from generate_test_corpus import build_corpus, parse_size
+        build_corpus(corpus, [t.strip() for t in args.types.split(",") if t.strip()],
+                     [parse_size(s) for s in args.sizes.split(",") if s.strip()], args.count, args.units, args.seed,
+                     **{k: getattr(args, k) for k in ("objects", "macros", "annots", "urls", "media")})
+    manifest = _load_corpus(corpus)
+    if not manifest:
+        ap.error(f"empty corpus: {corpus} (use --generate)")
+
+    rows: List[Dict] = []
+    tools: Dict[str, Dict] = {}
+    ctx = mp.get_context("spawn")
+    for tool in [t.strip() for t in args.tools.split(",") if t.strip()]:
+        if tool not in TOOLS:
+            ap.error(f"unknown tool: {tool}")
+        groups: Dict[str, List[Tuple[str, str]]] = {}
+        for m in sorted(manifest, key=lambda m: (int(m.get("target_bytes") or m["size_bytes"]), m["kind"])):
+            if m["kind"] in TOOLS[tool]:
+                groups.setdefault(f"{m['kind']}/{_size_label(m)}", []).append((str(corpus / m["file"]), m["kind"]))
+        if not groups:
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+            res = ex.submit(_run_tool, tool, groups, args.repeat).result()
+        if "error" in res:
+            print(f"{tool:<15} skipped: {res['error']}")
+            tools[tool] = {"error": res["error"]}
+            continue
+        tools[tool] = {k: v for k, v in res.items() if k != "groups"}
+        for key, g in res["groups"].items():
+            r = _summarize(tool, key, g)
+            rows.append(r)
+            print(f"{tool:<15} {r['type']:<5} {r['size']:>6}  {r['files']:>3} files  {r['mb_per_s'] or 0:>8.2f} MB/s  "
+                  f"{r['files_per_s'] or 0:>8.2f} files/s  p50 {r['p50_ms']:>9.2f}  p95 {r['p95_ms']:>9.2f}  "
+                  f"p99 {r['p99_ms']:>9.2f} ms  peak {r['peak_rss_mb'] or 0:>7.1f} MB" + (f"  errors {r['errors']}" if r["errors"] else ""))
+
+    report = {
+        "label": args.label, "commit": _commit(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+        "repeat": args.repeat, "corpus": {"dir": str(corpus), "files": manifest}, "tools": tools, "results": rows,
+    }
+    if args.compare:
+        _compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), rows)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
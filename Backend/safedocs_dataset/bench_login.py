@@ -0,0 +1,87 @@
+# bench_login.py
+# Login throughput: bcrypt verify inline on the event loop (old auth.py) vs the
+# passwords.py thread pool. Also reports the worst event-loop stall seen by a 10 ms
+# ticker while the logins run, i.e. how long every other request would have waited.
+#
+# Usage:
+#   python bench_login.py
+#   python bench_login.py --concurrency 32 --rounds 12 --workers 4 --json bench_login.json
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Dict
+
+import passwords
+
+
+async def _ticker(stop: asyncio.Event, out: Dict[str, float]) -> None:
+    interval = 0.01
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        out["max_stall_ms"] = max(out["max_stall_ms"], (now - last - interval) * 1000.0)
+        last = now
+
+
+async def _run(mode: str, hashed: str, pw: str, n: int) -> Dict[str, float]:
+    async def login_inline():
+        return passwords.verify_password(pw, hashed)
+
+    async def login_pooled():
+        return await passwords.verify_password_async(pw, hashed)
+
+    login = login_inline if mode == "inline" else login_pooled
+    lag = {"max_stall_ms": 0.0}
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop, lag))
+    await asyncio.sleep(0.02)
+
+    t0 = time.perf_counter()
+    ok = await asyncio.gather(*(login() for _ in range(n)))
+    wall = time.perf_counter() - t0
+    stop.set()
+    await ticker
+    assert all(ok)
+    return {
+        "mode": mode,
+        "logins": n,
+        "wall_s": round(wall, 3),
+        "logins_per_s": round(n / wall, 2),
+        "max_loop_stall_ms": round(lag["max_stall_ms"], 1),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Concurrent login (bcrypt verify) benchmark")
+    ap.add_argument("--concurrency", type=int, default=16, help="simultaneous logins")
+    ap.add_argument("--rounds", type=int, default=passwords.BCRYPT_ROUNDS, help="bcrypt cost")
+    ap.add_argument("--workers", type=int, default=passwords.PASSWORD_WORKERS, help="password thread pool size")
+    ap.add_argument("--json", default="")
+    args = ap.parse_args()
+
+    passwords.PASSWORD_WORKERS = args.workers
+    pw = "correct horse battery staple"
+    hashed = passwords.hash_password(pw, rounds=args.rounds)
+
+    rows = []
+    for mode in ("inline", "pooled"):
+        r = asyncio.run(_run(mode, hashed, pw, args.concurrency))
+        rows.append(r)
+        print(f"{mode:<7} {r['logins']:>4} logins  {r['wall_s']:>7.3f} s  {r['logins_per_s']:>7.2f}/s  "
+              f"max loop stall {r['max_loop_stall_ms']:>8.1f} ms")
+    passwords.shutdown()
+    speedup = rows[0]["wall_s"] / rows[1]["wall_s"] if rows[1]["wall_s"] else 0.0
+    print(f"rounds={args.rounds} workers={args.workers}  speedup x{speedup:.2f}")
+
+    if args.json:
+        out = {"rounds": args.rounds, "workers": args.workers, "speedup": round(speedup, 2), "results": rows}
+        Path(args.json).write_text(json.dumps(out, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench_sanitize_io.py
+# What the temp-file round trip used to cost per sanitize: the old *_bytes wrappers and
+# the API's path fallback made a TemporaryDirectory, wrote the upload, ran the path-based
+# sanitizer (which read it back, and for OOXML copied it again to work.zip) and read the
+# output. Compares that against sanitize_*_buffer, which never touches the filesystem.
+#
+# Reports wall time and read/write syscalls (from /proc/self/io, Linux only).
+#
+# Usage:
+#   python bench_sanitize_io.py ../safedocs_realistic_pdf.pdf ../safedocs_realistic_docx.docx
+#   python bench_sanitize_io.py --repeat 20 --json bench_sanitize_io.json path/to/files*
+from __future__ import annotations
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+
+
+def _io_counters() -> Optional[Dict[str, int]]:
+    try:
+        with open("/proc/self/io", "r") as f:
+            return {k: int(v) for k, v in (line.split(":") for line in f)}
+    except Exception:
+        return None
+
+
+def _tempdir_roundtrip(path_fn, ext: str, data: bytes) -> bytes:
+    # the pre-buffer flow (OOXML also copied the input to work.zip before opening it)
+    with tempfile.TemporaryDirectory() as td:
+        ip = Path(td) / f"in{ext}"; op = Path(td) / f"out{ext}"
+        ip.write_bytes(data)
+        if ext in (".docx", ".pptx", ".xlsx"):
+            work = Path(td) / "work.zip"; shutil.copy(ip, work)
+            ip = work.rename(Path(td) / f"work{ext}")
+        path_fn(ip, op)
+        return op.read_bytes()
+
+
+def _measure(fn, repeat: int, baseline: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Median wall time and mean syscalls per call (minus the counter reads themselves)."""
+    times: List[float] = []
+    syscr = syscw = 0
+    for _ in range(repeat):
+        before = _io_counters()
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+        after = _io_counters()
+        if before and after:
+            syscr += after["syscr"] - before["syscr"]; syscw += after["syscw"] - before["syscw"]
+    if _io_counters() is None:
+        return {"median_ms": round(statistics.median(times), 3), "syscr": None, "syscw": None}
+    base = baseline or {"syscr": 0.0, "syscw": 0.0}
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "syscr": round(syscr / repeat - base["syscr"], 1),
+        "syscw": round(syscw / repeat - base["syscw"], 1),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Sanitizer filesystem round-trip benchmark (tempdir vs in-memory)")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--json", default="")
+    ap.add_argument("--local-sanitizers", action="store_true", help="use sanitize_*.py next to this file")
+    args = ap.parse_args()
+
+    if not args.local_sanitizers:
+        sys.path.insert(0, str(HERE / "scripts"))
+    import sanitize_pdf, sanitize_ooxml, sanitize_rtf
+
+    impls = {
+        ".pdf":  (sanitize_pdf.sanitize_pdf, sanitize_pdf.sanitize_pdf_buffer, {}),
+        ".docx": (sanitize_ooxml.sanitize_ooxml, sanitize_ooxml.sanitize_ooxml_buffer, {"ext": "docx"}),
+        ".pptx": (sanitize_ooxml.sanitize_ooxml, sanitize_ooxml.sanitize_ooxml_buffer, {"ext": "pptx"}),
+        ".xlsx": (sanitize_ooxml.sanitize_ooxml, sanitize_ooxml.sanitize_ooxml_buffer, {"ext": "xlsx"}),
+        ".rtf":  (sanitize_rtf.sanitize_rtf, sanitize_rtf.sanitize_rtf_buffer, {}),
+    }
+
+    baseline = _measure(lambda: None, args.repeat)
+    rows: List[Dict] = []
+    for f in args.files:
+        p = Path(f)
+        ext = p.suffix.lower()
+        if ext not in impls:
+            print("skip (unsupported):", p.name); continue
+        path_fn, buf_fn, kw = impls[ext]
+        data = p.read_bytes()
+        buf_fn(data, **kw)   # warm-up: dictionary / engine load
+        old = _measure(lambda: _tempdir_roundtrip(path_fn, ext, data), args.repeat, baseline)
+        new = _measure(lambda: buf_fn(memoryview(data), **kw), args.repeat, baseline)
+        rows.append({"file": p.name, "size_bytes": len(data), "tempdir": old, "in_memory": new,
+                     "saved_ms": round(old["median_ms"] - new["median_ms"], 3)})
+        print(f"{p.name:<40} {len(data):>10,} B  tempdir {old['median_ms']:>8.2f} ms "
+              f"(r {old['syscr']}, w {old['syscw']})  in-memory {new['median_ms']:>8.2f} ms "
+              f"(r {new['syscr']}, w {new['syscw']})")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"repeat": args.repeat, "results": rows}, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
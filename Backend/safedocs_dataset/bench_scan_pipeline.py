@@ -0,0 +1,90 @@
+# bench_scan_pipeline.py
+# Per-upload CPU cost of the scan pipeline: legacy (scan_bytes sanitizes on both the
+# original and the clean artifact) vs sanitize-once (analyze-only scans + one sanitizer run).
+#
+# Usage:
+#   python bench_scan_pipeline.py ../safedocs_realistic_pdf.pdf ../safedocs_realistic_docx.docx
+#   python bench_scan_pipeline.py --repeat 5 --json bench_scan_pipeline.json path/to/*.pdf
+#
+# Uses the full sanitizers in scripts/ (put first on sys.path) unless --local-sanitizers is given.
+from __future__ import annotations
+import argparse
+import importlib.util
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+HERE = Path(__file__).resolve().parent
+
+
+def _legacy(scan_bytes, data: bytes, name: str) -> None:
+    first = scan_bytes(data, filename=name)
+    clean = first.get("clean_bytes") or data
+    scan_bytes(clean, filename=f"clean_{name}")
+
+
+def _sanitize_once(scan_bytes, run_sanitizer, apply_outcome, ext: str, data: bytes, name: str) -> None:
+    first = scan_bytes(data, filename=name, analyze_only=True)
+    clean, _meta = run_sanitizer(ext, data)
+    apply_outcome(first, clean is not None)
+    second = scan_bytes(clean or data, filename=f"clean_{name}", analyze_only=True)
+    apply_outcome(second, clean is not None)
+
+
+def _cpu_ms(fn, repeat: int) -> List[float]:
+    out = []
+    for _ in range(repeat):
+        t0 = time.process_time()
+        fn()
+        out.append((time.process_time() - t0) * 1000.0)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Scan pipeline CPU benchmark (legacy vs sanitize-once)")
+    ap.add_argument("files", nargs="+")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default="")
+    ap.add_argument("--local-sanitizers", action="store_true", help="use sanitize_*.py next to this file")
+    args = ap.parse_args()
+
+    if not args.local_sanitizers:
+        sys.path.insert(0, str(HERE / "scripts"))
+    # scripts/ has its own scan_file.py (CLI); load the API scanner explicitly
+    spec = importlib.util.spec_from_file_location("scan_file", HERE / "scan_file.py")
+    scan_file = importlib.util.module_from_spec(spec)
+    sys.modules["scan_file"] = scan_file
+    spec.loader.exec_module(scan_file)
+    scan_bytes, apply_sanitizer_outcome = scan_file.scan_bytes, scan_file.apply_sanitizer_outcome
+    _run_sanitizer, _ext_from_name = scan_file._run_sanitizer, scan_file._ext_from_name
+
+    rows: List[Dict] = []
+    for f in args.files:
+        p = Path(f)
+        data = p.read_bytes()
+        ext = _ext_from_name(p.name)
+        legacy = _cpu_ms(lambda: _legacy(scan_bytes, data, p.name), args.repeat)
+        once = _cpu_ms(lambda: _sanitize_once(scan_bytes, _run_sanitizer, apply_sanitizer_outcome, ext, data, p.name), args.repeat)
+        l_med, o_med = statistics.median(legacy), statistics.median(once)
+        rows.append({
+            "file": p.name,
+            "size_bytes": len(data),
+            "sanitizer_available": scan_file.has_sanitizer(ext),
+            "legacy_cpu_ms": round(l_med, 2),
+            "sanitize_once_cpu_ms": round(o_med, 2),
+            "reduction_pct": round(100.0 * (l_med - o_med) / l_med, 1) if l_med else 0.0,
+        })
+        r = rows[-1]
+        print(f"{r['file']:<48} {r['size_bytes']:>10,} B  legacy {r['legacy_cpu_ms']:>9.1f} ms  "
+              f"once {r['sanitize_once_cpu_ms']:>9.1f} ms  (-{r['reduction_pct']}%)")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"repeat": args.repeat, "results": rows}, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
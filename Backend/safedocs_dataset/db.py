@@ -56,6 +56,11 @@ async def init_mongo(app=None) -> None:
 
     # scans collection: keep a created_at index for stats and TTL (if desired)
     await _db.scans.create_index("created_at")
+    # per-user keyset listing (/api/me/scans) and stats aggregation
+    await _db.scans.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+    # verdict cache: _id is "<sha256>:<type variant>:<engine_key>"; engine_key index for stale purges
+    await _db.verdict_cache.create_index("engine_key")
+    await _db.verdict_cache.create_index("sha256")
     # Optionally: TTL on scans metadata (commented by default)
     # await _db.scans.create_index("created_at", expireAfterSeconds=FILE_TTL_HOURS * 3600)
 
@@ -118,7 +123,8 @@ async def audit(*args, **kwargs) -> None:
       - await audit("login", "user_id_string", {"ip": "...", ...})
       - await audit(action="login", user_id="...", details={...})
 
-    Adds 'created_at' automatically. Never raises.
+    Adds 'created_at' automatically. Never raises. While the API is running the event
+    is only queued (see audit_log.py); otherwise it is inserted directly.
     """
     try:
         if len(args) == 1 and isinstance(args[0], dict):
@@ -130,7 +136,11 @@ async def audit(*args, **kwargs) -> None:
             ev = {"action": action, "user_id": user_id, "details": details}
 
         ev.setdefault("created_at", dt.datetime.utcnow())
-        await db().audit.insert_one(ev)
+        from audit_log import AUDIT
+        if AUDIT.running:
+            AUDIT.enqueue(ev)
+        else:
+            await db().audit.insert_one(ev)
     except Exception as e:
         # Don't break the app if audit logging fails
         print("audit log error:", e)
@@ -0,0 +1,166 @@
+# ingest.py
+# Streaming upload ingest: UploadFile -> (sha256, GridFS "uploads", spool for the scanners)
+#
+# The upload is read in INGEST_CHUNK_KB chunks. Each chunk is hashed, written to a
+# GridFS upload stream and appended to a spool that stays in memory up to
+# SPOOL_MAX_MEMORY_MB and then moves to a named temp file. Scanner jobs get
+# Ingested.source: the bytes for small uploads, or the temp file path for large
+# ones so worker processes read it themselves. The full body is never held twice.
+from __future__ import annotations
+import hashlib
+import inspect
+import io
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Union
+
+from fastapi import HTTPException, UploadFile
+
+import settings
+
+Source = Union[bytes, str]   # in-memory bytes or a filesystem path
+
+
+def load_source(src: Source) -> bytes:
+    """Materialize an ingest source (used inside worker processes)."""
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return bytes(src)
+    with open(src, "rb") as f:
+        return f.read()
+
+
+def max_upload_bytes() -> int:
+    return int(settings.MAX_UPLOAD_MB) * 1024 * 1024
+
+
+class UploadTooLarge(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=413, detail=f"File exceeds {settings.MAX_UPLOAD_MB} MB limit")
+
+
+class _Spool:
+    """BytesIO until max_memory bytes, then a named temp file (path is passable to worker processes)."""
+
+    def __init__(self, max_memory: int, suffix: str = "") -> None:
+        self.max_memory = max_memory
+        self.suffix = suffix
+        self._buf: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+        self.path: Optional[str] = None
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self._buf is not None and self._buf.tell() + len(chunk) > self.max_memory:
+            self._file = tempfile.NamedTemporaryFile(prefix="safedocs_", suffix=self.suffix, delete=False)
+            self.path = self._file.name
+            self._file.write(self._buf.getbuffer())
+            self._buf = None
+        if self._buf is not None:
+            self._buf.write(chunk)
+        else:
+            self._file.write(chunk)
+
+    def finish(self) -> Source:
+        if self._buf is not None:
+            return self._buf.getvalue()
+        self._file.close()
+        return self.path
+
+    def discard(self) -> None:
+        self._buf = None
+        if self._file is not None:
+            try: self._file.close()
+            except Exception: pass
+        if self.path:
+            try: os.unlink(self.path)
+            except OSError: pass
+            self.path = None
+
+
+class Ingested:
+    __slots__ = ("upload_id", "sha256", "size", "source", "path", "created_at", "ingest_ms")
+
+    def __init__(self, upload_id: Any, sha256: str, size: int, source: Source, path: Optional[str],
+                 created_at: str, ingest_ms: float = 0.0) -> None:
+        self.upload_id = upload_id
+        self.sha256 = sha256
+        self.size = size
+        self.source = source
+        self.path = path
+        self.created_at = created_at
+        self.ingest_ms = ingest_ms
+
+    def read_bytes(self) -> bytes:
+        return load_source(self.source)
+
+    def close(self) -> None:
+        """Remove the spooled temp file (no-op for in-memory uploads)."""
+        self.source = b""
+        if self.path:
+            try: os.unlink(self.path)
+            except OSError: pass
+            self.path = None
+
+
+async def _maybe_await(x):
+    return await x if inspect.isawaitable(x) else x
+
+
+async def ingest_upload(file: UploadFile, bucket, user_id: str, filename: str, content_type: str, ext: str = "") -> Ingested:
+    """
+    Stream an UploadFile into GridFS while hashing and spooling it.
+    Raises 413 as soon as MAX_UPLOAD_MB is exceeded (the partial GridFS file is aborted)
+    and 400 for empty uploads.
+    """
+    limit = max_upload_bytes()
+    declared = getattr(file, "size", None)
+    if isinstance(declared, int) and declared > limit:
+        raise UploadTooLarge()
+
+    t0 = time.perf_counter()
+    created_at = datetime.now(timezone.utc).isoformat()
+    meta: Dict[str, Any] = {
+        "user_id": user_id,
+        "filename": filename,
+        "content_type": content_type,
+        "created_at": created_at,
+    }
+    grid_in = bucket.open_upload_stream(filename, metadata=meta)
+    spool = _Spool(int(settings.SPOOL_MAX_MEMORY_MB * 1024 * 1024), suffix=ext)
+    h = hashlib.sha256()
+    chunk_size = int(settings.INGEST_CHUNK_KB) * 1024
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            if spool.size + len(chunk) > limit:
+                raise UploadTooLarge()
+            h.update(chunk)
+            spool.write(chunk)
+            await _maybe_await(grid_in.write(chunk))
+        if spool.size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        sha = h.hexdigest()
+        # metadata is written with the files document when the stream closes
+        meta.update({"size": spool.size, "sha256": sha})
+        if hasattr(grid_in, "set"):
+            await _maybe_await(grid_in.set("metadata", meta))
+        else:
+            grid_in.metadata = meta
+        await _maybe_await(grid_in.close())
+    except BaseException:
+        spool.discard()
+        try:
+            await _maybe_await(grid_in.abort())
+        except Exception:
+            pass
+        raise
+
+    src = spool.finish()
+    ingest_ms = round((time.perf_counter() - t0) * 1000.0, 2)
+    return Ingested(grid_in._id, sha, spool.size, src, spool.path, created_at, ingest_ms)
@@ -0,0 +1,122 @@
+# jobs.py
+# In-process registry for background scan jobs (POST /api/scan/jobs).
+#
+# A job id is the _id of its scans row, so the row (with its "status" field) is the
+# durable record and this registry only holds live progress for the status and
+# SSE endpoints. Finished jobs are kept for settings.JOB_RETENTION_S seconds so late
+# subscribers still get the full event history, then dropped.
+from __future__ import annotations
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import settings
+
+# Pipeline stages, in order. "failed" may replace any of them.
+STAGES = ("queued", "stored", "scanned", "sanitized", "rescanned", "persisted")
+TERMINAL = ("persisted", "failed")
+
+
+class Job:
+    __slots__ = ("job_id", "user_id", "filename", "stage", "events", "result", "error",
+                 "created_at", "finished_at", "task", "_cond")
+
+    def __init__(self, job_id: str, user_id: str, filename: str) -> None:
+        self.job_id = job_id
+        self.user_id = user_id
+        self.filename = filename
+        self.stage = "queued"
+        self.events: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._cond = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.stage in TERMINAL
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "status": "done" if self.stage == "persisted" else ("failed" if self.stage == "failed" else "running"),
+            "stage": self.stage,
+            "progress": round(STAGES.index(self.stage) / (len(STAGES) - 1), 2) if self.stage in STAGES else 1.0,
+            "events": list(self.events),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    def __init__(self, retention_s: float) -> None:
+        self.retention_s = float(retention_s)
+        self._jobs: Dict[str, Job] = {}
+
+    def create(self, job_id: str, user_id: str, filename: str) -> Job:
+        self._prune()
+        job = Job(job_id, user_id, filename)
+        self._jobs[job_id] = job
+        job.events.append({"seq": 0, "stage": "queued", "at": time.time(), "data": {}})
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def emit(self, job_id: str, stage: str, data: Optional[Dict[str, Any]] = None) -> None:
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return
+        job.stage = stage
+        job.events.append({"seq": len(job.events), "stage": stage, "at": time.time(), "data": data or {}})
+        if stage == "persisted":
+            job.result = data
+        if stage == "failed":
+            job.error = (data or {}).get("error")
+        if stage in TERMINAL:
+            job.finished_at = time.time()
+        async with job._cond:
+            job._cond.notify_all()
+
+    async def stream(self, job_id: str, keepalive_s: float = 15.0) -> AsyncIterator[bytes]:
+        """Server-sent events: replay history, then follow until a terminal stage.
+        Nothing is yielded while job._cond is held, so a slow client never blocks emit()."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        sent = 0
+        while True:
+            pending = job.events[sent:]
+            sent += len(pending)
+            for ev in pending:
+                yield (
+                    f"id: {ev['seq']}\nevent: {ev['stage']}\n"
+                    f"data: {json.dumps(ev, default=str)}\n\n"
+                ).encode("utf-8")
+            if job.done and sent >= len(job.events):
+                return
+            async with job._cond:
+                try:
+                    await asyncio.wait_for(job._cond.wait_for(lambda: sent < len(job.events)), timeout=keepalive_s)
+                    timed_out = False
+                except asyncio.TimeoutError:
+                    timed_out = True
+            if timed_out:
+                yield b": keepalive\n\n"
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for j in self._jobs.values() if not j.done)
+        return {"tracked": len(self._jobs), "running": running}
+
+    def _prune(self) -> None:
+        now = time.time()
+        for jid in [j.job_id for j in self._jobs.values()
+                    if j.finished_at is not None and now - j.finished_at > self.retention_s]:
+            self._jobs.pop(jid, None)
+
+
+JOBS = JobRegistry(settings.JOB_RETENTION_S)
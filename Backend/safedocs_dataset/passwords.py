@@ -0,0 +1,67 @@
+# passwords.py
+# bcrypt hashing/verification off the event loop.
+#
+# bcrypt releases the GIL while it works, so a small thread pool lets concurrent
+# logins hash in parallel instead of blocking the worker's event loop one after
+# another. BCRYPT_ROUNDS sets the cost for new hashes; hashes made with another cost
+# are reported by needs_rehash() so login can upgrade them transparently.
+from __future__ import annotations
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, PASSWORD_WORKERS), thread_name_prefix="bcrypt")
+    return _EXECUTOR
+
+
+def shutdown() -> None:
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False)
+        _EXECUTOR = None
+
+
+# ---- Sync (run inside the pool, or from scripts) ----
+def hash_password(pw: str, rounds: Optional[int] = None) -> str:
+    return bcrypt.hashpw(pw.encode("utf-8"), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)).decode("utf-8")
+
+
+def verify_password(pw: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(pw.encode("utf-8"), hashed.encode("utf-8"))
+    except Exception:
+        return False
+
+
+def hash_cost(hashed: str) -> Optional[int]:
+    """'$2b$12$...' -> 12 (None if this is not a bcrypt hash)."""
+    try:
+        parts = hashed.split("$")
+        return int(parts[2]) if len(parts) >= 4 and parts[1].startswith("2") else None
+    except (ValueError, AttributeError):
+        return None
+
+
+def needs_rehash(hashed: str) -> bool:
+    return hash_cost(hashed) != BCRYPT_ROUNDS
+
+
+# ---- Async (what the route handlers use) ----
+async def hash_password_async(pw: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), hash_password, pw)
+
+
+async def verify_password_async(pw: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), verify_password, pw, hashed)
@@ -1,13 +1,14 @@
-import shutil
+import io
 from pathlib import Path
+from typing import Dict, Tuple
 from PyPDF2 import PdfReader, PdfWriter
 
-def sanitize_pdf(in_path: Path | str, out_path: Path | str):
-    in_path  = Path(in_path)
-    out_path = Path(out_path)
+def sanitize_pdf_buffer(data: bytes | memoryview) -> Tuple[bytes, Dict]:
+    """In-memory version: (clean bytes, result). The original bytes are returned on failure."""
+    data = bytes(data)
     removed = []
     try:
-        reader = PdfReader(str(in_path))
+        reader = PdfReader(io.BytesIO(data))
         writer = PdfWriter()
         # strip OpenAction, EmbeddedFiles, AA
         root = reader.trailer.get("/Root", {})
@@ -21,8 +22,14 @@ def sanitize_pdf(in_path: Path | str, out_path: Path | str):
             if "/AA" in page:
                 del page["/AA"]; removed.append("Page.AA")
             writer.add_page(page)
-        with open(out_path, "wb") as f: writer.write(f)
-        return {"status":"ok","sanitized_file":str(out_path),"removed": sorted(set(removed))}
+        out = io.BytesIO(); writer.write(out)
+        return out.getvalue(), {"status":"ok","removed": sorted(set(removed))}
     except Exception as e:
-        shutil.copy(in_path, out_path)
-        return {"status":"failed","sanitized_file":str(out_path),"removed": [], "error": str(e)}
+        return data, {"status":"failed","removed": [], "error": str(e)}
+
+def sanitize_pdf(in_path: Path | str, out_path: Path | str):
+    in_path  = Path(in_path)
+    out_path = Path(out_path)
+    clean, res = sanitize_pdf_buffer(in_path.read_bytes())
+    out_path.write_bytes(clean)
+    return {**res, "sanitized_file": str(out_path)}
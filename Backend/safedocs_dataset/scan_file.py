@@ -173,6 +173,13 @@ def _simple_heuristics(data: bytes, ext: str) -> Dict[str, float]:
     meta_score = max(0.0, min(1.0, 0.25*tree_like + 0.35*lgbm_like + 0.3*dl_like + 0.1*rules_score))
     return {"P_TREE": tree_like, "P_LGBM": lgbm_like, "P_DL": dl_like, "P_RULES": rules_score, "P_META": meta_score}
 
+def has_sanitizer(ext: str) -> bool:
+    """True if a bytes sanitizer is importable for this extension."""
+    if ext == ".pdf": return sanitize_pdf_bytes is not None
+    if ext in (".docx", ".pptx", ".xlsx"): return sanitize_ooxml_bytes is not None
+    if ext == ".rtf": return sanitize_rtf_bytes is not None
+    return False
+
 def _run_sanitizer(ext: str, data: bytes) -> Tuple[Optional[bytes], Dict[str, str]]:
     try:
         if ext == ".pdf" and sanitize_pdf_bytes:
@@ -188,7 +195,35 @@ def _run_sanitizer(ext: str, data: bytes) -> Tuple[Optional[bytes], Dict[str, st
         return None, {"sanitizer_error": str(exc)}
     return None, {}
 
-def scan_bytes(data: bytes, filename: str = "document.bin", content_type: Optional[str] = None) -> Dict:
+def apply_sanitizer_outcome(result: Dict, sanitized: bool) -> Dict:
+    """
+    Risk adjustment scan_bytes makes when it sanitizes itself, for callers that ran it
+    with analyze_only=True and sanitized separately. Mutates and returns result.
+    """
+    ext = (result.get("meta") or {}).get("ext") or ""
+    sanitized = bool(sanitized) and has_sanitizer(ext)
+    report = result.get("report") or {}
+    if isinstance(report.get("meta"), dict):
+        report["meta"]["sanitized"] = sanitized
+    if not result.get("ok") or not sanitized or result.get("verdict") != "benign":
+        return result
+    risk_score = min(1.0, float(result.get("risk_score") or 0.0) + 0.1)
+    verdict = "malicious" if risk_score >= 0.5 else "benign"
+    result["risk_score"] = risk_score
+    result["verdict"] = verdict
+    result["recommendations"] = _recommendations(ext, verdict)
+    report["risk_score"] = risk_score
+    report["verdict"] = verdict
+    return result
+
+def scan_bytes(data: bytes, filename: str = "document.bin", content_type: Optional[str] = None,
+               analyze_only: bool = False) -> Dict:
+    """
+    Score a document. By default it also runs the type's sanitizer and returns the
+    output as clean_bytes. With analyze_only=True the sanitizer is skipped
+    (clean_bytes is None). Callers that sanitize once themselves then call
+    apply_sanitizer_outcome() so the risk score matches the default mode.
+    """
     try:
         ext = _ext_from_name(filename)
         mime = content_type or _guess_mime(ext)
@@ -217,7 +252,10 @@ def scan_bytes(data: bytes, filename: str = "document.bin", content_type: Option
         findings = _extract_findings(data, ext)
         recommendations = _recommendations(ext, verdict)
 
-        clean_bytes, san_meta = _run_sanitizer(ext, data)
+        if analyze_only:
+            clean_bytes, san_meta = None, {"skipped": "analyze_only"}
+        else:
+            clean_bytes, san_meta = _run_sanitizer(ext, data)
         sanitized = clean_bytes is not None and len(clean_bytes) > 0
 
         if sanitized and verdict == "benign":
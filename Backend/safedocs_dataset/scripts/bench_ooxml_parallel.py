@@ -0,0 +1,94 @@
+"""
+OOXML parallel member processing benchmark: 1/2/4/8 workers on a multi-sheet workbook
+
+Generates (or takes) an XLSX with many large worksheet parts (inline strings seeded with
+dictionary hits, a hyperlink block per sheet) plus sharedStrings, then sanitizes it with
+each worker count. Reports median time, speedup over serial and whether the output is
+byte-identical to the serial run. The pool is started once per worker count before timing.
+
+Usage:
+  python bench_ooxml_parallel.py --sheets 24 --rows 20000
+  python bench_ooxml_parallel.py --workers 1,2,4,8 --repeat 3 --json bench_ooxml_parallel.json
+  python bench_ooxml_parallel.py big.xlsx
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import List
+import argparse, hashlib, io, json, os, random, statistics, time, zipfile
+
+import sanitize_ooxml
+from sanitize_ooxml import sanitize_ooxml_buffer
+
+S = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def make_xlsx(sheets: int, rows: int, seed: int = 3) -> bytes:
+    rnd = random.Random(seed)
+    words = ["north", "south", "revenue", "units", "q3", "cmd.exe", "http://example.com", "total", "powershell"]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml",
+                   '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                   '<Default Extension="xml" ContentType="application/xml"/>' +
+                   "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                           f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                           for i in range(1, sheets + 1)) + "</Types>")
+        z.writestr("xl/sharedStrings.xml", f'<?xml version="1.0" encoding="UTF-8"?><sst xmlns="{S}">' +
+                   "".join(f"<si><t>{' '.join(rnd.choice(words) for _ in range(6))}</t></si>" for _ in range(rows)) + "</sst>")
+        for i in range(1, sheets + 1):
+            body = "".join(
+                f'<row r="{r}"><c r="A{r}" t="inlineStr"><is><t>{" ".join(rnd.choice(words) for _ in range(4))}</t></is></c>'
+                f'<c r="B{r}"><v>{rnd.randint(0, 99999)}</v></c><c r="C{r}" t="s"><v>{rnd.randrange(rows)}</v></c></row>'
+                for r in range(1, rows + 1))
+            z.writestr(f"xl/worksheets/sheet{i}.xml",
+                       f'<?xml version="1.0" encoding="UTF-8"?><worksheet xmlns="{S}" xmlns:r="{R}"><sheetData>{body}</sheetData>'
+                       f'<hyperlinks><hyperlink ref="A1" r:id="rId1"/></hyperlinks></worksheet>')
+    return buf.getvalue()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="OOXML parallel member processing scaling benchmark")
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--sheets", type=int, default=24)
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--workers", default="1,2,4,8")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default="")
+    args = ap.parse_args()
+
+    cases = {Path(f).name: Path(f).read_bytes() for f in args.files}
+    if not cases:
+        cases[f"generated_{args.sheets}x{args.rows}.xlsx"] = make_xlsx(args.sheets, args.rows)
+
+    rows = []
+    for name, data in cases.items():
+        base_sha, base_s = None, None
+        for w in (int(x) for x in args.workers.split(",")):
+            out, res = sanitize_ooxml_buffer(data, ext="xlsx", workers=w)   # start pool / warm up
+            times: List[float] = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                out, res = sanitize_ooxml_buffer(data, ext="xlsx", workers=w)
+                times.append(time.perf_counter() - t0)
+            sha = hashlib.sha256(out).hexdigest()
+            med = statistics.median(times)
+            if base_sha is None:
+                base_sha, base_s = sha, med
+            r = {"input": name, "size_bytes": len(data), "workers": w, "seconds_median": round(med, 3),
+                 "speedup": round(base_s / med, 2) if med else None, "identical_to_serial": sha == base_sha,
+                 "sha256": sha, "stats": res.get("stats")}
+            rows.append(r)
+            print(f"{name:<30} {len(data):>12,} B  workers {w}  {r['seconds_median']:>7.3f} s  "
+                  f"x{r['speedup']}  identical {r['identical_to_serial']}")
+        sanitize_ooxml.shutdown()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"cpus": os.cpu_count(), "repeat": args.repeat, "results": rows}, indent=2),
+                                   encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+OOXML rewrite benchmark: recompress every member (old) vs raw-copy untouched members
+
+Generates (or takes) image-heavy PPTX decks: one slide per image, each slide with a
+picture relationship, a hyperlink and a few dictionary hits in its text, media stored
+deflated the way PowerPoint writes it. Each mode runs sanitize_ooxml_buffer on the same
+bytes and reports median time plus the rewrite stats (bytes recompressed vs raw-copied).
+
+Usage:
+  python bench_ooxml_rewrite.py --slides 40
+  python bench_ooxml_rewrite.py --slides 40 --slides 200 --image-kb 512 --json bench_ooxml.json
+  python bench_ooxml_rewrite.py deck.pptx
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List
+import argparse, io, json, random, statistics, time, zipfile
+
+from sanitize_ooxml import sanitize_ooxml_buffer
+
+P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PR = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+def make_pptx(slides: int, image_kb: int = 256, seed: int = 5) -> bytes:
+    rnd = random.Random(seed)
+    words = ["quarterly", "review", "region", "powershell.exe", "http://example.com", "targets", "cmd.exe", "summary"]
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        overrides = "".join(
+            f'<Override PartName="/ppt/slides/slide{i}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.presentationml.slide+xml"/>'
+            for i in range(1, slides + 1))
+        z.writestr("[Content_Types].xml",
+                   '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                   '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                   '<Default Extension="xml" ContentType="application/xml"/><Default Extension="jpeg" ContentType="image/jpeg"/>'
+                   '<Override PartName="/ppt/presentation.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml"/>'
+                   f'{overrides}</Types>')
+        z.writestr("_rels/.rels", f'<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="{PR}">'
+                   f'<Relationship Id="rId1" Type="{R}/officeDocument" Target="ppt/presentation.xml"/></Relationships>')
+        ids = "".join(f'<p:sldId id="{255 + i}" r:id="rId{i}"/>' for i in range(1, slides + 1))
+        z.writestr("ppt/presentation.xml", f'<?xml version="1.0" encoding="UTF-8"?><p:presentation xmlns:p="{P}" '
+                   f'xmlns:r="{R}"><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>')
+        z.writestr("ppt/_rels/presentation.xml.rels", f'<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="{PR}">' +
+                   "".join(f'<Relationship Id="rId{i}" Type="{R}/slide" Target="slides/slide{i}.xml"/>'
+                           for i in range(1, slides + 1)) + "</Relationships>")
+        for i in range(1, slides + 1):
+            text = " ".join(rnd.choice(words) for _ in range(40))
+            z.writestr(f"ppt/slides/slide{i}.xml",
+                       f'<?xml version="1.0" encoding="UTF-8"?><p:sld xmlns:p="{P}" xmlns:a="{A}" xmlns:r="{R}"><p:cSld><p:spTree>'
+                       f'<p:sp><p:txBody><a:p><a:r><a:rPr><a:hlinkClick r:id="rId2"/></a:rPr><a:t>{text}</a:t></a:r></a:p>'
+                       f'</p:txBody></p:sp><p:pic><p:blipFill><a:blip r:embed="rId1"/></p:blipFill></p:pic>'
+                       f'</p:spTree></p:cSld></p:sld>')
+            z.writestr(f"ppt/slides/_rels/slide{i}.xml.rels",
+                       f'<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="{PR}">'
+                       f'<Relationship Id="rId1" Type="{R}/image" Target="../media/image{i}.jpeg"/>'
+                       f'<Relationship Id="rId2" Type="{R}/hyperlink" Target="https://evil.example/{i}" TargetMode="External"/>'
+                       f'</Relationships>')
+            # JPEG payloads are already entropy-coded: random bytes behind a JFIF header
+            z.writestr(f"ppt/media/image{i}.jpeg", b"\xff\xd8\xff\xe0\x00\x10JFIF\x00" + rnd.randbytes(image_kb * 1024))
+    return buf.getvalue()
+
+
+def _bench(data: bytes, raw_copy: bool, repeat: int) -> Dict:
+    times: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out, res = sanitize_ooxml_buffer(data, ext="pptx", raw_copy=raw_copy)
+        times.append(time.perf_counter() - t0)
+    return {"seconds_median": round(statistics.median(times), 3), "out_bytes": len(out), "stats": res.get("stats")}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="OOXML rewrite benchmark (recompress all vs raw-copy untouched members)")
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--slides", type=int, action="append", default=[], help="generate a deck with N image slides (repeatable)")
+    ap.add_argument("--image-kb", type=int, default=256)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", default="")
+    args = ap.parse_args()
+
+    cases = {Path(f).name: Path(f).read_bytes() for f in args.files}
+    for n in args.slides or ([] if cases else [40]):
+        cases[f"generated_{n}_slides.pptx"] = make_pptx(n, args.image_kb)
+
+    rows = []
+    for name, data in cases.items():
+        sanitize_ooxml_buffer(data, ext="pptx")   # warm-up: dictionary / engine load
+        old, new = _bench(data, False, args.repeat), _bench(data, True, args.repeat)
+        rows.append({"input": name, "size_bytes": len(data), "recompress_all": old, "raw_copy": new,
+                     "speedup": round(old["seconds_median"] / new["seconds_median"], 1) if new["seconds_median"] else None})
+        for mode, r in (("recompress", old), ("raw-copy", new)):
+            st = r["stats"] or {}
+            print(f"{name:<30} {len(data):>12,} B  {mode:<10} {r['seconds_median']:>7.3f} s  "
+                  f"recompressed {st.get('members_recompressed', 0):>4} / {st.get('bytes_recompressed', 0):>12,} B  "
+                  f"raw-copied {st.get('members_raw_copied', 0):>4} / {st.get('bytes_raw_copied', 0):>12,} B  "
+                  f"out {r['out_bytes']:>12,} B")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"repeat": args.repeat, "results": rows}, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+PDF sanitizer benchmark: one-pass pikepdf engine vs the PyPDF2 write + pikepdf reopen flow
+
+Builds (or takes) large PDFs and runs each engine in a fresh child process, so peak RSS
+(ru_maxrss) belongs to that engine alone. Generated PDFs carry what the sanitizer removes:
+OpenAction/Names JavaScript, page /AA, link annotations with JS actions, embedded files,
+plus text content streams with dictionary hits, Flate RGB images and an embedded font.
+
+Usage:
+  python bench_pdf_sanitize.py --pages 300
+  python bench_pdf_sanitize.py --pages 200 --pages 800 --repeat 3 --json bench_pdf.json
+  python bench_pdf_sanitize.py big.pdf
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List
+import argparse, json, random, statistics, subprocess, sys, tempfile, time, zlib
+
+HERE = Path(__file__).resolve().parent
+
+
+def make_pdf(path: Path, pages: int, image_every: int = 5, seed: int = 11) -> Path:
+    import pikepdf
+    rnd = random.Random(seed)
+    words = ["invoice", "total", "quarter", "region", "powershell.exe", "http://example.com",
+             "cmd.exe", "sales", "units", "javascript:", "payload", "summary"]
+    pdf = pikepdf.new()
+    font_prog = pdf.make_stream(bytes(rnd.getrandbits(8) for _ in range(40_000)))
+    font = pdf.make_indirect(pikepdf.Dictionary(
+        Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1, BaseFont=pikepdf.Name("/SafeDocsBench"),
+        FontDescriptor=pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.FontDescriptor, FontName=pikepdf.Name("/SafeDocsBench"), FontFile=font_prog)),
+    ))
+    for n in range(pages):
+        lines = [f"BT /F1 10 Tf 40 {800 - 12 * i} Td ({' '.join(rnd.choice(words) for _ in range(10))}) Tj ET"
+                 for i in range(60)]
+        res = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+        if image_every and n % image_every == 0:
+            w = h = 256
+            img = pdf.make_stream(zlib.compress(bytes(rnd.getrandbits(8) for _ in range(w * h * 3)) + b"cmd.exe" * 8))
+            img.Type = pikepdf.Name.XObject; img.Subtype = pikepdf.Name.Image
+            img.Width = w; img.Height = h; img.ColorSpace = pikepdf.Name.DeviceRGB; img.BitsPerComponent = 8
+            img.Filter = pikepdf.Name.FlateDecode
+            res.XObject = pikepdf.Dictionary(Im1=img)
+            lines.append("q 200 0 0 200 300 300 cm /Im1 Do Q")
+        page = pdf.add_blank_page(page_size=(612, 842))
+        page.obj.Resources = res
+        page.obj.Contents = pdf.make_stream(zlib.compress("\n".join(lines).encode("latin-1")))
+        page.obj.Contents.Filter = pikepdf.Name.FlateDecode
+        page.obj.AA = pikepdf.Dictionary(O=pikepdf.Dictionary(S=pikepdf.Name.JavaScript, JS=pikepdf.String("app.alert(1)")))
+        page.obj.Annots = pdf.make_indirect(pikepdf.Array([pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Annot, Subtype=pikepdf.Name.Link, Rect=[40, 40, 200, 60],
+            A=pikepdf.Dictionary(S=pikepdf.Name.URI, URI=pikepdf.String("https://evil.example/payload.exe")),
+        ))]))
+    js = pdf.make_indirect(pikepdf.Dictionary(S=pikepdf.Name.JavaScript, JS=pikepdf.String("this.submitForm('http://x')")))
+    pdf.Root.OpenAction = js
+    pdf.Root.Names = pikepdf.Dictionary(
+        JavaScript=pikepdf.Dictionary(Names=[pikepdf.String("a"), js]),
+        EmbeddedFiles=pikepdf.Dictionary(Names=[pikepdf.String("x.exe"), pdf.make_indirect(pikepdf.Dictionary(
+            Type=pikepdf.Name.Filespec, F=pikepdf.String("x.exe"),
+            EF=pikepdf.Dictionary(F=pdf.make_stream(b"MZ" + bytes(4096))),
+        ))]),
+    )
+    pdf.docinfo["/Title"] = "SafeDocs bench"
+    pdf.save(path)
+    return path
+
+
+def _child(engine: str, path: str) -> None:
+    import resource
+    sys.path.insert(0, str(HERE))
+    import sanitize_pdf
+    data = Path(path).read_bytes()
+    t0 = time.perf_counter()
+    out, res = sanitize_pdf.sanitize_pdf_buffer(data, engine=engine)
+    dt = time.perf_counter() - t0
+    print(json.dumps({
+        "seconds": round(dt, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        "out_bytes": len(out), "status": res.get("status"), "stats": res.get("stats"), "error": res.get("error"),
+    }))
+
+
+def _run(engine: str, path: Path) -> Dict:
+    out = subprocess.run([sys.executable, __file__, "--child", engine, str(path)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="PDF sanitizer engine benchmark (time + peak RSS)")
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--pages", type=int, action="append", default=[], help="generate a PDF with N pages (repeatable)")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--engines", default="pypdf2,pikepdf")
+    ap.add_argument("--json", default="")
+    ap.add_argument("--child", nargs=2, metavar=("ENGINE", "PATH"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child(*args.child); return
+
+    inputs: List[Path] = [Path(f) for f in args.files]
+    tmpdir = tempfile.TemporaryDirectory()
+    for n in args.pages or ([] if inputs else [300]):
+        t0 = time.perf_counter()
+        inputs.append(make_pdf(Path(tmpdir.name) / f"bench_{n}p.pdf", n))
+        print(f"generated {inputs[-1].name}: {inputs[-1].stat().st_size:,} B in {time.perf_counter() - t0:.1f} s")
+
+    rows = []
+    for p in inputs:
+        for engine in args.engines.split(","):
+            runs = [_run(engine, p) for _ in range(args.repeat)]
+            r = {
+                "file": p.name, "size_bytes": p.stat().st_size, "engine": engine,
+                "seconds_median": statistics.median(x["seconds"] for x in runs),
+                "peak_rss_mb_max": max(x["peak_rss_mb"] for x in runs),
+                "out_bytes": runs[-1]["out_bytes"], "status": runs[-1]["status"], "stats": runs[-1]["stats"],
+            }
+            rows.append(r)
+            print(f"{p.name:<22} {r['size_bytes']:>12,} B  {engine:<8} {r['seconds_median']:>8.2f} s  "
+                  f"peak RSS {r['peak_rss_mb_max']:>7.1f} MB  out {r['out_bytes']:>12,} B  {r['status']}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"repeat": args.repeat, "results": rows}, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
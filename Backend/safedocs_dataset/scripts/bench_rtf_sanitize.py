@@ -0,0 +1,110 @@
+"""
+RTF sanitizer worst-case benchmark: chained DOTALL regexes (old) vs the group tokenizer
+
+Each case is generated at doubling sizes. The old pass is quadratic whenever a lazy block
+never terminates (every start rescans to the end of the file); the tokenizer should stay
+linear, i.e. time(2n)/time(n) ~ 2 for every case. Timings are the structural pass only
+(no keyword scrub) so the two are comparable; the old pass is skipped for larger sizes
+once a run exceeds --legacy-budget seconds.
+
+Cases:
+  unterminated_field    "{\\field " repeated, no \\fldinst, no closing braces
+  unterminated_object   "\\object\\objemb " repeated, no \\endobj
+  unterminated_pict     "\\pict " repeated with text, no "}"
+  deep_nesting          "{" * n then "}" * n
+  field_soup            well-formed DDE / HYPERLINK / PAGE fields around body text
+  pict_hex              one big well-formed \\pict hex blob (typical large RTF)
+  negative_bin          "\\bin-7" / "\\bin0" in text and inside \\object (no payload; must not move backwards)
+  field_multi_instr     fields with an unsafe \\fldinst followed by a safe one (the field must still go)
+
+Before timing, CHECKS (small inputs with a known number of dropped fields) must pass.
+
+Usage:
+  python bench_rtf_sanitize.py
+  python bench_rtf_sanitize.py --min-kb 32 --max-kb 4096 --json bench_rtf.json
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Dict, List
+import argparse, json, random, time
+
+from sanitize_rtf import _strip_rtf, strip_rtf_regex
+
+
+def _fill(unit: str, size: int) -> str:
+    return unit * max(1, size // len(unit))
+
+CASES: Dict[str, Callable[[int], str]] = {
+    "unterminated_field":  lambda n: "{\\rtf1 " + _fill("{\\field x ", n),
+    "unterminated_object": lambda n: "{\\rtf1 " + _fill("\\object\\objemb data ", n),
+    "unterminated_pict":   lambda n: "{\\rtf1 " + _fill("\\pict 0a0b ", n),
+    "deep_nesting":        lambda n: "{" * (n // 2) + "}" * (n // 2),
+    "field_soup":          lambda n: "{\\rtf1 " + _fill(
+        "{\\field{\\*\\fldinst DDEAUTO c:\\\\x \"cmd\"}{\\fldrslt ok}} body text "
+        "{\\field{\\*\\fldinst HYPERLINK \"http://a\" \\\\o \"t\"}{\\fldrslt link}} "
+        "{\\field{\\*\\fldinst PAGE}{\\fldrslt 1}} more text\\par ", n) + "}",
+    "negative_bin":        lambda n: "{\\rtf1 " + _fill("a\\bin-7 xyz {\\object\\bin-7 xyz} \\bin0 q ", n) + "}",
+    "field_multi_instr":   lambda n: "{\\rtf1 " + _fill(
+        "{\\field{\\*\\fldinst DDEAUTO c:\\\\x \"cmd\"}{\\*\\fldinst PAGE}{\\fldrslt x}} text ", n) + "}",
+    "pict_hex":            lambda n: "{\\rtf1 intro {\\pict\\pngblip " +
+        "".join(random.Random(1).choice("0123456789abcdef") for _ in range(n)) + "} outro}",
+}
+
+# (name, input, fields_dropped expected from the tokenizer)
+CHECKS = [
+    ("safe_field", "{\\rtf1 {\\field{\\*\\fldinst PAGE}{\\fldrslt 1}}}", 0),
+    ("dde_field", "{\\rtf1 {\\field{\\*\\fldinst DDEAUTO c:\\\\x \"cmd\"}{\\fldrslt x}}}", 1),
+    ("unsafe_then_safe_instr",
+     "{\\rtf1 {\\field{\\*\\fldinst DDEAUTO c:\\\\windows\\\\cmd.exe \"/c calc\"}{\\*\\fldinst PAGE}{\\fldrslt x}}}", 1),
+    ("safe_then_unsafe_instr", "{\\rtf1 {\\field{\\*\\fldinst PAGE}{\\*\\fldinst INCLUDETEXT \"c:\\\\x\"}{\\fldrslt x}}}", 1),
+]
+
+def _check() -> None:
+    for name, txt, want in CHECKS:
+        got = _strip_rtf(txt, lambda s: s)[2]["fields_dropped"]
+        if got != want:
+            raise SystemExit(f"check {name}: fields_dropped {got}, expected {want}")
+
+
+def _time(fn: Callable[[], object]) -> float:
+    t0 = time.perf_counter(); fn(); return time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="RTF sanitizer worst-case scaling (regex chain vs tokenizer)")
+    ap.add_argument("--min-kb", type=int, default=16)
+    ap.add_argument("--max-kb", type=int, default=1024)
+    ap.add_argument("--legacy-budget", type=float, default=20.0, help="stop timing the old pass for a case past this")
+    ap.add_argument("--cases", default=",".join(CASES))
+    ap.add_argument("--json", default="")
+    args = ap.parse_args()
+    _check()
+
+    rows: List[Dict] = []
+    for case in args.cases.split(","):
+        legacy_on, prev = True, None
+        kb = args.min_kb
+        while kb <= args.max_kb:
+            txt = CASES[case](kb * 1024)
+            t_new = _time(lambda: _strip_rtf(txt, lambda s: s))
+            t_old = _time(lambda: strip_rtf_regex(txt)) if legacy_on else None
+            if t_old is not None and t_old > args.legacy_budget:
+                legacy_on = False
+            r = {"case": case, "chars": len(txt), "tokenizer_s": round(t_new, 4),
+                 "tokenizer_mb_s": round(len(txt) / 1048576 / t_new, 2) if t_new else None,
+                 "tokenizer_growth": round(t_new / prev, 2) if prev else None,
+                 "regex_s": round(t_old, 4) if t_old is not None else None}
+            rows.append(r); prev = t_new
+            old = f"{r['regex_s']:>9.3f} s" if r["regex_s"] is not None else "  (skipped)"
+            print(f"{case:<20} {len(txt):>10,} ch  regex {old}  tokenizer {t_new:>7.3f} s "
+                  f"({r['tokenizer_mb_s']} MB/s, x{r['tokenizer_growth']} vs half size)")
+            kb *= 2
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"results": rows}, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
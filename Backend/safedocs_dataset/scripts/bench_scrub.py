@@ -0,0 +1,133 @@
+"""
+Keyword scrub benchmark: batched regexes (old _keyword_scrub_text) vs ScrubEngine (one pass)
+
+Inputs are split into the same scrub units the sanitizers use:
+  .pdf               every stream (pikepdf, decoded) or the whole file (latin-1) without pikepdf
+  .docx/.pptx/.xlsx  every .xml/.rels/.vml part (utf-8)
+  .rtf / other       the whole file
+--synthetic-mb N adds generated multi-MB units: an XLSX worksheet, sharedStrings and a
+PDF content stream seeded with dictionary hits.
+
+Usage:
+  python bench_scrub.py --synthetic-mb 4
+  python bench_scrub.py ../../safedocs_realistic_pdf.pdf big.xlsx --json bench_scrub.json
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Tuple
+import argparse, io, json, random, time, zipfile
+
+from scrub_terms import load_terms, dict_version
+from scrub_engine import ScrubEngine, scrub_batched
+
+
+def _units_from_file(p: Path) -> Tuple[str, List[str]]:
+    ext = p.suffix.lower()
+    data = p.read_bytes()
+    if ext == ".pdf":
+        try:
+            import pikepdf
+            with pikepdf.open(io.BytesIO(data)) as pdf:
+                units = []
+                for obj in pdf.objects:
+                    if isinstance(obj, pikepdf.Stream):
+                        try: units.append(bytes(obj.read_bytes()).decode("latin-1", errors="ignore"))
+                        except Exception: pass
+                return "pdf", units
+        except ImportError:
+            return "pdf", [data.decode("latin-1", errors="ignore")]
+    if ext in (".docx", ".pptx", ".xlsx"):
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            return "office", [z.read(n).decode("utf-8", errors="ignore") for n in z.namelist()
+                              if n.lower().endswith((".xml", ".rels", ".vml"))]
+    return "office", [data.decode("utf-8", errors="ignore")]
+
+
+def _synthetic(mb: float, terms: List[str], seed: int = 7) -> Dict[str, Tuple[str, List[str]]]:
+    rnd = random.Random(seed)
+    target = int(mb * 1024 * 1024)
+    hits = [t for t in terms if t.isascii()][:500]
+
+    def words(n: int) -> str:
+        return " ".join(rnd.choice(("invoice", "total", "quarter", "region", "north", "sales", "q3", "units"))
+                        if rnd.random() > 0.02 else rnd.choice(hits) for _ in range(n))
+
+    rows, size, r = [], 0, 1
+    while size < target:
+        row = "".join(f'<c r="{c}{r}" t="inlineStr"><is><t>{words(4)}</t></is></c>' for c in "ABCDEFGH")
+        rows.append(f'<row r="{r}">{row}</row>'); size += len(rows[-1]); r += 1
+    sheet = '<?xml version="1.0" encoding="UTF-8"?><worksheet><sheetData>' + "".join(rows) + "</sheetData></worksheet>"
+
+    sis, size = [], 0
+    while size < target:
+        sis.append(f"<si><t>{words(8)}</t></si>"); size += len(sis[-1])
+    shared = "<sst>" + "".join(sis) + "</sst>"
+
+    ops, size = [], 0
+    while size < target:
+        ops.append(f"BT /F1 10 Tf {rnd.randint(40, 560)} {rnd.randint(40, 800)} Td ({words(6)}) Tj ET\n"); size += len(ops[-1])
+    return {
+        f"synthetic_sheet1.xml ({mb} MB)": ("office", [sheet]),
+        f"synthetic_sharedStrings.xml ({mb} MB)": ("office", [shared]),
+        f"synthetic_pdf_content_stream ({mb} MB)": ("pdf", ["".join(ops)]),
+    }
+
+
+def _time(fn, units: List[str]) -> Tuple[float, List[str]]:
+    t0 = time.perf_counter()
+    out = [fn(u) for u in units]
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Keyword scrub benchmark (batched regex vs single-pass engine)")
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--synthetic-mb", type=float, default=0.0, help="size of each generated unit (0 = none)")
+    ap.add_argument("--json", default="")
+    args = ap.parse_args()
+
+    terms = {prof: load_terms(prof) for prof in ("pdf", "office")}
+    engines = {}
+    for prof, tl in terms.items():
+        t0 = time.perf_counter()
+        engines[prof] = ScrubEngine(tl, dict_version(prof))
+        print(f"compile {prof:<6} {len(tl)} terms  {(time.perf_counter() - t0) * 1000:.0f} ms (once per dictionary version)")
+
+    cases: Dict[str, Tuple[str, List[str]]] = {}
+    for f in args.files:
+        cases[Path(f).name] = _units_from_file(Path(f))
+    if args.synthetic_mb > 0:
+        cases.update(_synthetic(args.synthetic_mb, terms["office"]))
+
+    rows = []
+    for name, (prof, units) in cases.items():
+        eng, tl = engines[prof], terms[prof]
+        size = sum(len(u) for u in units)
+        t_old, out_old = _time(lambda u: scrub_batched(u, tl), units)
+        t_new, out_new = _time(eng.scrub, units)
+        removed_old = size - sum(len(u) for u in out_old)
+        removed_new = size - sum(len(u) for u in out_new)
+        rows.append({
+            "input": name, "profile": prof, "units": len(units), "chars": size,
+            "batched_s": round(t_old, 3), "engine_s": round(t_new, 3),
+            "batched_mb_s": round(size / 1048576 / t_old, 3) if t_old else None,
+            "engine_mb_s": round(size / 1048576 / t_new, 3) if t_new else None,
+            "speedup": round(t_old / t_new, 1) if t_new else None,
+            "identical_units": sum(1 for a, b in zip(out_old, out_new) if a == b),
+            "chars_removed_batched": removed_old, "chars_removed_engine": removed_new,
+            "residual_hits_batched": sum(eng.scrub_count(u)[1] for u in out_old),
+            "residual_hits_engine": sum(eng.scrub_count(u)[1] for u in out_new),
+        })
+        r = rows[-1]
+        print(f"{name:<44} {size:>11,} ch  batched {r['batched_s']:>8.3f} s  engine {r['engine_s']:>7.3f} s  "
+              f"x{r['speedup']}  identical {r['identical_units']}/{len(units)}  "
+              f"removed {removed_old}/{removed_new}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"results": rows}, indent=2), encoding="utf-8")
+        print("Wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+SafeDocs sanitizer budgets — per-stage wall-clock and memory ceilings
+
+Every sanitizer runs as named stages:
+    structural   part/key/group removals
+    metadata     XMP / document-info purge (PDF)
+    deep_scrub   object/part walk with the keyword scrub
+    serialize    writing the output document
+
+Each stage has a wall-clock limit (seconds) and a memory limit (MB of RSS growth since the
+stage started), configured with SAFEDOCS_BUDGET_<STAGE>_S / SAFEDOCS_BUDGET_<STAGE>_MB
+(0 = unlimited). Budgets are cooperative: sanitizer loops poll between units of work
+(objects, members, tokens). A stage that is a single library call (a save, a parse) is
+measured when it returns, never interrupted: budgets are best-effort. The hard stop for
+a worker stuck in one such call is the API pool's SCAN_JOB_TIMEOUT_S (workers.py), which
+kills the process.
+
+- deep_scrub over budget: Stage.poll() turns False, the sanitizer finishes the rest of the
+  document structural-only (removals, no keyword scrub) and the trip is recorded as degraded
+- any other stage over budget: Stage.check() raises BudgetExceeded and the sanitize fails
+
+Budget.report() goes into the sanitizer result as "budget":
+    {"stages": {stage: {"s", "mb"}}, "tripped": [{stage, kind, limit, used, action}], "degraded": bool}
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import os, time
+
+STAGES = ("structural", "metadata", "deep_scrub", "serialize")
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {   # (seconds, MB)
+    "structural": (20.0, 512.0),
+    "metadata":   (5.0, 256.0),
+    "deep_scrub": (30.0, 768.0),
+    "serialize":  (30.0, 768.0),
+}
+MEM_POLL_EVERY = 32   # RSS is read every Nth poll; the clock on every poll
+
+
+def _env_limit(stage: str, kind: str, default: float) -> float:
+    return float(os.getenv(f"SAFEDOCS_BUDGET_{stage.upper()}_{kind}", str(default)))
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size (Linux /proc); None elsewhere, which disables memory limits."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1048576.0
+    except Exception:
+        return None
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, stage: str, kind: str, limit: float, used: float) -> None:
+        self.stage, self.kind, self.limit, self.used = stage, kind, limit, used
+        unit = "s" if kind == "time" else "MB"
+        super().__init__(f"{stage} {kind} budget exceeded: {used:.3g}{unit} > {limit:g}{unit}")
+
+    def as_dict(self, action: str) -> Dict:
+        return {"stage": self.stage, "kind": self.kind, "limit": self.limit, "used": round(self.used, 3), "action": action}
+
+
+class Stage:
+    __slots__ = ("budget", "name", "limit_s", "limit_mb", "t0", "rss0", "polls", "tripped")
+
+    def __init__(self, budget: "Budget", name: str) -> None:
+        self.budget, self.name = budget, name
+        self.limit_s, self.limit_mb = budget.limits[name]
+        self.t0 = time.perf_counter()
+        self.rss0 = _rss_mb()
+        self.polls = 0
+        self.tripped: Optional[BudgetExceeded] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def grown_mb(self) -> float:
+        now = _rss_mb()
+        return 0.0 if now is None or self.rss0 is None else max(0.0, now - self.rss0)
+
+    def _over(self, force_mem: bool = False) -> Optional[BudgetExceeded]:
+        if self.limit_s and self.elapsed() > self.limit_s:
+            return BudgetExceeded(self.name, "time", self.limit_s, self.elapsed())
+        self.polls += 1
+        if self.limit_mb and (force_mem or self.polls % MEM_POLL_EVERY == 0):
+            grown = self.grown_mb()
+            if grown > self.limit_mb:
+                return BudgetExceeded(self.name, "memory", self.limit_mb, grown)
+        return None
+
+    def check(self) -> None:
+        """Hard stages: raise BudgetExceeded once over budget."""
+        exc = self._over()
+        if exc is not None:
+            self.tripped = exc
+            self.budget.tripped.append(exc.as_dict("failed"))
+            raise exc
+
+    def poll(self) -> bool:
+        """Degradable stages: True while within budget; the first overrun is recorded and
+        every later call returns False (carry on structural-only)."""
+        if self.tripped is not None:
+            return False
+        exc = self._over()
+        if exc is None:
+            return True
+        self.tripped = exc
+        self.budget.tripped.append(exc.as_dict("structural_only"))
+        self.budget.degraded = True
+        return False
+
+
+class Budget:
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None) -> None:
+        self.limits = {s: (_env_limit(s, "S", d[0]), _env_limit(s, "MB", d[1])) for s, d in DEFAULT_LIMITS.items()}
+        self.limits.update(limits or {})
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.tripped: List[Dict] = []
+        self.degraded = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Stage]:
+        st = Stage(self, name)
+        try:
+            yield st
+        finally:
+            rec = self.stages.setdefault(name, {"s": 0.0, "mb": 0.0})
+            rec["s"] = round(rec["s"] + st.elapsed(), 4)
+            rec["mb"] = round(max(rec["mb"], st.grown_mb()), 1)
+            if st.tripped is None:
+                # single-call stages can't be interrupted: record an overrun after the fact
+                exc = st._over(force_mem=True)
+                if exc is not None:
+                    self.tripped.append(exc.as_dict("recorded"))
+
+    def report(self) -> Dict:
+        return {"stages": self.stages, "tripped": self.tripped, "degraded": self.degraded}
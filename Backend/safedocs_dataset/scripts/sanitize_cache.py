@@ -0,0 +1,163 @@
+"""
+SafeDocs sanitized-artifact cache — content-addressed, on-disk, LRU by size
+
+A sanitizer's output depends only on the input bytes, the sanitizer and its keyword
+dictionary (deterministic since scrub_terms.py), so repeat inputs reuse the stored
+clean bytes and result instead of sanitizing again.
+
+Key: sha256 over (input sha256, sanitizer "module.function", its DICT_VERSION or "",
+SANITIZER_VERSION env, call kwargs). Bump SANITIZER_VERSION after changing sanitizer
+code; a new dictionary changes the key on its own.
+
+Layout: <SAFEDOCS_SANITIZE_CACHE_DIR>/<key[:2]>/<key>.bin (clean bytes) + <key>.json
+(result), by default under out/sanitize_cache next to api_server.py. Both are written atomically (tmp file + rename); an entry missing either half
+is a miss. A hit touches the .bin mtime, which is the LRU clock: once the directory
+grows past SAFEDOCS_SANITIZE_CACHE_MB (0 disables the cache), the least recently used
+entries are deleted down to 90% of it. Several processes can share one directory; each
+keeps its own running total and re-measures the directory when it evicts.
+
+Failed and budget-degraded results are not stored (a degraded result depends on load).
+
+The one copy, shared by the API (scripts/ is on its sys.path) and the scan_file.py CLI;
+both default to the same directory.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib, json, os, sys, tempfile
+
+CACHE_DIR = Path(os.getenv("SAFEDOCS_SANITIZE_CACHE_DIR", str(Path(__file__).resolve().parent.parent / "out" / "sanitize_cache")))
+CACHE_MB = float(os.getenv("SAFEDOCS_SANITIZE_CACHE_MB", "512"))
+SANITIZER_VERSION = os.getenv("SANITIZER_VERSION", "1")
+
+
+def _sha256(b: bytes) -> str:
+    h = hashlib.sha256(); h.update(b); return h.hexdigest()
+
+def sanitizer_id(fn: Callable) -> Tuple[str, str]:
+    """("module.function", dictionary version) of a sanitize_*_buffer function."""
+    mod = sys.modules.get(getattr(fn, "__module__", ""), None)
+    return f"{getattr(fn, '__module__', '?')}.{getattr(fn, '__name__', '?')}", str(getattr(mod, "DICT_VERSION", ""))
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=path.name, dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+
+
+class ArtifactCache:
+    def __init__(self, root: Path | str = CACHE_DIR, max_mb: float = CACHE_MB) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max(0.0, float(max_mb)) * 1048576)
+        self._total: Optional[int] = None   # bytes on disk, measured lazily
+        self._stats = {"hits": 0, "misses": 0, "puts": 0, "evicted": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key(self, sha: str, sanitizer: str, dict_version: str, kw: Optional[Dict[str, Any]] = None) -> str:
+        parts = {"sha256": sha, "sanitizer": sanitizer, "dict": dict_version,
+                 "version": SANITIZER_VERSION, "kw": kw or {}}
+        return _sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8"))
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        d = self.root / key[:2]
+        return d / f"{key}.bin", d / f"{key}.json"
+
+    # ---------- lookups ----------
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        if not self.enabled:
+            return None
+        blob, meta = self._paths(key)
+        try:
+            result = json.loads(meta.read_bytes())
+            data = blob.read_bytes()
+            os.utime(blob)   # LRU: mtime = last use
+        except (OSError, ValueError):
+            self._stats["misses"] += 1
+            return None
+        if len(data) != result.pop("_size", -1):
+            self._stats["misses"] += 1
+            return None
+        self._stats["hits"] += 1
+        return data, result
+
+    def put(self, key: str, data: bytes, result: Dict[str, Any]) -> None:
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        blob, meta = self._paths(key)
+        entry = {k: v for k, v in result.items() if k != "budget" and not isinstance(v, (bytes, bytearray))}
+        entry["_size"] = len(data)
+        try:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            _write_atomic(blob, bytes(data))
+            _write_atomic(meta, json.dumps(entry, default=str).encode("utf-8"))
+        except OSError as e:
+            print("sanitize cache write error:", e)
+            return
+        self._stats["puts"] += 1
+        if self._total is None:
+            self._total = self._measure()[0]
+        else:
+            self._total += len(data)
+        if self._total > self.max_bytes:
+            self._evict()
+
+    # ---------- eviction ----------
+    def _measure(self) -> Tuple[int, List[Tuple[float, int, Path]]]:
+        entries: List[Tuple[float, int, Path]] = []
+        total = 0
+        for p in self.root.glob("??/*.bin"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p)); total += st.st_size
+        return total, entries
+
+    def _evict(self) -> None:
+        total, entries = self._measure()
+        target = int(self.max_bytes * 0.9)
+        for _, size, p in sorted(entries):
+            if total <= target:
+                break
+            for q in (p, p.with_suffix(".json")):
+                try: q.unlink()
+                except OSError: pass
+            total -= size; self._stats["evicted"] += 1
+        self._total = total
+
+    # ---------- sanitize through the cache ----------
+    def sanitize(self, fn: Callable, data: bytes | memoryview, sha: Optional[str] = None,
+                 **kw: Any) -> Tuple[bytes, Dict[str, Any], bool]:
+        """fn(data, **kw) -> (clean bytes, result), served from the cache when possible.
+        Returns (clean bytes, result, hit)."""
+        if not self.enabled:
+            out, res = fn(data, **kw)
+            return out, res, False
+        name, dver = sanitizer_id(fn)
+        key = self.key(sha or _sha256(bytes(data)), name, dver, kw)
+        hit = self.get(key)
+        if hit is not None:
+            return hit[0], hit[1], True
+        out, res = fn(data, **kw)
+        if isinstance(out, (bytes, bytearray)) and isinstance(res, dict) and res.get("status") == "ok" \
+                and not res.get("error") and not (res.get("budget") or {}).get("degraded"):
+            self.put(key, out, res)
+        return out, res, False
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict[str, Any]:
+        return {"dir": str(self.root), "capacity_mb": round(self.max_bytes / 1048576, 1),
+                "bytes": self._total, **self._stats}
+
+
+SANITIZED = ArtifactCache()
@@ -8,102 +8,75 @@ Structural removals:
 - .rels: drop any rel with TargetMode="External", any hyperlink rel, or unsafe schemes
 - XML: drop externalLink nodes, webExtensions/taskpanes, attachedTemplate,
   OLE/ActiveX/object nodes
+- [Content_Types].xml: drop Overrides for all of the removed parts
+
+Each XML part goes through one pipeline: one parse, one tree walk applying every removal
+rule and the keyword scrub, one serialization (skipped when nothing changed). Worksheet and
+sharedStrings parts over STREAM_PART_BYTES are streamed instead (iterparse one <row>/<si>
+record at a time, written out as it completes), so memory stays bounded by the largest record.
+
+Parts are independent, so with workers>1 (or SAFEDOCS_OOXML_WORKERS) parts of at least
+PARALLEL_MIN_BYTES are transformed in a bounded process pool (streamed parts never: they are
+read straight from the archive in the main process, so they are never inflated whole). If the
+pool can't start or breaks, the remaining parts are processed serially. Results are consumed in archive
+order and rewritten members keep their original timestamps, so the zip is byte-identical to
+the serial output.
 
 Keyword scrub:
-- Generate **>= 5,000** variants from ~150 seeds (same generator as PDF)
-- Scrub every textual part: .xml, .rels, .vml, .txt
+- **6,000** variants of ~150 seeds from the shared versioned dictionary (scrub_terms.py)
+- XML parts: scrub text nodes only (element text/tail, comments), never tag or attribute names;
+  .txt parts: the whole text (single pass, scrub_engine.py)
+
+Zip rewrite:
+- Only .xml/.rels/.vml/.txt parts are inflated and processed; everything else (media,
+  fonts, printer settings, ...) and any text part that comes out unchanged is copied as
+  its original compressed bytes, never inflated or deflated again
+- stats report members/bytes recompressed (uncompressed size fed to deflate) vs raw-copied
+  (compressed size copied verbatim)
+
+Budgets (sanitize_budget.py): structural (which parts to drop), deep_scrub (the member loop:
+transform + scrub + writes) and serialize (closing the zip) each run under a wall-clock and
+RSS-growth limit. Past the deep_scrub limit the remaining parts get the removals only (no
+keyword scrub); the trip is reported in result["budget"].
 
 Always writes output; if bytes still match, adds a small safe file into the ZIP
 to guarantee difference.
+
+Entry points: sanitize_ooxml_buffer(bytes|memoryview) -> (clean bytes, result) works entirely in
+memory; sanitize_ooxml(in_path, out_path) and sanitize_ooxml_bytes(data) are thin wrappers around it.
 """
 
 from __future__ import annotations
 from pathlib import Path
-import shutil, zipfile, tempfile, re, hashlib, itertools, random
-from typing import Iterable, List, Tuple
+import io, os, sys, zipfile, re, hashlib, struct
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
 import lxml.etree as ET
 
+from scrub_terms import load_terms, dict_version
+from scrub_engine import get_engine
+from sanitize_budget import Budget, BudgetExceeded
+
 PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
 UNSAFE_SCHEMES = ("file:", "javascript:", "vbscript:", "data:")
 DROP_FOLDERS = ("/embeddings/", "/externallinks/", "/webextensions/", "/activex/", "/activeX/", "/customxml/",)
 DROP_DOC_PROPS = ("docprops/core.xml", "docprops/app.xml", "docprops/custom.xml")
+TEXT_PARTS = (".xml", ".rels", ".vml", ".txt")
+XML_PARTS = (".xml", ".rels", ".vml")
+# sheet / sharedStrings parts at least this large (uncompressed) are transformed streaming
+STREAM_PART_BYTES = int(os.getenv("SAFEDOCS_OOXML_STREAM_BYTES", str(8 * 1024 * 1024)))
+STREAM_PARTS = re.compile(r"xl/worksheets/sheet\d+\.xml$|xl/sharedstrings\.xml$")
+STREAM_CONTAINERS = frozenset(("sheetData",))   # below the root: elements whose children are records
+_PARSER = ET.XMLParser(resolve_entities=False, huge_tree=True)
+# parallel member processing: pool size (1 = serial) and the smallest part worth shipping to it
+OOXML_WORKERS = int(os.getenv("SAFEDOCS_OOXML_WORKERS", "1"))
+PARALLEL_MIN_BYTES = int(os.getenv("SAFEDOCS_OOXML_PARALLEL_MIN_BYTES", str(256 * 1024)))
+_POOL: Optional[ProcessPoolExecutor] = None
 
-# ---- keyword expansion (shared with PDF) ----
-BASE_TERMS: List[str] = [
-    "javascript", "/js", "/javascript", "openaction", "submitform", "launch", "gotoR", "named", "action",
-    "richmedia", "embeddedfile", "embeddedfiles", "acroform", "xfa", "needappearances",
-    "macro", "vba", "vbaproject", "ole", "activex", "dde", "ddeauto", "includepicture", "includetext",
-    "hyperlink", "attachedtemplate",
-    "http://", "https://", "javascript:", "file:", "data:", "ftp://", "smb://",
-    "cmd", "cmd.exe", "powershell", "powershell.exe", "wscript", "wscript.exe", "cscript", "cscript.exe",
-    "mshta", "mshta.exe", "regsvr32", "regsvr32.exe", "rundll32", "rundll32.exe", "bitsadmin", "certutil",
-    "curl", "wget", "ftp", "tftp", "schtasks", "at.exe", "whoami", "net user", "net group",
-    "base64", "eval", "fromcharcode", "unescape",
-    ".exe", ".ps1", ".vbs", ".js", ".jse", ".bat", ".cmd", ".hta", ".dll",
-]
-EXTRA_FAMILIES = [
-    "dropper","payload","beacon","c2","shellcode","maldoc","phish","obfuscate","decode",
-    "invoke-expression","iex","downloadstring","add-type","new-object system.net.webclient",
-    "start-process","write-host","set-mppreference","amsienable",
-]
-LEET_MAP = {"a":["a","4","@"],"e":["e","3"],"i":["i","1","!"],"o":["o","0"],"s":["s","5","$"],"t":["t","7"]}
-SEP_VARIANTS = ["", ".", "_", "-", "\u200b"]
-PREFIXES = ["", "/", "\\"]
-SUFFIXES = ["", "()", ":", ";", "'", '"']
-TLDs = ["com","net","org","io","ru","cn","xyz"]
-EXTS = [".exe",".ps1",".vbs",".js",".jse",".bat",".cmd",".hta",".dll",".scr",".com",".pif",".lnk"]
-
-def _leetify(token: str, cap: int = 10) -> List[str]:
-    pools = []
-    for ch in token:
-        low = ch.lower()
-        if low in LEET_MAP: pools.append(LEET_MAP[low])
-        else: pools.append([ch])
-    out = set()
-    for combo in itertools.product(*pools):
-        out.add("".join(combo))
-        if len(out) >= cap: break
-    return list(out)
-
-def _path_forms(token: str) -> List[str]:
-    tk = token.strip("/").lower()
-    forms = [f"{tk}", f"/{tk}", f"\\{tk}", f"{tk}/", f"{tk}\\", f"/{tk}/", f"\\{tk}\\"]
-    for tld in TLDs:
-        forms += [f"{tk}.{tld}", f"www.{tk}.{tld}", f"http://{tk}.{tld}", f"https://{tk}.{tld}"]
-    for ext in EXTS:
-        forms.append(f"{tk}{ext}")
-    return forms
-
-def expand_terms(min_count: int = 5000) -> List[str]:
-    seeds = set(BASE_TERMS + EXTRA_FAMILIES)
-    expanded = set()
-    for t in seeds:
-        t = t.strip()
-        if not t: continue
-        base = set([t, t.lower(), t.upper()])
-        if re.search(r"[a-zA-Z]", t):
-            for v in _leetify(t, cap=8):
-                base.add(v)
-        for cv in list(base):
-            for pre in PREFIXES:
-                for sep in SEP_VARIANTS:
-                    for suf in SUFFIXES:
-                        expanded.add(f"{pre}{cv.replace(' ', sep)}{suf}")
-        expanded.add(re.sub(r"[\/\.\-\s]+", "", t))
-        for pf in _path_forms(t):
-            expanded.add(pf)
-    if len(expanded) < min_count:
-        for t in list(seeds):
-            tt = re.sub(r"[^a-z0-9]", "", t.lower())
-            for i in range(0, max(0, len(tt)-3)):
-                expanded.add(tt[i:i+4])
-                if len(expanded) >= min_count: break
-            if len(expanded) >= min_count: break
-    items = sorted(x for x in expanded if x)
-    random.shuffle(items)
-    return items[: max(min_count, 6000)]
-
-EXPANDED_TERMS = expand_terms(min_count=6000)
+# ---- keyword dictionary (shared with PDF/RTF, see scrub_terms.py) ----
+EXPANDED_TERMS = load_terms("office")
+DICT_VERSION = dict_version("office")
 
 def _sha256(b: bytes) -> str:
     h = hashlib.sha256(); h.update(b); return h.hexdigest()
@@ -118,152 +91,341 @@ def _is_external_rel(rel_el) -> bool:
     if rtype.endswith("/hyperlink"): return True  # drop all hyperlinks
     return False
 
-def _drop_nodes(root, xpaths: Iterable[str]) -> int:
-    removed = 0
-    for xp in xpaths:
-        for el in root.findall(xp):
-            p = el.getparent()
-            if p is not None:
-                p.remove(el); removed += 1
-    return removed
+DROP_TAGS = frozenset(("externalLink", "hyperlink", "hyperlinks", "webExtensions", "taskpane", "taskpanes",
+                       "attachedTemplate", "OLEObject", "oleObject", "object", "embeddedObject", "control", "ActiveX"))
+
+def _is_risky_override(el) -> bool:
+    ctype = (el.get("ContentType") or "").lower()
+    part  = (el.get("PartName") or "").lower()
+    if "vba" in ctype or part.endswith("vbaproject.bin"): return True
+    if "activex" in ctype or "/activex/" in part: return True
+    if "webextension" in ctype or "/webextensions/" in part: return True
+    if "/externallinks/" in part or "/customxml/" in part: return True
+    if "/comments" in part or "trackchanges" in part: return True
+    if any(part.endswith(d) for d in DROP_DOC_PROPS): return True
+    return False
+
+def _drop_rule(lname: str):
+    """Removal predicate for a part: (element, local tag name) -> drop?"""
+    if lname.endswith(".rels"):
+        return lambda el, tag: tag == "Relationship" and _is_external_rel(el)
+    if lname == "[content_types].xml":
+        return lambda el, tag: tag == "Override" and _is_risky_override(el)
+    return lambda el, tag: tag in DROP_TAGS
+
+def _walk(root, drop, scrub) -> Tuple[int, int]:
+    """One walk: drop matching subtrees, scrub text/tail of every kept node. -> (dropped, hits)"""
+    dropped = hits = 0
+    stack = [root]
+    while stack:
+        el = stack.pop()
+        if isinstance(el.tag, str):
+            if el is not root and drop(el, ET.QName(el).localname):
+                el.getparent().remove(el); dropped += 1
+                continue
+            stack.extend(el)
+        if el.text:
+            el.text, n = scrub(el.text); hits += n
+        if el.tail and el is not root:
+            el.tail, n = scrub(el.tail); hits += n
+    return dropped, hits
 
-def _clean_content_types(xml_bytes: bytes) -> bytes:
+def _no_scrub(s: str) -> Tuple[str, int]:
+    return s, 0
+
+def _scrubber(scrub: bool):
+    return get_engine(EXPANDED_TERMS, DICT_VERSION).scrub_count if scrub else _no_scrub
+
+def _transform_part(lname: str, data: bytes, scrub: bool = True) -> Tuple[bytes, int]:
+    """Parse once, walk once (removals + text-node scrub), serialize once. Unchanged -> same bytes.
+    scrub=False applies the removals only (structural-only, after the deep_scrub budget)."""
     try:
-        root = ET.fromstring(xml_bytes)
-        for el in list(root):
-            tag = el.tag.split("}")[-1]
-            if tag == "Override":
-                ctype = (el.get("ContentType") or "").lower()
-                part  = (el.get("PartName") or "").lower()
-                drop = False
-                if "vba" in ctype or part.endswith("vbaproject.bin"): drop = True
-                if "activex" in ctype or "/activex/" in part: drop = True
-                if "webextension" in ctype or "/webextensions/" in part: drop = True
-                if "/externallinks/" in part: drop = True
-                if "/customxml/" in part: drop = True
-                if "/comments" in part or "trackchanges" in part: drop = True
-                if "docprops/core.xml" in part or "docprops/app.xml" in part or "docprops/custom.xml" in part: drop = True
-                if drop:
-                    root.remove(el)
-        return ET.tostring(root, xml_declaration=True, encoding="utf-8")
-    except Exception:
-        return xml_bytes
+        root = ET.fromstring(data, parser=_PARSER)
+    except ET.XMLSyntaxError:
+        return (_keyword_scrub_text(data) if scrub else data), 0
+    dropped, hits = _walk(root, _drop_rule(lname), _scrubber(scrub))
+    marked = False
+    if lname == "[content_types].xml" and b"SafeDocs" not in data:
+        root.addprevious(ET.Comment(" SafeDocs ")); marked = True
+    if not (dropped or hits or marked):
+        return data, 0
+    return ET.tostring(root.getroottree(), xml_declaration=True, encoding="utf-8"), dropped
+
+def _serialize_scoped(el, inscope: Dict) -> bytes:
+    """tostring(el) without re-declaring namespaces its ancestors already declared."""
+    raw = ET.tostring(el, encoding="utf-8")
+    end = raw.index(b">")
+    head = raw[:end]
+    for prefix, uri in inscope.items():
+        head = head.replace((f' xmlns:{prefix}="{uri}"' if prefix else f' xmlns="{uri}"').encode("utf-8"), b"", 1)
+    return head + raw[end:]
+
+def _transform_part_stream(lname: str, fp, scrub: bool = True) -> Tuple[bytes | None, int]:
+    """_transform_part for huge sheet/sharedStrings parts: iterparse one record (<row>, <si>, ...)
+    at a time and write it out immediately, so only one record is ever held as a tree.
+    Returns (None, 0) when nothing changed."""
+    scrub = _scrubber(scrub)
+    drop = _drop_rule(lname)
+    dropped = hits = 0
+    out = io.BytesIO()
+    out.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+    kinds: List[str] = []          # per open element: "container" | "record" | "inner"
+    closers: List[bytes] = []
+    inscope: Dict = {}
+    for ev, el in ET.iterparse(fp, events=("start", "end"), resolve_entities=False, huge_tree=True):
+        if ev == "start":
+            if not kinds or (kinds[-1] == "container" and ET.QName(el).localname in STREAM_CONTAINERS):
+                shell = _serialize_scoped(ET.Element(el.tag, dict(el.attrib), nsmap=el.nsmap), inscope)
+                out.write(shell[:-2] + b">")   # "<tag .../>" -> "<tag ...>"
+                closers.append(f"</{el.prefix + ':' if el.prefix else ''}{ET.QName(el).localname}>".encode("utf-8"))
+                if not kinds:
+                    inscope = dict(el.nsmap)
+                kinds.append("container")
+            else:
+                kinds.append("record" if kinds[-1] == "container" else "inner")
+            continue
+        kind = kinds.pop()
+        if kind == "container":
+            out.write(closers.pop())
+        elif kind == "record":
+            el.tail = None
+            if drop(el, ET.QName(el).localname):
+                dropped += 1
+            else:
+                d, h = _walk(el, drop, scrub); dropped += d; hits += h
+                out.write(_serialize_scoped(el, inscope))
+            el.clear()
+            while el.getprevious() is not None:
+                del el.getparent()[0]
+    if not (dropped or hits):
+        return None, 0
+    return out.getvalue(), dropped
+
+def _is_stream_part(lname: str, size: int) -> bool:
+    return lname.endswith(XML_PARTS) and bool(STREAM_PARTS.search(lname)) and size >= STREAM_PART_BYTES
+
+def _process_member(lname: str, data: bytes, scrub: bool = True) -> Tuple[bytes | None, int]:
+    """Transform one kept, in-memory text member -> (new bytes or None if unchanged, dropped).
+    The serial loop and pool workers both run this, so a part's output never depends on where
+    it ran. Streamed parts (_is_stream_part) don't come through here."""
+    out: bytes | None = None
+    dropped = 0
+    if lname.endswith(XML_PARTS):
+        out, dropped = _transform_part(lname, data, scrub)
+    elif scrub:
+        out = _keyword_scrub_text(data)
+    else:
+        return None, 0
+    return (None, 0) if out is data or out == data else (out, dropped)
+
+def _pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    global _POOL
+    if _POOL is not None and _POOL._max_workers != workers:
+        shutdown()
+    if _POOL is None:
+        get_engine(EXPANDED_TERMS, DICT_VERSION)   # compile before forking, workers inherit it
+        try:
+            _POOL = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, ValueError, AssertionError):   # e.g. inside a daemonic worker: stay serial
+            return None
+    return _POOL
+
+# workers start lazily on submit, so spawn failures (and dead workers) surface there or in result()
+_POOL_ERRORS = (BrokenProcessPool, OSError, RuntimeError, ValueError, AssertionError)
+
+def shutdown() -> None:
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=True)
+        _POOL = None
+
+# _copy_raw writes through ZipFile internals (fp, start_dir, _writecheck, _didModify, _writing,
+# ZipInfo.FileHeader), unchanged across CPython 3.8-3.13. Any other version, or a ZipFile
+# missing one of them, gets the writestr path.
+_RAW_COPY_SUPPORTED = (3, 8) <= sys.version_info[:2] <= (3, 13) and hasattr(zipfile.ZipInfo, "FileHeader")
+_RAW_COPY_ATTRS = ("fp", "start_dir", "_writecheck", "_didModify", "_writing", "filelist", "NameToInfo")
+
+def _copy_raw(zout: zipfile.ZipFile, src: memoryview, info: zipfile.ZipInfo) -> bool:
+    """Append a member's compressed bytes verbatim (no inflate/deflate). False if it can't be copied
+    as-is: unsupported zipfile internals, encrypted or unusual compression, or a member that would
+    need ZIP64 (sizes or offset past 4 GiB) — writestr handles those."""
+    if not _RAW_COPY_SUPPORTED or not all(hasattr(zout, a) for a in _RAW_COPY_ATTRS) or zout._writing:
+        return False
+    if info.flag_bits & 0x1 or info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        return False
+    if max(info.file_size, info.compress_size, zout.start_dir) >= zipfile.ZIP64_LIMIT:
+        return False
+    off = info.header_offset
+    if bytes(src[off:off + 4]) != b"PK\x03\x04":
+        return False
+    n, e = struct.unpack("<HH", src[off + 26:off + 30])
+    start = off + 30 + n + e
+    raw = src[start:start + info.compress_size]
+    if len(raw) != info.compress_size:
+        return False
+    zi = zipfile.ZipInfo(info.filename, info.date_time)
+    zi.compress_type = info.compress_type
+    zi.CRC, zi.compress_size, zi.file_size = info.CRC, info.compress_size, info.file_size
+    zi.external_attr, zi.create_system = info.external_attr, info.create_system
+    # CRC/sizes come from the central directory, so the local header is final: no data
+    # descriptor (bit 3), and the source's trailing descriptor is not copied
+    zi.flag_bits &= ~0x08
+    # same bookkeeping ZipFile.open(..., "w") does, minus the compressor
+    zout.fp.seek(zout.start_dir)
+    zi.header_offset = zout.fp.tell()
+    zout._writecheck(zi)
+    zout._didModify = True
+    zout.fp.write(zi.FileHeader(False))
+    zout.fp.write(raw)
+    zout.start_dir = zout.fp.tell()
+    zout.filelist.append(zi)
+    zout.NameToInfo[zi.filename] = zi
+    return True
 
 def _keyword_scrub_text(data: bytes) -> bytes:
-    try:
-        s = data.decode("utf-8", errors="ignore")
-        out = s
-        BATCH = 200
-        for i in range(0, len(EXPANDED_TERMS), BATCH):
-            chunk = EXPANDED_TERMS[i:i+BATCH]
-            rx = re.compile("|".join(re.escape(t) for t in chunk if t), re.IGNORECASE)
-            out = rx.sub("", out)
-        return out.encode("utf-8", errors="ignore")
-    except Exception:
-        return data
+    return get_engine(EXPANDED_TERMS, DICT_VERSION).scrub_bytes(data, "utf-8")
 
-def sanitize_ooxml(in_path: str | Path, out_path: str | Path):
-    in_path = Path(in_path); out_path = Path(out_path)
-    suffix = in_path.suffix.lower()
+def sanitize_ooxml_buffer(data: bytes | memoryview, ext: str | None = None,
+                          raw_copy: bool = True, workers: int | None = None,
+                          budget: Budget | None = None) -> Tuple[bytes, Dict]:
+    """In-memory sanitization: bytes/memoryview in, (clean bytes, result) out. No files touched.
+
+    raw_copy=False recompresses every kept member (the old behaviour; benchmarks only).
+    workers>1 transforms parts of PARALLEL_MIN_BYTES or more in a process pool (at most 2 x workers
+    in flight); members are still written in archive order, so the zip is byte-identical to serial.
+    budget: per-stage limits (sanitize_budget.py, env defaults); reported under "budget".
+    """
+    orig_bytes = bytes(data)
+    suffix = "." + (ext or "").lower().lstrip(".")
     if suffix not in (".docx", ".pptx", ".xlsx"):
-        shutil.copy(in_path, out_path)
-        return {"status": "noop", "notes": ["Not OOXML"]}
+        return orig_bytes, {"status": "noop", "notes": ["Not OOXML"]}
+    budget = budget or Budget()
+    try:
+        return _sanitize_zip(orig_bytes, raw_copy, workers, budget)
+    except BudgetExceeded as e:
+        return orig_bytes, {"status": "failed", "removed": [], "notes": [], "error": str(e), "budget": budget.report()}
 
-    orig_bytes = in_path.read_bytes()
+def _sanitize_zip(orig_bytes: bytes, raw_copy: bool, workers: int | None, budget: Budget) -> Tuple[bytes, Dict]:
     orig_sha = _sha256(orig_bytes)
+    out_io = io.BytesIO()
+
+    src  = memoryview(orig_bytes)
+    zin  = zipfile.ZipFile(io.BytesIO(orig_bytes), "r")
+    zout = zipfile.ZipFile(out_io, "w", zipfile.ZIP_DEFLATED)
+
+    def should_drop(name: str) -> bool:
+        n = name.lower()
+        if n.endswith("vbaproject.bin"): return True
+        for f in DROP_FOLDERS:
+            if f in n: return True
+        for d in DROP_DOC_PROPS:
+            if n.endswith(d): return True
+        if "/comments" in n or "trackchanges" in n: return True
+        return False
 
-    with tempfile.TemporaryDirectory() as td:
-        work = Path(td) / "work.zip"
-        shutil.copy(in_path, work)
-        zin  = zipfile.ZipFile(work, "r")
-        zout = zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED)
-
-        def should_drop(name: str) -> bool:
-            n = name.lower()
-            if n.endswith("vbaproject.bin"): return True
-            for f in DROP_FOLDERS:
-                if f in n: return True
-            for d in DROP_DOC_PROPS:
-                if n.endswith(d): return True
-            if "/comments" in n or "trackchanges" in n: return True
+    rels_removed = 0
+    removed_parts: List[str] = []
+    io_stats = {"members_raw_copied": 0, "bytes_raw_copied": 0, "members_recompressed": 0, "bytes_recompressed": 0}
+
+    def copy_raw(item: zipfile.ZipInfo) -> bool:
+        if not (raw_copy and _copy_raw(zout, src, item)):
             return False
+        io_stats["members_raw_copied"] += 1; io_stats["bytes_raw_copied"] += item.compress_size
+        return True
 
-        rels_removed = 0
-        removed_parts: List[str] = []
+    with budget.stage("structural"):
+        items = zin.infolist()
+        drops = [should_drop(it.filename.lower()) for it in items]
+    workers = max(1, OOXML_WORKERS if workers is None else workers)
+    pool = _pool(workers) if workers > 1 else None
+    pending: Dict[int, Future] = {}
+    ahead = 0
+    deep_ok = True
 
-        for item in zin.infolist():
+    def fill() -> None:
+        # keep up to 2 x workers large (not streamed) parts in flight, in archive order
+        nonlocal ahead
+        while pool is not None and ahead < len(items) and len(pending) < 2 * workers:
+            it = items[ahead]; ln = it.filename.lower()
+            if ln.endswith(TEXT_PARTS) and not drops[ahead] and it.file_size >= PARALLEL_MIN_BYTES \
+                    and not _is_stream_part(ln, it.file_size):
+                try:
+                    pending[ahead] = pool.submit(_process_member, ln, zin.read(it.filename), deep_ok)
+                except _POOL_ERRORS:
+                    serial()
+                    return
+            ahead += 1
+
+    def serial() -> None:
+        # pool unusable: drop it and let the loop redo in-flight parts itself
+        nonlocal pool
+        pool = None; pending.clear(); shutdown()
+
+    with budget.stage("deep_scrub") as deep:
+        for idx, item in enumerate(items):
+            deep_ok = deep.poll()   # past the deep_scrub budget: removals only, no keyword scrub
+            fill()
             name = item.filename
-            data = zin.read(name)
             lname = name.lower()
 
-            if should_drop(lname):
+            if drops[idx]:
                 removed_parts.append(f"drop:{name}")
                 continue
 
-            if lname == "[content_types].xml":
-                data = _clean_content_types(data)
-                if b"SafeDocs" not in data:
-                    try:
-                        data = data.replace(b"<?xml version='1.0' encoding='utf-8'?>",
-                                            b"<?xml version='1.0' encoding='utf-8'?>\n<!-- SafeDocs -->")
-                    except Exception:
-                        pass
+            if not lname.endswith(TEXT_PARTS) and copy_raw(item):
+                continue
 
-            if lname.endswith(".rels"):
+            data = None
+            done = False
+            if idx in pending:
                 try:
-                    root = ET.fromstring(data)
-                    changed = False
-                    for rel in list(root):
-                        if _is_external_rel(rel):
-                            root.remove(rel)
-                            changed = True
-                            rels_removed += 1
-                    if changed:
-                        data = ET.tostring(root, xml_declaration=True, encoding="utf-8")
-                        removed_parts.append(f"rels:{name}")
-                except Exception:
-                    pass
-
-            if lname.endswith((".xml", ".vml")):
+                    out, dropped = pending.pop(idx).result()
+                    done = True
+                except _POOL_ERRORS:
+                    serial()
+            elif _is_stream_part(lname, item.file_size):
                 try:
-                    root = ET.fromstring(data)
-                    dropped = 0
-                    dropped += _drop_nodes(root, (".//{*}externalLink", ".//{*}hyperlink", ".//{*}hyperlinks"))
-                    dropped += _drop_nodes(root, (".//{*}webExtensions", ".//{*}taskpane", ".//{*}taskpanes"))
-                    dropped += _drop_nodes(root, (".//{*}attachedTemplate",))
-                    dropped += _drop_nodes(root, (".//{*}OLEObject", ".//{*}oleObject", ".//{*}object", ".//{*}embeddedObject",
-                                                   ".//{*}control", ".//{*}ActiveX"))
-                    if dropped:
-                        data = ET.tostring(root, xml_declaration=True, encoding="utf-8")
-                        removed_parts.append(f"xml:{name}:{dropped}")
-                except Exception:
-                    pass
-
-            if lname.endswith((".xml", ".rels", ".vml", ".txt")):
-                data = _keyword_scrub_text(data)
-
-            zout.writestr(name, data)
+                    with zin.open(item) as fp:   # bounded memory: never inflate the whole part
+                        out, dropped = _transform_part_stream(lname, fp, deep_ok)
+                    done = True
+                except ET.XMLSyntaxError:
+                    pass   # not well-formed: in-memory path (byte-level scrub)
+            if not done:
+                data = zin.read(name)
+                out, dropped = _process_member(lname, data, deep_ok) if lname.endswith(TEXT_PARTS) else (None, 0)
+
+            if dropped and lname.endswith(".rels"):
+                rels_removed += dropped
+                removed_parts.append(f"rels:{name}")
+            elif dropped:
+                removed_parts.append(f"xml:{name}:{dropped}")
+
+            if out is None:   # unchanged
+                if copy_raw(item):
+                    continue
+                out = data if data is not None else zin.read(name)
+            # keep the member's own timestamp/attributes, so output depends only on the input
+            zi = zipfile.ZipInfo(name, item.date_time)
+            zi.compress_type, zi.external_attr = zipfile.ZIP_DEFLATED, item.external_attr
+            zout.writestr(zi, out)
+            io_stats["members_recompressed"] += 1; io_stats["bytes_recompressed"] += len(out)
 
+    with budget.stage("serialize"):
         zin.close(); zout.close()
+        if _sha256(out_io.getvalue()) == orig_sha:
+            with zipfile.ZipFile(out_io, "a", zipfile.ZIP_DEFLATED) as z:
+                z.writestr(zipfile.ZipInfo("safedocs.txt", (1980, 1, 1, 0, 0, 0)), "sanitized")
 
-    out_bytes = Path(out_path).read_bytes()
-    if _sha256(out_bytes) == orig_sha:
-        with tempfile.TemporaryDirectory() as td2:
-            tmp = Path(td2) / "tmp.zip"
-            shutil.copy(out_path, tmp)
-            with zipfile.ZipFile(tmp, "a", zipfile.ZIP_DEFLATED) as z:
-                z.writestr("safedocs.txt", "sanitized")
-            shutil.copy(tmp, out_path)
-
-    return {"status": "ok", "removed": sorted(set(removed_parts)), "stats": {"rels_removed": rels_removed}}
-
-def sanitize_ooxml_bytes(data: bytes, ext: str | None = None) -> bytes:
-    with tempfile.TemporaryDirectory() as td:
-        ip = Path(td) / f"in.{ext or 'bin'}"
-        op = Path(td) / f"out.{ext or 'bin'}"
-        ip.write_bytes(data)
-        _ = sanitize_ooxml(ip, op)
-        try:
-            return op.read_bytes()
-        except Exception:
-            return data
+    return out_io.getvalue(), {"status": "ok", "removed": sorted(set(removed_parts)),
+                               "notes": ["Deep scrub over budget: structural-only past that point"] if budget.degraded else [],
+                               "stats": {"rels_removed": rels_removed, **io_stats, "workers": workers if pool is not None else 1},
+                               "budget": budget.report()}
+
+def sanitize_ooxml(in_path: str | Path, out_path: str | Path):
+    in_path = Path(in_path); out_path = Path(out_path)
+    clean, res = sanitize_ooxml_buffer(in_path.read_bytes(), ext=in_path.suffix)
+    out_path.write_bytes(clean)
+    return res
+
+def sanitize_ooxml_bytes(data: bytes | memoryview, ext: str | None = None) -> bytes:
+    return sanitize_ooxml_buffer(data, ext=ext)[0]
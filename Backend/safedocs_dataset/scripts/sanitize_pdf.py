@@ -9,132 +9,54 @@ Structural removals:
 - Outlines, ViewerPreferences cleanup
 - Metadata purge (XMP/Info) when pikepdf is available
 
+Engines:
+- pikepdf (preferred): one parse, one walk over the objects doing the structural removals,
+  /JS strip and stream/string scrub, one save.
+- PyPDF2 (fallback): structural pass + write, then the pikepdf pass if available, else a
+  whole-buffer scrub.
+
 Keyword scrub:
-- Expand ~150 core terms into **>= 5,000 variants** (leet/dotted/underscored/colonized, compacted,
-  extensions, URL & LOLBins forms). Scrub every stream/string (pikepdf) or whole buffer fallback.
+- ~150 core terms expanded into **6,000 variants** (leet/dotted/underscored/colonized, compacted,
+  extensions, URL & LOLBins forms), loaded from the shared versioned dictionary (scrub_terms.py).
+  Scrub every string plus content/Form/JavaScript/metadata streams (pikepdf), or the whole buffer
+  as a fallback, one pass each (scrub_engine.py). Image, font, CMap and embedded-file streams are
+  passed through undecoded; stats count streams per class (streams_<class>) and skipped.
+
+Budgets (sanitize_budget.py): structural / metadata / deep_scrub / serialize each run under a
+wall-clock and RSS-growth limit. Past the deep_scrub limit the object walk keeps only the /JS
+strip (no string/stream scrub); the trip is reported in result["budget"].
 
 Always writes output; if bytes still match, appends a harmless comment to guarantee difference.
+
+Entry points: sanitize_pdf_buffer(bytes|memoryview) -> (clean bytes, result) works entirely in
+memory; sanitize_pdf(in_path, out_path) and sanitize_pdf_bytes(data) are thin wrappers around it.
 """
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, List, Iterable
-import io, re, shutil, hashlib, itertools, random
+from typing import Dict, List, Tuple
+import io, hashlib
 
-# Optional deep scrub
+from scrub_terms import load_terms, dict_version
+from scrub_engine import get_engine
+from sanitize_budget import Budget
+
+# One-pass engine (preferred)
 try:
     import pikepdf  # type: ignore
 except Exception:
     pikepdf = None
 
+# Structural pass without pikepdf
 try:
     from PyPDF2 import PdfReader, PdfWriter
-except Exception as e:  # pragma: no cover
-    raise RuntimeError("PyPDF2 is required for PDF sanitization") from e
-
-
-# ---------------- Keyword expansion (→ >= 5,000 variants) ----------------
-BASE_TERMS: List[str] = [
-    # JS/actions (PDF)
-    "javascript", "/js", "/javascript", "openaction", "submitform", "launch", "gotoR", "named", "action",
-    "richmedia", "embeddedfile", "embeddedfiles", "acroform", "xfa", "needappearances",
-    "doc.exportdataobject", "util.printf", "app.launchurl", "this.submitform", "geturl",
-    # Office/LOLBins / typical malware strings
-    "macro", "vba", "vbaproject", "ole", "activex", "dde", "ddeauto", "includepicture", "includetext",
-    "hyperlink", "attachedtemplate",
-    # URLs/schemes
-    "http://", "https://", "javascript:", "file:", "data:", "ftp://", "smb://",
-    # LOLBAS/windows & tools
-    "cmd", "cmd.exe", "powershell", "powershell.exe", "wscript", "wscript.exe", "cscript", "cscript.exe",
-    "mshta", "mshta.exe", "regsvr32", "regsvr32.exe", "rundll32", "rundll32.exe", "bitsadmin", "certutil",
-    "curl", "wget", "ftp", "tftp", "schtasks", "at.exe", "whoami", "net user", "net group",
-    # Enc/JS tricks
-    "base64", "eval", "fromcharcode", "unescape",
-    # file types/executables
-    ".exe", ".ps1", ".vbs", ".js", ".jse", ".bat", ".cmd", ".hta", ".dll",
-]
-
-# A few extra families to widen coverage
-EXTRA_FAMILIES = [
-    "dropper", "payload", "beacon", "c2", "shellcode", "maldoc", "phish", "obfuscate", "decode",
-    "invoke-expression", "iex", "downloadstring", "add-type", "new-object system.net.webclient",
-    "start-process", "write-host", "set-mppreference", "amsienable",
-]
-
-LEET_MAP = {
-    "a": ["a", "4", "@"], "e": ["e", "3"], "i": ["i", "1", "!"],
-    "o": ["o", "0"], "s": ["s", "5", "$"], "t": ["t", "7"]
-}
-SEP_VARIANTS = ["", ".", "_", "-", "\u200b"]
-PREFIXES = ["", "/", "\\"]          # PDF keys, escapes
-SUFFIXES = ["", "()", ":", ";", "'", '"']
-TLDs = ["com", "net", "org", "io", "ru", "cn", "xyz"]
-EXTS = [".exe",".ps1",".vbs",".js",".jse",".bat",".cmd",".hta",".dll",".scr",".com",".pif",".lnk"]
-
-def _leetify(token: str, cap: int = 10) -> List[str]:
-    pools = []
-    for ch in token:
-        low = ch.lower()
-        if low in LEET_MAP: pools.append(LEET_MAP[low])
-        else: pools.append([ch])
-    out = set()
-    for combo in itertools.product(*pools):
-        out.add("".join(combo))
-        if len(out) >= cap:
-            break
-    return list(out)
-
-def _path_forms(token: str) -> List[str]:
-    tk = token.strip("/").lower()
-    forms = [
-        f"{tk}", f"/{tk}", f"\\{tk}", f"{tk}/", f"{tk}\\", f"/{tk}/", f"\\{tk}\\",
-        f"{tk}.php", f"{tk}.asp", f"{tk}.aspx", f"{tk}.jsp"
-    ]
-    for tld in TLDs:
-        forms.append(f"{tk}.{tld}")
-        forms.append(f"www.{tk}.{tld}")
-        forms.append(f"http://{tk}.{tld}")
-        forms.append(f"https://{tk}.{tld}")
-    for ext in EXTS:
-        forms.append(f"{tk}{ext}")
-    return forms
-
-def expand_terms(min_count: int = 5000) -> List[str]:
-    seeds = set(BASE_TERMS + EXTRA_FAMILIES)
-    expanded = set()
-    # Core variants
-    for t in seeds:
-        t = t.strip()
-        if not t: continue
-        base = set([t, t.lower(), t.upper()])
-        if re.search(r"[a-zA-Z]", t):
-            for v in _leetify(t, cap=8):
-                base.add(v)
-        # separator/prefix/suffix variants
-        for cv in list(base):
-            for pre in PREFIXES:
-                for sep in SEP_VARIANTS:
-                    for suf in SUFFIXES:
-                        expanded.add(f"{pre}{cv.replace(' ', sep)}{suf}")
-        # compacted form
-        expanded.add(re.sub(r"[\/\.\-\s]+", "", t))
-        # path/URL/exe style forms
-        for pf in _path_forms(t):
-            expanded.add(pf)
-    # If still below target, add n-gram slices of longer tokens
-    if len(expanded) < min_count:
-        for t in list(seeds):
-            tt = re.sub(r"[^a-z0-9]", "", t.lower())
-            for i in range(0, max(0, len(tt)-3)):
-                expanded.add(tt[i:i+4])
-                if len(expanded) >= min_count: break
-            if len(expanded) >= min_count: break
-    # Bound overall size for performance
-    items = sorted(x for x in expanded if x)
-    random.shuffle(items)
-    return items[: max(min_count, 5000)]
-
-EXPANDED_TERMS = expand_terms(min_count=6000)  # ≥ 6000 tokens
+except Exception:  # pragma: no cover
+    PdfReader = PdfWriter = None
+
+
+# ---------------- Keyword dictionary (→ 6,000 variants, see scrub_terms.py) ----------------
+EXPANDED_TERMS = load_terms("pdf")
+DICT_VERSION = dict_version("pdf")
 
 # -------- helpers --------
 def _sha256(b: bytes) -> str:
@@ -171,16 +93,8 @@ def _strip_js_anywhere(obj, removed: List[str], stats: Dict[str, int]):
         pass
 
 def _keyword_scrub_text(s: str, tokens: List[str]) -> str:
-    lower = s.lower()
-    out = s
-    # chunk into batches to keep regex manageable
-    BATCH = 200
-    for i in range(0, len(tokens), BATCH):
-        chunk = tokens[i:i+BATCH]
-        rx = re.compile("|".join(re.escape(t) for t in chunk if t), re.IGNORECASE)
-        out = rx.sub("", out)
-        lower = out.lower()
-    return out
+    # single pass with the engine compiled once for this dictionary version
+    return get_engine(tokens, DICT_VERSION).scrub(s)
 
 def _scrub_bytes_keywords(data: bytes, tokens: List[str]) -> bytes:
     try:
@@ -191,16 +105,181 @@ def _scrub_bytes_keywords(data: bytes, tokens: List[str]) -> bytes:
         return data
 
 
-# -------- main --------
-def sanitize_pdf(in_path: str | Path, out_path: str | Path):
-    in_path = Path(in_path); out_path = Path(out_path)
-    removed: List[str] = []
-    stats: Dict[str, int] = {"js": 0, "actions": 0, "annotations": 0, "embedded_files": 0, "richmedia": 0}
-    orig_bytes = in_path.read_bytes()
-    orig_sha = _sha256(orig_bytes)
-
+# -------- one-pass engine (pikepdf) --------
+def _pk_drop(d, key: str, removed: List[str], label: str) -> bool:
     try:
-        reader = PdfReader(str(in_path))
+        if isinstance(d, pikepdf.Dictionary) and key in d:
+            del d[key]
+            removed.append(label)
+            return True
+    except Exception:
+        pass
+    return False
+
+def _pk_scrub_direct(o, removed: List[str], stats: Dict[str, int], scrub: bool = True):
+    """Scrub strings and drop /JS|/JavaScript inside one object, without following indirect refs.
+    scrub=False only drops the keys (structural-only, after the deep_scrub budget tripped)."""
+    if isinstance(o, pikepdf.Dictionary) or isinstance(o, pikepdf.Stream):
+        for k in list(o.keys()):
+            if k in ("/JS", "/JavaScript"):
+                del o[k]; removed.append("JS"); stats["js"] += 1
+                continue
+            v = o[k]
+            if scrub and isinstance(v, pikepdf.String):
+                s = str(v); s2 = _keyword_scrub_text(s, EXPANDED_TERMS)
+                if s2 != s:
+                    o[k] = pikepdf.String(s2); stats["strings_scrubbed"] += 1
+            elif isinstance(v, (pikepdf.Dictionary, pikepdf.Array)) and not v.is_indirect:
+                _pk_scrub_direct(v, removed, stats, scrub)
+    elif isinstance(o, pikepdf.Array):
+        for i, v in enumerate(o):
+            if scrub and isinstance(v, pikepdf.String):
+                s = str(v); s2 = _keyword_scrub_text(s, EXPANDED_TERMS)
+                if s2 != s:
+                    o[i] = pikepdf.String(s2); stats["strings_scrubbed"] += 1
+            elif isinstance(v, (pikepdf.Dictionary, pikepdf.Array)) and not v.is_indirect:
+                _pk_scrub_direct(v, removed, stats, scrub)
+
+# Stream classes whose decoded data is keyword-scrubbed; everything else is passed through
+# without decoding (images, font programs, CMaps, embedded files, ICC/function data).
+SCRUB_STREAM_CLASSES = ("content", "form", "javascript", "metadata")
+IMAGE_FILTERS = ("/DCTDecode", "/JPXDecode", "/JBIG2Decode", "/CCITTFaxDecode")
+FONT_SUBTYPES = ("/Type1C", "/CIDFontType0C", "/OpenType")
+
+def _stream_roles(pdf) -> Dict[Tuple[int, int], str]:
+    """Roles known only from the referring object (font programs, ToUnicode CMaps, JS streams)."""
+    roles: Dict[Tuple[int, int], str] = {}
+    for o in pdf.objects:
+        if not isinstance(o, pikepdf.Dictionary):
+            continue
+        try:
+            t = str(o.get("/Type", ""))
+            if t == "/Font":
+                for k in ("/ToUnicode", "/Encoding"):
+                    v = o.get(k)
+                    if isinstance(v, pikepdf.Stream): roles[v.objgen] = "cmap"
+                o = o.get("/FontDescriptor", o)
+                t = str(o.get("/Type", ""))
+            if t == "/FontDescriptor":
+                for k in ("/FontFile", "/FontFile2", "/FontFile3"):
+                    v = o.get(k)
+                    if isinstance(v, pikepdf.Stream): roles[v.objgen] = "font"
+            js = o.get("/JS")
+            if isinstance(js, pikepdf.Stream): roles[js.objgen] = "javascript"
+        except Exception:
+            continue
+    return roles
+
+def _classify_stream(obj, roles: Dict[Tuple[int, int], str]) -> str:
+    role = roles.get(obj.objgen)
+    if role:
+        return role
+    typ, sub = str(obj.get("/Type", "")), str(obj.get("/Subtype", ""))
+    flt = obj.get("/Filter")
+    filters = [str(f) for f in flt] if isinstance(flt, pikepdf.Array) else ([str(flt)] if flt is not None else [])
+    if sub == "/Image" or any(f in IMAGE_FILTERS for f in filters): return "image"
+    if typ == "/Metadata": return "metadata"
+    if typ in ("/ObjStm", "/XRef"): return "objstm"
+    if typ == "/EmbeddedFile": return "embedded"
+    if sub == "/Form": return "form"
+    if sub in FONT_SUBTYPES or "/Length1" in obj or "/Length2" in obj: return "font"
+    if typ == "/CMap": return "cmap"
+    if typ == "/XObject" or "/FunctionType" in obj or "/ShadingType" in obj or "/N" in obj: return "other"
+    return "content"   # page contents, Type3 CharProcs, annotation appearances without /Subtype
+
+def _pk_structural(pdf, removed: List[str], stats: Dict[str, int], st) -> None:
+    """Catalog and page removals (actions, JS, embedded files, forms, annotations)."""
+    root = pdf.Root
+    # Catalog
+    if _pk_drop(root, "/OpenAction", removed, "OpenAction"): stats["actions"] += 1
+    if _pk_drop(root, "/AA", removed, "Catalog.AA"): stats["actions"] += 1
+    names = root.get("/Names")
+    if isinstance(names, pikepdf.Dictionary):
+        if _pk_drop(names, "/EmbeddedFiles", removed, "Names.EmbeddedFiles"): stats["embedded_files"] += 1
+        if _pk_drop(names, "/JavaScript", removed, "Names.JavaScript"): stats["js"] += 1
+    acro = root.get("/AcroForm")
+    if isinstance(acro, pikepdf.Dictionary):
+        _pk_drop(acro, "/XFA", removed, "AcroForm.XFA")
+        if _pk_drop(acro, "/JS", removed, "AcroForm.JS"): stats["js"] += 1
+        if _pk_drop(acro, "/JavaScript", removed, "AcroForm.JavaScript"): stats["js"] += 1
+        if _pk_drop(acro, "/AA", removed, "AcroForm.AA"): stats["actions"] += 1
+        _pk_drop(acro, "/NeedAppearances", removed, "AcroForm.NeedAppearances")
+        _pk_drop(acro, "/Fields", removed, "AcroForm.Fields")
+    _pk_drop(root, "/Outlines", removed, "Outlines")
+    _pk_drop(root, "/PageLabels", removed, "PageLabels")
+    vp = root.get("/ViewerPreferences")
+    if isinstance(vp, pikepdf.Dictionary):
+        for k in list(vp.keys()):
+            _pk_drop(vp, k, removed, f"ViewerPreferences.{str(k).lstrip('/')}")
+
+    # Pages
+    for page in pdf.pages:
+        st.check()
+        po = page.obj
+        if _pk_drop(po, "/AA", removed, "Page.AA"): stats["actions"] += 1
+        if _pk_drop(po, "/RichMediaContent", removed, "Page.RichMediaContent"): stats["richmedia"] += 1
+        if "/Annots" in po:
+            annots = po["/Annots"]
+            count = len(annots) if isinstance(annots, pikepdf.Array) else 1
+            del po["/Annots"]
+            stats["annotations"] += count
+            removed.append(f"Annots({count})")
+
+def _sanitize_pikepdf(orig_bytes: bytes, removed: List[str], stats: Dict[str, int], budget: Budget,
+                     structural: bool = True) -> bytes:
+    """
+    Single parse, single object walk, single save: structural removals on the catalog and
+    pages, metadata purge, then every indirect object visited once for the /JS strip and
+    the stream/string keyword scrub. Past the deep_scrub budget the walk keeps going with
+    the /JS strip only. structural=False skips the catalog/page removals (the PyPDF2 flow
+    has already done them under its own structural stage).
+    """
+    with pikepdf.open(io.BytesIO(orig_bytes)) as pdf:
+        root = pdf.Root
+        if structural:
+            with budget.stage("structural") as st:
+                _pk_structural(pdf, removed, stats, st)
+
+        # Metadata purge
+        with budget.stage("metadata"):
+            _pk_drop(root, "/Metadata", removed, "Metadata")
+            if "/Info" in pdf.trailer:
+                del pdf.trailer["/Info"]; removed.append("Info")
+
+        # One walk over every object: /JS strip + string scrub + scrub of text-bearing streams
+        with budget.stage("deep_scrub") as deep:
+            roles = _stream_roles(pdf)
+            for obj in pdf.objects:
+                try:
+                    scrub = deep.poll()
+                    if isinstance(obj, pikepdf.Stream):
+                        kind = _classify_stream(obj, roles)
+                        stats[f"streams_{kind}"] = stats.get(f"streams_{kind}", 0) + 1
+                    _pk_scrub_direct(obj, removed, stats, scrub)
+                    if isinstance(obj, pikepdf.Stream):
+                        if kind not in SCRUB_STREAM_CLASSES or not scrub:
+                            stats["streams_skipped"] += 1
+                            continue
+                        data = bytes(obj.read_bytes())
+                        new = _scrub_bytes_keywords(data, EXPANDED_TERMS)
+                        if new != data:
+                            obj.write(new)
+                            stats["streams_scrubbed"] += 1
+                except Exception:
+                    continue
+
+        with budget.stage("serialize"):
+            out_io = io.BytesIO()
+            pdf.save(out_io, linearize=False, static_id=False)
+            return out_io.getvalue()
+
+
+# -------- two-engine flow (PyPDF2 structural + reopen) — used when pikepdf is missing --------
+def _sanitize_pypdf2(orig_bytes: bytes, removed: List[str], stats: Dict[str, int], budget: Budget) -> bytes:
+    if PdfReader is None:
+        raise RuntimeError("PyPDF2 or pikepdf is required for PDF sanitization")
+    with budget.stage("structural") as st:
+        reader = PdfReader(io.BytesIO(orig_bytes))
         writer = PdfWriter()
 
         # Catalog
@@ -230,6 +309,7 @@ def sanitize_pdf(in_path: str | Path, out_path: str | Path):
 
         # Pages
         for page in reader.pages:
+            st.check()
             if _drop_key(page, "/AA", removed, "Page.AA"): stats["actions"] += 1
             if _drop_key(page, "/RichMediaContent", removed, "Page.RichMediaContent"): stats["richmedia"] += 1
             if "/Annots" in page:
@@ -254,89 +334,65 @@ def sanitize_pdf(in_path: str | Path, out_path: str | Path):
                     except Exception:
                         pass
 
-        # First pass write
+    with budget.stage("serialize"):
         writer.add_metadata({"/Producer": "SafeDocs"})
         buf = io.BytesIO()
         writer.write(buf)
-        buf.seek(0)
-        pdf_bytes = buf.read()
-
-        # Deep keyword scrub
-        if pikepdf is not None:
-            try:
-                with pikepdf.open(io.BytesIO(pdf_bytes)) as pdf:
-                    if "/Metadata" in pdf.root:
-                        del pdf.root["/Metadata"]; removed.append("Metadata")
-                    if "/Info" in pdf.trailer:
-                        del pdf.trailer["/Info"]; removed.append("Info")
-
-                    for obj in list(pdf.objects):
-                        try:
-                            if isinstance(obj, pikepdf.Stream):
-                                data = bytes(obj.read_bytes())
-                                new = _scrub_bytes_keywords(data, EXPANDED_TERMS)
-                                if new != data:
-                                    obj.set_stream(new)
-                        except Exception:
-                            continue
+        pdf_bytes = buf.getvalue()
 
-                    # scrub strings recursively (best effort)
-                    def _scrub_obj(o):
-                        try:
-                            if isinstance(o, pikepdf.String):
-                                s = str(o)
-                                s2 = _keyword_scrub_text(s, EXPANDED_TERMS)
-                                if s2 != s:
-                                    return pikepdf.String(s2)
-                            elif isinstance(o, pikepdf.Array):
-                                return pikepdf.Array([_scrub_obj(x) for x in o])
-                            elif isinstance(o, pikepdf.Dictionary):
-                                d = pikepdf.Dictionary()
-                                for k, v in o.items():
-                                    d[k] = _scrub_obj(v)
-                                return d
-                        except Exception:
-                            pass
-                        return o
-                    try:
-                        pdf.root = _scrub_obj(pdf.root)
-                    except Exception:
-                        pass
+    # Deep scrub: second engine over the serialized output
+    if pikepdf is not None:
+        return _sanitize_pikepdf(pdf_bytes, removed, stats, budget, structural=False)
+    with budget.stage("deep_scrub"):   # one C-level pass: measured, not interruptible
+        return _scrub_bytes_keywords(pdf_bytes, EXPANDED_TERMS)
 
-                    out_io = io.BytesIO()
-                    pdf.save(out_io, rebuild_xref=True, linearize=False, static_id=False)
-                    pdf_bytes = out_io.getvalue()
-            except Exception:
-                pdf_bytes = _scrub_bytes_keywords(pdf_bytes, EXPANDED_TERMS)
-        else:
-            pdf_bytes = _scrub_bytes_keywords(pdf_bytes, EXPANDED_TERMS)
 
-        out_path.write_bytes(pdf_bytes)
+# -------- main --------
+def sanitize_pdf_buffer(data: bytes | memoryview, engine: str | None = None,
+                        budget: Budget | None = None) -> Tuple[bytes, Dict]:
+    """
+    In-memory sanitization: bytes/memoryview in, (clean bytes, result) out. No files touched.
+    engine: "pikepdf" (one pass, default when installed) | "pypdf2" (PyPDF2 structural pass,
+    then the pikepdf pass again if available, else a whole-buffer scrub).
+    budget: per-stage limits (sanitize_budget.py, env defaults); reported under "budget".
+    """
+    removed: List[str] = []
+    stats: Dict[str, int] = {"js": 0, "actions": 0, "annotations": 0, "embedded_files": 0, "richmedia": 0,
+                             "streams_scrubbed": 0, "streams_skipped": 0, "strings_scrubbed": 0}
+    orig_bytes = bytes(data)
+    orig_sha = _sha256(orig_bytes)
+    engine = engine or ("pikepdf" if pikepdf is not None else "pypdf2")
+    budget = budget or Budget()
+
+    try:
+        if engine == "pikepdf":
+            pdf_bytes = _sanitize_pikepdf(orig_bytes, removed, stats, budget)
+        else:
+            pdf_bytes = _sanitize_pypdf2(orig_bytes, removed, stats, budget)
 
         # Guarantee change
         if _sha256(pdf_bytes) == orig_sha:
-            with open(out_path, "ab") as f:
-                f.write(b"\n% SafeDocs sanitized\n")
+            pdf_bytes += b"\n% SafeDocs sanitized\n"
 
-        return {
+        return pdf_bytes, {
             "status": "ok",
-            "sanitized_file": str(out_path),
+            "engine": engine,
             "removed": sorted(set(removed)),
-            "notes": [],
+            "notes": ["Deep scrub over budget: structural-only past that point"] if budget.degraded else [],
             "stats": stats,
+            "budget": budget.report(),
         }
 
     except Exception as e:
-        shutil.copy(in_path, out_path)
-        return {"status": "failed", "sanitized_file": str(out_path), "removed": [], "notes": [], "stats": {}, "error": str(e)}
-
-def sanitize_pdf_bytes(data: bytes) -> bytes:
-    import tempfile
-    with tempfile.TemporaryDirectory() as td:
-        ip = Path(td) / "in.pdf"; op = Path(td) / "out.pdf"
-        ip.write_bytes(data)
-        res = sanitize_pdf(ip, op)
-        try:
-            return Path(res.get("sanitized_file", op)).read_bytes()
-        except Exception:
-            return data
+        return orig_bytes, {"status": "failed", "engine": engine, "removed": [], "notes": [], "stats": {},
+                            "error": str(e), "budget": budget.report()}
+
+def sanitize_pdf(in_path: str | Path, out_path: str | Path):
+    in_path = Path(in_path); out_path = Path(out_path)
+    clean, res = sanitize_pdf_buffer(in_path.read_bytes())
+    out_path.write_bytes(clean)
+    res["sanitized_file"] = str(out_path)
+    return res
+
+def sanitize_pdf_bytes(data: bytes | memoryview) -> bytes:
+    return sanitize_pdf_buffer(data)[0]
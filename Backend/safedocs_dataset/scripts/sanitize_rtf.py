@@ -1,173 +1,255 @@
 """
 SafeDocs RTF Sanitizer — structural hardening + 5k+ keyword scrub
 
-Structural:
-- Remove \object...\endobj, \*\objdata, DDE/DDEAUTO fields,
-  INCLUDEPICTURE/INCLUDETEXT, auto-opening HYPERLINK fields, \pict blocks,
-  and suspicious controls (\shp, \shpinst, \field, \pict, \blipuid)
+Structural (one linear pass of a group tokenizer, see _strip_rtf):
+- Drop whole groups by destination: \object, \*\objdata, \pict, shapes (\shpinst,
+  \shppict, \nonshppict), \*\datastore; \binN payloads inside them are skipped by length
+- Fields: keep PAGE/DATE/SEQ-style fields; any other instruction (DDE, DDEAUTO,
+  INCLUDEPICTURE, INCLUDETEXT, HYPERLINK, LINK, ...) loses the field and keeps its
+  \fldrslt text as a plain group
+- Drop suspicious control words (\objclass, \objupdate, \objautlink, \objlink, \shp, \blipuid)
+- Nesting is respected, unbalanced "}" are dropped, unterminated groups are closed at EOF
 
 Keyword scrub:
-- Generate **>= 5,000** variants from ~150 seeds (same generator as PDF/OOXML)
-- Scrub across entire text
+- **6,000** variants of ~150 seeds from the shared versioned dictionary (scrub_terms.py)
+- Scrub text runs only (never control words), one pass each (scrub_engine.py)
+
+Budgets (sanitize_budget.py): the tokenizer pass runs as the deep_scrub stage and polls it;
+past its limit the rest of the file is stripped structurally but not keyword-scrubbed, and the
+trip is reported in result["budget"].
 
 Always writes output; if identical, appends harmless comment.
+
+Entry points: sanitize_rtf_buffer(bytes|memoryview) -> (clean bytes, result) works entirely in
+memory; sanitize_rtf(in_path, out_path) and sanitize_rtf_bytes(data) are thin wrappers around it.
 """
 
 from __future__ import annotations
 from pathlib import Path
-import re, shutil, hashlib, itertools, random
-from typing import List, Iterable
-
-RE_FLAGS = re.IGNORECASE | re.DOTALL
-
-# Blocks / fields
-RE_OBJECT_BLOCK    = re.compile(r"\\object\b.*?\\endobj", RE_FLAGS)
-RE_OBJDATA_BLOCK   = re.compile(r"\\\*?\\objdata\b.*?}", RE_FLAGS)
-RE_PICT_BLOCK      = re.compile(r"\\pict\b.*?}", RE_FLAGS)
-RE_FIELD_BLOCK     = re.compile(r"{\\field\b.*?}", RE_FLAGS)
-RE_DDE_FIELD       = re.compile(r"{\\field\b.*?\\fldinst\b[^}]*\bDDE(AUTO)?\b[^}]*}", RE_FLAGS)
-RE_INCLUDE_FIELD   = re.compile(r"{\\field\b.*?\\fldinst\b[^}]*\\(INCLUDEPICTURE|INCLUDETEXT)\b[^}]*}", RE_FLAGS)
-RE_HYPERLINK_AUTO  = re.compile(r"{\\field\b.*?\\fldinst\b[^}]*HYPERLINK[^}]*\\o\b[^}]*}", RE_FLAGS)
-RE_SUSPICIOUS_CTRL = re.compile(r"\\(objclass|shp|shpinst|field|pict|blipuid)\b", RE_FLAGS)
-
-# ---- keyword expansion (shared with PDF/OOXML) ----
-BASE_TERMS: List[str] = [
-    "javascript", "/js", "/javascript", "openaction", "submitform", "launch", "gotoR", "named", "action",
-    "richmedia", "embeddedfile", "embeddedfiles", "acroform", "xfa", "needappearances",
-    "macro", "vba", "vbaproject", "ole", "activex", "dde", "ddeauto", "includepicture", "includetext",
-    "hyperlink", "attachedtemplate",
-    "http://", "https://", "javascript:", "file:", "data:", "ftp://", "smb://",
-    "cmd", "cmd.exe", "powershell", "powershell.exe", "wscript", "wscript.exe", "cscript", "cscript.exe",
-    "mshta", "mshta.exe", "regsvr32", "regsvr32.exe", "rundll32", "rundll32.exe", "bitsadmin", "certutil",
-    "curl", "wget", "ftp", "tftp", "schtasks", "at.exe", "whoami", "net user", "net group",
-    "base64", "eval", "fromcharcode", "unescape",
-    ".exe", ".ps1", ".vbs", ".js", ".jse", ".bat", ".cmd", ".hta", ".dll",
-]
-EXTRA_FAMILIES = [
-    "dropper","payload","beacon","c2","shellcode","maldoc","phish","obfuscate","decode",
-    "invoke-expression","iex","downloadstring","add-type","new-object system.net.webclient",
-    "start-process","write-host","set-mppreference","amsienable",
-]
-LEET_MAP = {"a":["a","4","@"],"e":["e","3"],"i":["i","1","!"],"o":["o","0"],"s":["s","5","$"],"t":["t","7"]}
-SEP_VARIANTS = ["", ".", "_", "-", "\u200b"]
-PREFIXES = ["", "/", "\\"]
-SUFFIXES = ["", "()", ":", ";", "'", '"']
-TLDs = ["com","net","org","io","ru","cn","xyz"]
-EXTS = [".exe",".ps1",".vbs",".js",".jse",".bat",".cmd",".hta",".dll",".scr",".com",".pif",".lnk"]
-
-def _leetify(token: str, cap: int = 10) -> List[str]:
-    pools = []
-    for ch in token:
-        low = ch.lower()
-        if low in LEET_MAP: pools.append(LEET_MAP[low])
-        else: pools.append([ch])
-    out = set()
-    for combo in itertools.product(*pools):
-        out.add("".join(combo))
-        if len(out) >= cap: break
-    return list(out)
-
-def _path_forms(token: str) -> List[str]:
-    tk = token.strip("/").lower()
-    forms = [f"{tk}", f"/{tk}", f"\\{tk}", f"{tk}/", f"{tk}\\", f"/{tk}/", f"\\{tk}\\"]
-    for tld in TLDs:
-        forms += [f"{tk}.{tld}", f"www.{tk}.{tld}", f"http://{tk}.{tld}", f"https://{tk}.{tld}"]
-    for ext in EXTS:
-        forms.append(f"{tk}{ext}")
-    return forms
-
-def expand_terms(min_count: int = 5000) -> List[str]:
-    seeds = set(BASE_TERMS + EXTRA_FAMILIES)
-    expanded = set()
-    for t in seeds:
-        t = t.strip()
-        if not t: continue
-        base = set([t, t.lower(), t.upper()])
-        if re.search(r"[a-zA-Z]", t):
-            for v in _leetify(t, cap=8):
-                base.add(v)
-        for cv in list(base):
-            for pre in PREFIXES:
-                for sep in SEP_VARIANTS:
-                    for suf in SUFFIXES:
-                        expanded.add(f"{pre}{cv.replace(' ', sep)}{suf}")
-        expanded.add(re.sub(r"[\/\.\-\s]+", "", t))
-        for pf in _path_forms(t):
-            expanded.add(pf)
-    if len(expanded) < min_count:
-        for t in list(seeds):
-            tt = re.sub(r"[^a-z0-9]", "", t.lower())
-            for i in range(0, max(0, len(tt)-3)):
-                expanded.add(tt[i:i+4])
-                if len(expanded) >= min_count: break
-            if len(expanded) >= min_count: break
-    items = sorted(x for x in expanded if x)
-    random.shuffle(items)
-    return items[: max(min_count, 6000)]
-
-EXPANDED_TERMS = expand_terms(min_count=6000)
+import re, hashlib
+from typing import Dict, List, Tuple
+
+from scrub_terms import load_terms, dict_version
+from scrub_engine import get_engine
+from sanitize_budget import Budget
+
+# One token per match, alternatives are disjoint on their first char and bounded (a control word
+# is at most 32 letters + a 10-digit parameter), so tokenizing is a single linear scan.
+RE_TOKEN = re.compile(r"\\([a-zA-Z]{1,32})(-?\d{1,10})? ?|\\'[0-9a-fA-F]{2}|\\[\s\S]?|[{}]|[^\\{}]+")
+
+# Groups dropped whole, by destination (first control word, after an optional \*)
+DROP_GROUPS = {
+    "object": "object", "objdata": "objdata", "pict": "pict", "datastore": "datastore",
+    "shpinst": "shape", "shppict": "shape", "nonshppict": "shape",
+}
+# Control words dropped on their own (group content is kept)
+DROP_WORDS = frozenset(("objclass", "objupdate", "objautlink", "objlink", "shp", "blipuid"))
+# Fields kept when their instruction starts with one of these; any other field (DDE, DDEAUTO,
+# INCLUDEPICTURE, INCLUDETEXT, HYPERLINK, LINK, IMPORT, ...) is replaced by its result text
+SAFE_FIELDS = frozenset(("PAGE", "NUMPAGES", "SECTIONPAGES", "SECTION", "DATE", "TIME", "CREATEDATE",
+                         "SAVEDATE", "PRINTDATE", "EDITTIME", "SEQ", "LISTNUM"))
+FIELD_LABELS = {"DDE": "ddefield", "DDEAUTO": "ddefield", "INCLUDEPICTURE": "include_field",
+                "INCLUDETEXT": "include_field", "HYPERLINK": "hyperlink"}
+
+# ---- keyword dictionary (shared with PDF/OOXML, see scrub_terms.py) ----
+EXPANDED_TERMS = load_terms("office")
+DICT_VERSION = dict_version("office")
 
 def _sha256(b: bytes) -> str:
     h = hashlib.sha256(); h.update(b); return h.hexdigest()
 
 def _keyword_scrub_text(s: str, tokens: List[str]) -> str:
-    out = s
-    BATCH = 200
-    for i in range(0, len(tokens), BATCH):
-        chunk = tokens[i:i+BATCH]
-        rx = re.compile("|".join(re.escape(t) for t in chunk if t), re.IGNORECASE)
-        out = rx.sub("", out)
-    return out
-
-def sanitize_rtf(in_path: str | Path, out_path: str | Path):
-    in_path = Path(in_path); out_path = Path(out_path)
-    orig = in_path.read_bytes(); orig_sha = _sha256(orig)
-    removed: list[str] = []
+    return get_engine(tokens, DICT_VERSION).scrub(s)
+
+class _Group:
+    __slots__ = ("start", "dest", "drop", "open", "instr", "field", "verdict", "rslt")
+
+    def __init__(self, start: int, drop: bool, field: "_Group | None", instr: "List[str] | None") -> None:
+        self.start = start          # index in the output piece list of this group's "{"
+        self.dest: str | None = None
+        self.drop = drop            # inside a dropped group: emit nothing until it closes
+        self.open = True            # destination not decided yet (before the first real token)
+        self.field = field          # nearest enclosing \field group
+        self.instr = instr          # \fldinst (and its subgroups): instruction text, for the verdict
+        self.verdict: str | None = None         # \field: None = undecided, "" = safe, else the kind
+        self.rslt: Tuple[int, int] | None = None  # \field: output slice of its \fldrslt group
+
+def _strip_rtf(txt: str, scrub, stage=None) -> Tuple[str, List[str], Dict[str, int]]:
+    """Single pass over the token stream with a group stack.
+
+    Linear in the input: every char is consumed by exactly one bounded token, \binN payloads
+    are skipped by length and a dropped group emits nothing. Rejecting a field only records
+    cut marks (+1 at the start of a cut range, -1 past its end, O(1) each); one final sweep
+    keeps the pieces whose running count is 0. Nested rejections never revisit pieces, and
+    the kept \fldrslt body is never copied.
+
+    stage (a sanitize_budget.Stage) is polled every 256 text runs; once it is over budget the
+    remaining runs are copied unscrubbed and the structural removals carry on."""
+    out: List[str] = []
+    cuts: Dict[int, int] = {}
+    stack: List[_Group] = []
+    removed: List[str] = []
+    stats = {"groups_dropped": 0, "fields_dropped": 0, "words_dropped": 0, "max_depth": 0}
+    runs = 0
+
+    def cut(lo: int, hi: int) -> None:
+        if lo < hi:
+            cuts[lo] = cuts.get(lo, 0) + 1; cuts[hi] = cuts.get(hi, 0) - 1
+
+    def reject_field(g: _Group) -> None:
+        if g.rslt:   # keep the result as a plain group: its "{" and body, minus the \fldrslt word
+            lo, hi = g.rslt
+            cut(g.start, lo); cut(lo + 1, lo + 2); cut(hi, len(out))
+        else:
+            cut(g.start, len(out))
+        removed.append(FIELD_LABELS.get(g.verdict or "", "field")); stats["fields_dropped"] += 1
+
+    pos, n = 0, len(txt)
+    while pos < n:
+        m = RE_TOKEN.match(txt, pos)
+        tok = m.group(0)
+        pos = m.end()
+        top = stack[-1] if stack else None
+        drop = top is not None and top.drop
+
+        if tok == "{":
+            if top is None:
+                g = _Group(len(out), False, None, None)
+            else:
+                g = _Group(len(out), drop, top if top.dest == "field" else top.field, top.instr)
+            stack.append(g)
+            stats["max_depth"] = max(stats["max_depth"], len(stack))
+            if not drop: out.append(tok)
+            continue
+
+        if tok == "}":
+            if top is None:
+                continue   # unbalanced close: dropped
+            stack.pop()
+            if drop:
+                continue
+            out.append(tok)
+            if top.dest == "fldrslt" and top.field is not None:
+                top.field.rslt = (top.start, len(out))
+            elif top.dest == "fldinst" and top.field is not None:
+                words = "".join(top.instr).split()
+                kind = words[0].upper() if words else ""
+                if not top.field.verdict:   # sticky: a later safe \fldinst can't clear an unsafe one
+                    top.field.verdict = "" if kind in SAFE_FIELDS else (kind or "EMPTY")
+            elif top.dest == "field" and top.verdict != "":
+                reject_field(top)
+            continue
+
+        if drop:
+            if m.group(1) == "bin":   # binary payload: skip it whole, braces inside are data
+                pos = min(n, pos + max(0, int(m.group(2) or 0)))   # \bin-N / \bin0: no payload
+            continue
+
+        word = m.group(1)
+        if top is not None and top.open:
+            if tok == "\\*":
+                out.append(tok); continue
+            top.open = False
+            if word:
+                top.dest = word.lower()
+                label = DROP_GROUPS.get(top.dest)
+                if label:
+                    for k in range(top.start, len(out)):   # just "{" and maybe "\*"
+                        out[k] = ""
+                    top.drop = True
+                    removed.append(label); stats["groups_dropped"] += 1
+                    continue
+                if top.dest == "fldinst":
+                    top.instr = []
+                elif top.dest == "field":
+                    top.instr = None
+
+        if word:
+            lw = word.lower()
+            if lw in DROP_WORDS:
+                removed.append("control_word"); stats["words_dropped"] += 1
+                continue
+            out.append(tok)
+            if lw == "bin":
+                k = min(n, pos + max(0, int(m.group(2) or 0)))
+                out.append(txt[pos:k]); pos = k
+        elif tok[0] != "\\":
+            # plain text run: the only thing the keyword scrub touches
+            if top is not None and top.instr is not None:
+                top.instr.append(tok)
+            runs += 1
+            if stage is not None and runs & 255 == 0 and not stage.poll():
+                scrub, stage = (lambda t: t), None
+            out.append(scrub(tok))
+        else:
+            out.append(tok)
+
+    # unterminated input: open fields without a safe verdict go too (innermost first)
+    for g in reversed(stack):
+        if g.dest == "field" and g.verdict != "" and not g.drop:
+            reject_field(g)
+    if cuts:
+        kept, depth = [], 0
+        for k, piece in enumerate(out):
+            depth += cuts.get(k, 0)
+            if depth == 0: kept.append(piece)
+        out = kept
+    return "".join(out), removed, stats
+
+def sanitize_rtf_buffer(data: bytes | memoryview, budget: Budget | None = None) -> Tuple[bytes, Dict]:
+    """In-memory sanitization: bytes/memoryview in, (clean bytes, result) out. No files touched.
+    budget: per-stage limits (sanitize_budget.py, env defaults); reported under "budget"."""
+    orig = bytes(data); orig_sha = _sha256(orig)
+    budget = budget or Budget()
 
     try:
-        txt = in_path.read_text(encoding="utf-8", errors="ignore")
-
-        # Structural removals
-        for pat, label in (
-            (RE_OBJECT_BLOCK,   "object"),
-            (RE_OBJDATA_BLOCK,  "objdata"),
-            (RE_DDE_FIELD,      "ddefield"),
-            (RE_INCLUDE_FIELD,  "include_field"),
-            (RE_HYPERLINK_AUTO, "hyperlink_auto"),
-            (RE_PICT_BLOCK,     "pict"),
-        ):
-            new_txt, n = pat.subn(" ", txt)
-            if n:
-                removed.append(label)
-                txt = new_txt
-
-        new_txt, n = RE_FIELD_BLOCK.subn(" ", txt)
-        if n: removed.append("field"); txt = new_txt
-        txt = RE_SUSPICIOUS_CTRL.sub("", txt)
-
-        # Keyword scrub (>= 5k variants)
-        txt2 = _keyword_scrub_text(txt, EXPANDED_TERMS)
-
-        out_path.write_text(txt2, encoding="utf-8")
-
-        # Guarantee change
-        if _sha256(out_path.read_bytes()) == orig_sha:
-            with open(out_path, "a", encoding="utf-8") as f:
-                f.write("\n{\\*\\safeDocs sanitized}\n")
-
-        return {"status": "ok", "notes": ["Removed risky RTF constructs and 5k+ keywords"], "removed": sorted(set(removed))}
+        txt = orig.decode("utf-8", errors="ignore")
+        engine = get_engine(EXPANDED_TERMS, DICT_VERSION)
+        with budget.stage("deep_scrub") as deep:
+            txt2, removed, stats = _strip_rtf(txt, engine.scrub, deep)
+
+        with budget.stage("serialize"):
+            out = txt2.encode("utf-8")
+
+            # Guarantee change
+            if _sha256(out) == orig_sha:
+                out += "\n{\\*\\safeDocs sanitized}\n".encode("utf-8")
+
+        notes = ["Removed risky RTF constructs and 5k+ keywords"]
+        if budget.degraded:
+            notes.append("Deep scrub over budget: structural-only past that point")
+        return out, {"status": "ok", "notes": notes,
+                     "removed": sorted(set(removed)), "stats": stats, "budget": budget.report()}
     except Exception as e:
-        shutil.copy(in_path, out_path)
-        return {"status":"failed","notes":[],"removed":[],"error":str(e)}
-
-def sanitize_rtf_bytes(data: bytes) -> bytes:
-    import tempfile
-    with tempfile.TemporaryDirectory() as td:
-        ip = Path(td) / "in.rtf"
-        op = Path(td) / "out.rtf"
-        ip.write_bytes(data)
-        _ = sanitize_rtf(ip, op)
-        try:
-            return op.read_bytes()
-        except Exception:
-            return data
+        return orig, {"status":"failed","notes":[],"removed":[],"error":str(e),"budget":budget.report()}
+
+def sanitize_rtf(in_path: str | Path, out_path: str | Path):
+    in_path = Path(in_path); out_path = Path(out_path)
+    clean, res = sanitize_rtf_buffer(in_path.read_bytes())
+    out_path.write_bytes(clean)
+    return res
+
+def sanitize_rtf_bytes(data: bytes | memoryview) -> bytes:
+    return sanitize_rtf_buffer(data)[0]
+
+
+# ---- previous implementation (chained DOTALL regexes), benchmarks only ----
+_RE_FLAGS = re.IGNORECASE | re.DOTALL
+_LEGACY_PATTERNS = (
+    (re.compile(r"\\object\b.*?\\endobj", _RE_FLAGS), "object"),
+    (re.compile(r"\\\*?\\objdata\b.*?}", _RE_FLAGS), "objdata"),
+    (re.compile(r"{\\field\b.*?\\fldinst\b[^}]*\bDDE(AUTO)?\b[^}]*}", _RE_FLAGS), "ddefield"),
+    (re.compile(r"{\\field\b.*?\\fldinst\b[^}]*\\(INCLUDEPICTURE|INCLUDETEXT)\b[^}]*}", _RE_FLAGS), "include_field"),
+    (re.compile(r"{\\field\b.*?\\fldinst\b[^}]*HYPERLINK[^}]*\\o\b[^}]*}", _RE_FLAGS), "hyperlink_auto"),
+    (re.compile(r"\\pict\b.*?}", _RE_FLAGS), "pict"),
+    (re.compile(r"{\\field\b.*?}", _RE_FLAGS), "field"),
+)
+_LEGACY_CTRL = re.compile(r"\\(objclass|shp|shpinst|field|pict|blipuid)\b", _RE_FLAGS)
+
+def strip_rtf_regex(txt: str) -> Tuple[str, List[str]]:
+    """Old structural pass (quadratic on unterminated blocks). Benchmarks only."""
+    removed = []
+    for pat, label in _LEGACY_PATTERNS:
+        txt, k = pat.subn(" ", txt)
+        if k: removed.append(label)
+    return _LEGACY_CTRL.sub("", txt), removed
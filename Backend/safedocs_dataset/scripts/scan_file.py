@@ -3,9 +3,10 @@ import argparse, json, os, shutil, hashlib, datetime
 from pathlib import Path
 
 from features_runtime import build_features_for_lgbm
-from sanitize_ooxml import sanitize_ooxml
-from sanitize_rtf import sanitize_rtf
-from sanitize_pdf import sanitize_pdf
+from sanitize_ooxml import sanitize_ooxml_buffer
+from sanitize_rtf import sanitize_rtf_buffer
+from sanitize_pdf import sanitize_pdf_buffer
+from sanitize_cache import SANITIZED, ArtifactCache
 
 from report_utils import (
     load_lgbm, load_rf, load_feat_order, load_feature_order,
@@ -57,14 +58,21 @@ def scan_bytes(raw: bytes, name: str, content_type: str) -> dict:
     }
 
 
-def _sanitize(src: Path, out_clean_dir: Path):
+def _sanitize(src: Path, out_clean_dir: Path, cache: ArtifactCache = SANITIZED):
+    """Sanitize through the artifact cache: a repeat input is served from it (info["cache"] == "hit")."""
     out_clean_dir.mkdir(parents=True, exist_ok=True)
     ext = src.suffix.lower()
     dst = out_clean_dir / f"{src.stem}_clean{ext}"
-    if ext == ".pdf":   info = sanitize_pdf(src, dst)
-    elif ext in (".docx",".pptx",".xlsx"): info = sanitize_ooxml(src, dst)
-    elif ext == ".rtf": info = sanitize_rtf(src, dst)
-    else: shutil.copy(src, dst); info={"status":"noop","sanitized_file":str(dst),"removed":[]}
+    if ext == ".pdf":   fn, kw = sanitize_pdf_buffer, {}
+    elif ext in (".docx",".pptx",".xlsx"): fn, kw = sanitize_ooxml_buffer, {"ext": ext}
+    elif ext == ".rtf": fn, kw = sanitize_rtf_buffer, {}
+    else:
+        shutil.copy(src, dst)
+        return dst.name, {"status":"noop","sanitized_file":str(dst),"removed":[]}
+    clean, info, hit = cache.sanitize(fn, src.read_bytes(), **kw)
+    dst.write_bytes(clean)
+    info["sanitized_file"] = str(dst)
+    if cache.enabled: info["cache"] = "hit" if hit else "miss"
     return dst.name, info
 
 def _human_size(n:int) -> str:
@@ -78,6 +86,7 @@ def main():
     ap.add_argument("--models_dir", required=True)
     ap.add_argument("--out_reports", required=True)
     ap.add_argument("--out_clean", required=True)
+    ap.add_argument("--no_cache", action="store_true", help="always sanitize (skip the artifact cache)")
     args = ap.parse_args()
 
     src = Path(args.file)
@@ -155,7 +164,7 @@ def main():
     # write report
     report_id = f"{src.stem}_report.json"
     report_path = rep_dir / report_id
-    sanitized_name, sani_info = _sanitize(src, clean_dir)
+    sanitized_name, sani_info = _sanitize(src, clean_dir, ArtifactCache(max_mb=0) if args.no_cache else SANITIZED)
 
     report = {
         "meta": {
@@ -180,6 +189,7 @@ def main():
             "sanitized_id": sanitized_name,
             "notes": ["Sanitized with SafeDocs engine"],
             "removed": sani_info.get("removed", []),  # <-- diff
+            "cache": sani_info.get("cache"),
             "success": True if sanitized_name else False
         }
     }
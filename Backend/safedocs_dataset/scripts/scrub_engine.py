@@ -0,0 +1,91 @@
+"""
+SafeDocs keyword-scrub engine — one compiled matcher per dictionary, one pass per document
+
+The old scrub compiled ~30 regexes of 200 alternations on every call and ran rx.sub 30
+times over the whole document (O(terms/200 x size), patterns thrown away each time).
+
+ScrubEngine instead folds the dictionary into a trie and emits it as a single regex
+(shared prefixes are factored out, longer continuations are optional groups), compiled
+once per dictionary version. A scrub is then one left-to-right pass:
+
+- every case-insensitive occurrence of a dictionary term is removed (same term set,
+  same re.IGNORECASE folding as before)
+- overlapping candidates resolve leftmost-longest ("cmd.exe" rather than "cmd")
+- the work per position is bounded by the longest term, so cost is linear in the input
+
+Text created by a removal (two fragments joining into a term) is not rescanned; the old
+batched sub could catch some of those depending on which batch a term landed in.
+"""
+
+from __future__ import annotations
+from typing import Dict, Iterable, List
+import re
+
+_ENGINES: Dict[str, "ScrubEngine"] = {}
+
+
+def _trie(terms: Iterable[str]) -> dict:
+    root: dict = {}
+    for t in terms:
+        if not t: continue
+        node = root
+        for ch in t.lower():
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return root
+
+def _pattern(node: dict) -> str:
+    branches = []
+    for ch in sorted(k for k in node if k):
+        # collapse single-child chains into one literal run
+        lit, child = re.escape(ch), node[ch]
+        while "" not in child and len(child) == 1:
+            (nxt, child), = child.items()
+            lit += re.escape(nxt)
+        branches.append(lit + _pattern(child))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return f"(?:{body})?" if "" in node else body
+
+
+class ScrubEngine:
+    def __init__(self, terms: List[str], version: str = "") -> None:
+        self.version = version
+        self.size = len(terms)
+        pat = _pattern({k: v for k, v in _trie(terms).items() if k})
+        self._rx = re.compile(pat, re.IGNORECASE) if pat else None
+
+    def scrub(self, s: str) -> str:
+        return self._rx.sub("", s) if self._rx is not None and s else s
+
+    def scrub_count(self, s: str) -> "tuple[str, int]":
+        if self._rx is None or not s:
+            return s, 0
+        return self._rx.subn("", s)
+
+    def scrub_bytes(self, data: bytes, encoding: str = "utf-8") -> bytes:
+        try:
+            s = bytes(data).decode(encoding, errors="ignore")
+            return self.scrub(s).encode(encoding, errors="ignore")
+        except Exception:
+            return bytes(data)
+
+
+def get_engine(terms: List[str], version: str) -> ScrubEngine:
+    """Compiled engine for a dictionary version (built once per process)."""
+    eng = _ENGINES.get(version)
+    if eng is None or eng.size != len(terms):
+        eng = ScrubEngine(terms, version)
+        _ENGINES[version] = eng
+    return eng
+
+
+def scrub_batched(s: str, terms: List[str], batch: int = 200) -> str:
+    """The previous implementation (batches of alternations, one sub per batch). Benchmarks only."""
+    out = s
+    for i in range(0, len(terms), batch):
+        chunk = terms[i:i+batch]
+        rx = re.compile("|".join(re.escape(t) for t in chunk if t), re.IGNORECASE)
+        out = rx.sub("", out)
+    return out
@@ -0,0 +1,208 @@
+"""
+SafeDocs keyword-scrub dictionaries — shared by sanitize_pdf / sanitize_ooxml / sanitize_rtf
+
+The ~150 seed terms are expanded (leet, separators, prefixes/suffixes, compacted,
+URL/path/exe forms) into ~18k variants, of which DICT_SIZE are kept. The expansion used
+to run at import in every sanitizer with an unseeded random.shuffle, so each worker paid
+for it three times and kept a different subset. Now:
+
+- Expansion is deterministic (seeded selection), one dictionary per profile:
+    "pdf"    — adds PDF JavaScript API seeds and web-script path forms
+    "office" — used by OOXML and RTF
+- Each dictionary is written once to a versioned artifact
+    <DICT_DIR>/scrub_terms_<profile>.<version>.txt   (header line + one term per line, UTF-8)
+  and loaded through mmap, so worker processes share the page cache.
+- The version is derived from the generator inputs: changing a seed list produces a new
+  artifact name, and stale artifacts are never read.
+
+Build artifacts ahead of time (they are also built on first use if missing):
+    python scrub_terms.py --build
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse, hashlib, itertools, json, mmap, os, random, re, tempfile
+
+DICT_FORMAT = 1
+DICT_SIZE = 6000
+DICT_SEED = 1337
+DICT_DIR = Path(os.getenv("SAFEDOCS_DICT_DIR", str(Path(__file__).resolve().parent / "dicts")))
+
+# ---- seeds ----
+BASE_TERMS: List[str] = [
+    # JS/actions (PDF)
+    "javascript", "/js", "/javascript", "openaction", "submitform", "launch", "gotoR", "named", "action",
+    "richmedia", "embeddedfile", "embeddedfiles", "acroform", "xfa", "needappearances",
+    # Office/LOLBins / typical malware strings
+    "macro", "vba", "vbaproject", "ole", "activex", "dde", "ddeauto", "includepicture", "includetext",
+    "hyperlink", "attachedtemplate",
+    # URLs/schemes
+    "http://", "https://", "javascript:", "file:", "data:", "ftp://", "smb://",
+    # LOLBAS/windows & tools
+    "cmd", "cmd.exe", "powershell", "powershell.exe", "wscript", "wscript.exe", "cscript", "cscript.exe",
+    "mshta", "mshta.exe", "regsvr32", "regsvr32.exe", "rundll32", "rundll32.exe", "bitsadmin", "certutil",
+    "curl", "wget", "ftp", "tftp", "schtasks", "at.exe", "whoami", "net user", "net group",
+    # Enc/JS tricks
+    "base64", "eval", "fromcharcode", "unescape",
+    # file types/executables
+    ".exe", ".ps1", ".vbs", ".js", ".jse", ".bat", ".cmd", ".hta", ".dll",
+]
+PDF_TERMS: List[str] = [
+    "doc.exportdataobject", "util.printf", "app.launchurl", "this.submitform", "geturl",
+]
+EXTRA_FAMILIES = [
+    "dropper", "payload", "beacon", "c2", "shellcode", "maldoc", "phish", "obfuscate", "decode",
+    "invoke-expression", "iex", "downloadstring", "add-type", "new-object system.net.webclient",
+    "start-process", "write-host", "set-mppreference", "amsienable",
+]
+LEET_MAP = {
+    "a": ["a", "4", "@"], "e": ["e", "3"], "i": ["i", "1", "!"],
+    "o": ["o", "0"], "s": ["s", "5", "$"], "t": ["t", "7"]
+}
+SEP_VARIANTS = ["", ".", "_", "-", "\u200b"]
+PREFIXES = ["", "/", "\\"]
+SUFFIXES = ["", "()", ":", ";", "'", '"']
+TLDs = ["com", "net", "org", "io", "ru", "cn", "xyz"]
+EXTS = [".exe",".ps1",".vbs",".js",".jse",".bat",".cmd",".hta",".dll",".scr",".com",".pif",".lnk"]
+WEB_EXTS = [".php", ".asp", ".aspx", ".jsp"]
+
+PROFILES: Dict[str, Dict] = {
+    "pdf":    {"seeds": BASE_TERMS + PDF_TERMS + EXTRA_FAMILIES, "web_exts": WEB_EXTS},
+    "office": {"seeds": BASE_TERMS + EXTRA_FAMILIES, "web_exts": []},
+}
+
+_LOADED: Dict[str, List[str]] = {}
+
+
+# ---- expansion ----
+def _leetify(token: str, cap: int = 10) -> List[str]:
+    pools = []
+    for ch in token:
+        low = ch.lower()
+        if low in LEET_MAP: pools.append(LEET_MAP[low])
+        else: pools.append([ch])
+    out: List[str] = []
+    for combo in itertools.product(*pools):
+        v = "".join(combo)
+        if v not in out: out.append(v)
+        if len(out) >= cap: break
+    return out
+
+def _path_forms(token: str, web_exts: List[str]) -> List[str]:
+    tk = token.strip("/").lower()
+    forms = [f"{tk}", f"/{tk}", f"\\{tk}", f"{tk}/", f"{tk}\\", f"/{tk}/", f"\\{tk}\\"]
+    forms += [f"{tk}{e}" for e in web_exts]
+    for tld in TLDs:
+        forms += [f"{tk}.{tld}", f"www.{tk}.{tld}", f"http://{tk}.{tld}", f"https://{tk}.{tld}"]
+    for ext in EXTS:
+        forms.append(f"{tk}{ext}")
+    return forms
+
+def expand_terms(profile: str = "office", size: int = DICT_SIZE) -> List[str]:
+    """Deterministic expansion: same profile + inputs -> same list, in every process."""
+    spec = PROFILES[profile]
+    seeds = sorted(set(spec["seeds"]))
+    expanded = set()
+    for t in seeds:
+        t = t.strip()
+        if not t: continue
+        base = {t, t.lower(), t.upper()}
+        if re.search(r"[a-zA-Z]", t):
+            base.update(_leetify(t, cap=8))
+        for cv in base:
+            for pre in PREFIXES:
+                for sep in SEP_VARIANTS:
+                    for suf in SUFFIXES:
+                        expanded.add(f"{pre}{cv.replace(' ', sep)}{suf}")
+        expanded.add(re.sub(r"[\/\.\-\s]+", "", t))
+        expanded.update(_path_forms(t, spec["web_exts"]))
+    if len(expanded) < size:
+        for t in seeds:
+            tt = re.sub(r"[^a-z0-9]", "", t.lower())
+            for i in range(0, max(0, len(tt)-3)):
+                expanded.add(tt[i:i+4])
+                if len(expanded) >= size: break
+            if len(expanded) >= size: break
+    items = sorted(x for x in expanded if x)
+    random.Random(DICT_SEED).shuffle(items)   # spread the kept subset across term families
+    return items[:size]
+
+
+# ---- versioned artifact ----
+def dict_version(profile: str = "office") -> str:
+    """Changes whenever any generator input changes (format, seeds, variant tables, size, seed)."""
+    spec = PROFILES[profile]
+    inputs = {
+        "format": DICT_FORMAT, "size": DICT_SIZE, "seed": DICT_SEED,
+        "seeds": sorted(set(spec["seeds"])), "web_exts": spec["web_exts"],
+        "leet": LEET_MAP, "sep": SEP_VARIANTS, "pre": PREFIXES, "suf": SUFFIXES, "tlds": TLDs, "exts": EXTS,
+    }
+    h = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{DICT_FORMAT}.{h[:12]}"
+
+def artifact_path(profile: str = "office", dict_dir: Optional[Path] = None) -> Path:
+    return Path(dict_dir or DICT_DIR) / f"scrub_terms_{profile}.{dict_version(profile)}.txt"
+
+def _header(profile: str, count: int) -> bytes:
+    return f"#safedocs-scrub-terms profile={profile} version={dict_version(profile)} count={count}".encode("utf-8")
+
+def build(profile: str = "office", dict_dir: Optional[Path] = None) -> Path:
+    """Write the artifact atomically (tmp file + rename) and return its path."""
+    path = artifact_path(profile, dict_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    terms = expand_terms(profile)
+    body = _header(profile, len(terms)) + b"\n" + "\n".join(terms).encode("utf-8")
+    fd, tmp = tempfile.mkstemp(prefix=path.name, dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except Exception:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+    return path
+
+def _read_artifact(path: Path, profile: str) -> Optional[List[str]]:
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            nl = mm.find(b"\n")
+            if nl < 0: return None
+            fields = dict(kv.split("=", 1) for kv in mm[:nl].decode("utf-8").split()[1:])
+            if fields.get("profile") != profile or fields.get("version") != dict_version(profile):
+                return None
+            terms = mm[nl + 1:].decode("utf-8").split("\n")
+            count = int(fields.get("count", -1))
+    return terms if len(terms) == count else None
+
+def load_terms(profile: str = "office") -> List[str]:
+    """Dictionary for a profile: in-process cache -> mmap'd artifact -> build (or expand in memory)."""
+    terms = _LOADED.get(profile)
+    if terms is not None:
+        return terms
+    path = artifact_path(profile)
+    try:
+        terms = _read_artifact(path, profile) if path.exists() else None
+        if terms is None:
+            terms = _read_artifact(build(profile), profile)
+    except Exception:
+        terms = None
+    if terms is None:   # read-only / broken dict dir: same terms, just not persisted
+        terms = expand_terms(profile)
+    _LOADED[profile] = terms
+    return terms
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build the keyword-scrub dictionary artifacts")
+    ap.add_argument("--build", action="store_true", help="(re)build artifacts for every profile")
+    ap.add_argument("--dir", default="", help=f"output directory (default {DICT_DIR})")
+    args = ap.parse_args()
+    for prof in PROFILES:
+        d = Path(args.dir) if args.dir else None
+        p = artifact_path(prof, d)
+        if args.build or not p.exists():
+            p = build(prof, d)
+        print(f"{prof:<7} {dict_version(prof)}  {p}")
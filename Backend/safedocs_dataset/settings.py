@@ -1,8 +1,10 @@
+import os
 from pathlib import Path
 
 # Base paths
 BACKEND_ROOT = Path(__file__).resolve().parent
 MODELS_DIR   = BACKEND_ROOT / "models"
+SCRIPTS_DIR  = BACKEND_ROOT / "scripts"   # full sanitizers + keyword-scrub dictionaries
 
 # Where the API stores outputs (reports & sanitized files)
 OUT_DIR      = BACKEND_ROOT / "out"
@@ -11,6 +13,47 @@ SANIT_DIR    = OUT_DIR / "sanitized"
 for p in (REPORTS_DIR, SANIT_DIR):
     p.mkdir(parents=True, exist_ok=True)
 
-# Optional: limits and CORS
-ALLOWED_ORIGINS = ["http://localhost:5173"]
-MAX_UPLOAD_MB   = 30
+# Limits and CORS. The API allows any origin by default; set ALLOWED_ORIGINS (comma-separated,
+# e.g. "https://app.example.com,http://localhost:5173") to restrict it (tighten for prod).
+ALLOWED_ORIGINS = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "*").split(",") if o.strip()]
+MAX_UPLOAD_MB   = int(os.getenv("MAX_UPLOAD_MB", "30"))
+
+# Scan/sanitize worker pool (CPU-heavy work runs off the event loop)
+#   SCAN_POOL_KIND: "process" (default) | "thread" | "inline" (debugging only)
+SCAN_POOL_KIND  = os.getenv("SCAN_POOL_KIND", "process").strip().lower()
+SCAN_WORKERS    = max(1, int(os.getenv("SCAN_WORKERS", str(max(1, (os.cpu_count() or 2) - 1)))))
+#   SCAN_JOB_TIMEOUT_S: hard wall-clock ceiling per pool job (process pool only; 0 = none).
+#   The sanitizer budgets are cooperative and can't interrupt one long library call (a
+#   pikepdf save, a parse); past this the worker processes are killed and the pool rebuilt.
+SCAN_JOB_TIMEOUT_S = float(os.getenv("SCAN_JOB_TIMEOUT_S", "120"))
+
+# Verdict cache (see verdict_cache.py). Bump a version to invalidate cached verdicts
+# after changing scan_file.py or the sanitizers; model and scrub-dictionary changes are
+# detected automatically.
+SCANNER_VERSION          = os.getenv("SCANNER_VERSION", "1")
+SANITIZER_VERSION        = os.getenv("SANITIZER_VERSION", "1")
+VERDICT_CACHE_SIZE       = int(os.getenv("VERDICT_CACHE_SIZE", "2048"))
+VERDICT_CACHE_RECHECK_S  = float(os.getenv("VERDICT_CACHE_RECHECK_S", "30"))
+
+# Background scan jobs: how long finished jobs stay in memory for status/SSE replay
+JOB_RETENTION_S          = float(os.getenv("JOB_RETENTION_S", "900"))
+# A scans row still "queued"/"processing" after this long lost its worker (crash/restart):
+# it is marked failed at startup and reported as failed by the job status endpoints.
+JOB_STALE_S              = float(os.getenv("JOB_STALE_S", "3600"))
+
+# Streaming upload ingest (see ingest.py): read size and in-memory spool ceiling
+INGEST_CHUNK_KB          = int(os.getenv("INGEST_CHUNK_KB", "1024"))
+SPOOL_MAX_MEMORY_MB      = float(os.getenv("SPOOL_MAX_MEMORY_MB", "4"))
+
+# Admission control for uploads (see admission.py)
+ADMISSION_MAX_PER_USER    = int(os.getenv("ADMISSION_MAX_PER_USER", "2"))
+ADMISSION_MAX_GLOBAL      = int(os.getenv("ADMISSION_MAX_GLOBAL", str(SCAN_WORKERS * 4)))
+ADMISSION_MAX_INFLIGHT_MB = float(os.getenv("ADMISSION_MAX_INFLIGHT_MB", str(MAX_UPLOAD_MB * 8)))
+ADMISSION_RETRY_AFTER_S   = float(os.getenv("ADMISSION_RETRY_AFTER_S", "5"))
+
+# Buffered audit log (see audit_log.py); batches that cannot reach Mongo go to the fallback file
+AUDIT_BATCH_SIZE          = int(os.getenv("AUDIT_BATCH_SIZE", "100"))
+AUDIT_FLUSH_MS            = float(os.getenv("AUDIT_FLUSH_MS", "500"))
+AUDIT_WRITE_TIMEOUT_S     = float(os.getenv("AUDIT_WRITE_TIMEOUT_S", "2"))
+AUDIT_MAX_QUEUE           = int(os.getenv("AUDIT_MAX_QUEUE", "10000"))
+AUDIT_FALLBACK_PATH       = Path(os.getenv("AUDIT_FALLBACK_PATH", str(OUT_DIR / "audit_fallback.jsonl")))
@@ -0,0 +1,66 @@
+# user_stats.py
+# Per-user scan counters for /api/me/stats.
+#
+# user_stats documents ({_id: user_id, total_scans, benign, malicious, last_activity})
+# are maintained with $inc/$max when scans rows are created and completed, so the
+# stats endpoint is a single _id lookup. Users whose document predates this (or was
+# created by an $inc upsert before any backfill) are recomputed once from the scans
+# collection with a single index-backed $facet aggregation and marked backfilled.
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from db import db
+
+COUNTED_VERDICTS = ("benign", "malicious")
+
+
+async def record_scan_created(user_id: str, created_at: datetime) -> None:
+    await db().user_stats.update_one(
+        {"_id": user_id},
+        {"$inc": {"total_scans": 1}, "$max": {"last_activity": created_at}},
+        upsert=True,
+    )
+
+
+async def record_scan_verdict(user_id: str, verdict: Optional[str], delta: int = 1) -> None:
+    """delta=-1 compensates a verdict recorded by a persistence batch that was rolled back."""
+    if verdict not in COUNTED_VERDICTS:
+        return
+    await db().user_stats.update_one({"_id": user_id}, {"$inc": {verdict: delta}}, upsert=True)
+
+
+async def compute_user_stats(user_id: str) -> Dict[str, Any]:
+    """One aggregation over scans, served by the (user_id, created_at, _id) index."""
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$facet": {
+            "by_verdict": [{"$group": {"_id": "$verdict", "n": {"$sum": 1}}}],
+            "last": [{"$sort": {"created_at": -1}}, {"$limit": 1}, {"$project": {"_id": 0, "created_at": 1}}],
+        }},
+    ]
+    docs = await db().scans.aggregate(pipeline).to_list(length=1)
+    facet = docs[0] if docs else {"by_verdict": [], "last": []}
+    counts = {row["_id"]: int(row["n"]) for row in facet.get("by_verdict", [])}
+    last = facet.get("last") or []
+    return {
+        "total_scans": sum(counts.values()),
+        "benign": counts.get("benign", 0),
+        "malicious": counts.get("malicious", 0),
+        "last_activity": last[0].get("created_at") if last else None,
+    }
+
+
+async def get_user_stats(user_id: str) -> Dict[str, Any]:
+    doc = await db().user_stats.find_one({"_id": user_id})
+    if not doc or not doc.get("backfilled"):
+        stats = await compute_user_stats(user_id)
+        await db().user_stats.update_one({"_id": user_id}, {"$set": {**stats, "backfilled": True}}, upsert=True)
+        return stats
+    return {
+        "total_scans": int(doc.get("total_scans") or 0),
+        "benign": int(doc.get("benign") or 0),
+        "malicious": int(doc.get("malicious") or 0),
+        "last_activity": doc.get("last_activity"),
+    }
+
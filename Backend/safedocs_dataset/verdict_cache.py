@@ -0,0 +1,220 @@
+# verdict_cache.py
+# Content-addressed verdict cache:
+#   (sha256, extension, content type, scanner version, model hash, sanitizer version,
+#    scrub-dictionary versions) -> analysis.
+# The extension picks the sanitizer (a .bin upload is a passthrough) and names the clean
+# object, and the scanner sees the content type, so the same bytes uploaded under another
+# type are a different entry.
+#
+# Two tiers:
+#   - in-process LRU (per uvicorn worker, bounded by settings.VERDICT_CACHE_SIZE)
+#   - persistent Mongo collection "verdict_cache" (shared by all workers)
+#
+# An entry stores the scan/re-scan verdicts, findings, sanitizer metadata and the
+# GridFS id of the sanitized object, so a hit needs no scanning or sanitizing. The API
+# copies that object for the new scan (each scan owns its clean object); once it is gone
+# the entry is dropped on the next lookup.
+#
+# Invalidation: the engine key is derived from SCANNER_VERSION, SANITIZER_VERSION, the
+# keyword-scrub dictionary versions (scripts/scrub_terms.py) and a content hash of
+# everything under models/. Bump a version (env or settings)
+# or replace a model file and the key changes: the LRU is dropped, lookups miss,
+# and entries written under an older key are purged from Mongo. The models dir is
+# re-stat'ed at most every VERDICT_CACHE_RECHECK_S seconds, so model swaps are
+# picked up without a restart.
+from __future__ import annotations
+import hashlib
+import json
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import settings
+from db import db
+
+
+def _models_signature(models_dir: Path) -> Tuple[Tuple[str, int, int], ...]:
+    """Cheap stat-based signature (path, size, mtime) used to detect model changes."""
+    sig = []
+    try:
+        for p in sorted(models_dir.rglob("*")):
+            if p.is_file():
+                st = p.stat()
+                sig.append((str(p.relative_to(models_dir)), st.st_size, st.st_mtime_ns))
+    except Exception:
+        pass
+    return tuple(sig)
+
+
+def models_fingerprint(models_dir: Path) -> str:
+    """sha256 over relative paths + contents of every file under models_dir."""
+    h = hashlib.sha256()
+    try:
+        for p in sorted(models_dir.rglob("*")):
+            if not p.is_file():
+                continue
+            h.update(str(p.relative_to(models_dir)).encode("utf-8") + b"\0")
+            with open(p, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    except Exception:
+        pass
+    return h.hexdigest()
+
+
+def scrub_dict_versions() -> Dict[str, str]:
+    """Versions of the dictionaries the full sanitizers scrub with; {} if scripts/ can't be imported."""
+    if str(settings.SCRIPTS_DIR) not in sys.path:
+        sys.path.append(str(settings.SCRIPTS_DIR))
+    try:
+        from scrub_terms import dict_version
+        return {p: dict_version(p) for p in ("pdf", "office")}
+    except Exception:
+        return {}
+
+
+def _variant(ext: str, content_type: str) -> str:
+    """Normalized upload type: ".pdf|application/pdf"."""
+    return f"{(ext or '').lower().strip()}|{(content_type or '').lower().split(';')[0].strip()}"
+
+
+class VerdictCache:
+    def __init__(self, max_items: int, models_dir: Path, recheck_s: float = 30.0) -> None:
+        self.max_items = max(0, int(max_items))
+        self.models_dir = Path(models_dir)
+        self.recheck_s = float(recheck_s)
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._engine: Dict[str, str] = {}
+        self._engine_key = ""
+        self._signature: Tuple = ()
+        self._checked_at = 0.0
+        self._stats = {"hits_memory": 0, "hits_mongo": 0, "misses": 0, "puts": 0, "invalidations": 0, "engine_changes": 0}
+
+    # ---------- engine key ----------
+    def _refresh_engine(self) -> bool:
+        """Recompute the engine key if the models dir changed. Returns True when the key changed."""
+        now = time.monotonic()
+        if self._engine_key and now - self._checked_at < self.recheck_s:
+            return False
+        self._checked_at = now
+        sig = _models_signature(self.models_dir)
+        if self._engine_key and sig == self._signature:
+            return False
+        self._signature = sig
+        engine = {
+            "scanner": str(settings.SCANNER_VERSION),
+            "sanitizer": str(settings.SANITIZER_VERSION),
+            "dicts": scrub_dict_versions(),
+            "models": models_fingerprint(self.models_dir),
+        }
+        key = hashlib.sha256(json.dumps(engine, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+        changed = bool(self._engine_key) and key != self._engine_key
+        self._engine, self._engine_key = engine, key
+        if changed:
+            self._lru.clear()
+            self._stats["engine_changes"] += 1
+        return changed
+
+    def engine_key(self) -> str:
+        self._refresh_engine()
+        return self._engine_key
+
+    def _key(self, sha: str, ext: str, content_type: str) -> str:
+        variant = hashlib.sha256(_variant(ext, content_type).encode("utf-8")).hexdigest()[:12]
+        return f"{sha}:{variant}:{self.engine_key()}"
+
+    # ---------- lookups ----------
+    async def get(self, sha: str, ext: str, content_type: str) -> Optional[Dict[str, Any]]:
+        if self._refresh_engine():
+            await self.purge_stale()
+        key = self._key(sha, ext, content_type)
+
+        hit = self._lru.get(key)
+        if hit is not None:
+            self._lru.move_to_end(key)
+            self._stats["hits_memory"] += 1
+            return dict(hit)
+
+        try:
+            doc = await db().verdict_cache.find_one({"_id": key})
+        except Exception as e:
+            print("verdict cache read error:", e)
+            doc = None
+        if not doc or not isinstance(doc.get("analysis"), dict):
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits_mongo"] += 1
+        self._remember(key, doc["analysis"])
+        return dict(doc["analysis"])
+
+    async def put(self, sha: str, ext: str, content_type: str, analysis: Dict[str, Any]) -> None:
+        key = self._key(sha, ext, content_type)
+        entry = {k: v for k, v in analysis.items() if not isinstance(v, (bytes, bytearray))}
+        self._remember(key, entry)
+        self._stats["puts"] += 1
+        try:
+            await db().verdict_cache.replace_one(
+                {"_id": key},
+                {
+                    "_id": key,
+                    "sha256": sha,
+                    "variant": _variant(ext, content_type),
+                    "engine_key": self._engine_key,
+                    "engine": self._engine,
+                    "analysis": entry,
+                    "created_at": datetime.now(timezone.utc),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            print("verdict cache write error:", e)
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        if self.max_items <= 0:
+            return
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    # ---------- invalidation ----------
+    async def invalidate(self, sha: Optional[str] = None) -> None:
+        """Drop one sha256 (all engine keys) or, with no argument, the whole cache."""
+        self._stats["invalidations"] += 1
+        if sha is None:
+            self._lru.clear()
+            query: Dict[str, Any] = {}
+        else:
+            for k in [k for k in self._lru if k.startswith(f"{sha}:")]:
+                del self._lru[k]
+            query = {"sha256": sha}
+        try:
+            await db().verdict_cache.delete_many(query)
+        except Exception as e:
+            print("verdict cache invalidate error:", e)
+
+    async def purge_stale(self) -> int:
+        """Delete persistent entries written under a different engine key."""
+        try:
+            res = await db().verdict_cache.delete_many({"engine_key": {"$ne": self.engine_key()}})
+            return int(getattr(res, "deleted_count", 0) or 0)
+        except Exception as e:
+            print("verdict cache purge error:", e)
+            return 0
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "engine_key": self._engine_key,
+            "engine": self._engine,
+            "memory_items": len(self._lru),
+            "memory_capacity": self.max_items,
+            **self._stats,
+        }
+
+
+VERDICTS = VerdictCache(settings.VERDICT_CACHE_SIZE, settings.MODELS_DIR, settings.VERDICT_CACHE_RECHECK_S)
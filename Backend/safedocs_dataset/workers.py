@@ -0,0 +1,195 @@
+# workers.py
+# Bounded execution layer for CPU-heavy scan / sanitize / re-scan jobs.
+#
+# The event loop only awaits results: every job is handed to a process pool
+# (or thread pool, see settings.SCAN_POOL_KIND). An asyncio semaphore sized to
+# the worker count keeps the executor's internal queue empty, so the number of
+# coroutines waiting on it is the real queue depth and the time spent waiting
+# is the real queueing delay. Both are exposed through stats() for sizing.
+#
+# Process pool jobs also get a hard wall-clock ceiling (settings.SCAN_JOB_TIMEOUT_S).
+# A pool job can't be cancelled once it runs, so a job past it retires the whole pool:
+# its processes are killed, a fresh pool takes new work, and jobs that were running
+# next to the stuck one are resubmitted once to the new pool.
+from __future__ import annotations
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+import settings
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 2)
+
+
+class JobTimeout(TimeoutError):
+    """A pool job ran past the wall-clock ceiling; its worker was killed."""
+
+
+class _JobStats:
+    __slots__ = ("submitted", "completed", "failed", "timeouts", "wait_total", "wait_max", "run_total", "run_max")
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        done = max(1, self.completed + self.failed)
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "wait_ms_avg": _ms(self.wait_total / done),
+            "wait_ms_max": _ms(self.wait_max),
+            "run_ms_avg": _ms(self.run_total / done),
+            "run_ms_max": _ms(self.run_max),
+        }
+
+
+class WorkerPool:
+    def __init__(self, workers: int, kind: str = "process", timeout_s: float = 0.0) -> None:
+        self.workers = max(1, int(workers))
+        self.kind = kind if kind in ("process", "thread", "inline") else "process"
+        self.timeout_s = max(0.0, float(timeout_s))
+        self._executor: Optional[Executor] = None
+        self._generation = 0   # bumped whenever the executor is replaced
+        self._restarts = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self._max_waiting = 0
+        self._jobs: Dict[str, _JobStats] = {}
+
+    # ---------- lifecycle ----------
+    def _make_executor(self) -> Optional[Executor]:
+        if self.kind == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        if self.kind == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="safedocs-scan")
+        return None
+
+    def start(self) -> None:
+        if self._executor is None and self.kind != "inline":
+            self._executor = self._make_executor()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+    def shutdown(self) -> None:
+        ex, self._executor = self._executor, None
+        self._generation += 1
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+
+    def _kill(self, ex: Executor) -> None:
+        """Retire a process pool with a stuck job: kill its workers so the CPU comes back."""
+        if ex is self._executor:
+            self._executor = None
+            self._generation += 1
+        self._restarts += 1
+        # no public API stops a running task; _processes is {pid: Process} on CPython 3.8+
+        for proc in list((getattr(ex, "_processes", None) or {}).values()):
+            try:
+                proc.kill()
+            except Exception:
+                pass
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        ex, gen = self._executor, self._generation
+        try:
+            fut = ex.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # a worker died (OOM / segfault in a parser): rebuild once and retry
+            self.shutdown()
+            self.start()
+            ex, gen = self._executor, self._generation
+            fut = ex.submit(fn, *args, **kwargs)
+        if not (self.timeout_s and self.kind == "process"):
+            return await asyncio.wrap_future(fut)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), timeout=self.timeout_s)
+        except asyncio.TimeoutError:
+            self._kill(ex)
+            raise JobTimeout(f"exceeded {self.timeout_s:g}s; worker killed") from None
+        except BrokenProcessPool:
+            if gen == self._generation:
+                raise
+            # killed alongside another job's stuck worker: run once more on the new pool
+            self.start()
+            return await asyncio.wait_for(asyncio.wrap_future(self._executor.submit(fn, *args, **kwargs)),
+                                          timeout=self.timeout_s)
+
+    # ---------- execution ----------
+    async def run(self, job: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool and await its result.
+        fn and its arguments must be picklable for the process pool
+        (module-level functions, bytes/str/dict arguments).
+        Raises JobTimeout past timeout_s (process pool only).
+        """
+        self.start()
+        st = self._jobs.setdefault(job, _JobStats())
+        st.submitted += 1
+
+        t_submit = time.perf_counter()
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        t_start = time.perf_counter()
+        wait = t_start - t_submit
+        st.wait_total += wait
+        st.wait_max = max(st.wait_max, wait)
+        self._running += 1
+        ok = False
+        try:
+            if self._executor is None:
+                result = fn(*args, **kwargs)
+            else:
+                result = await self._submit(fn, *args, **kwargs)
+            ok = True
+            return result
+        except JobTimeout:
+            st.timeouts += 1
+            raise
+        except BrokenProcessPool:
+            self.shutdown()
+            raise
+        finally:
+            run = time.perf_counter() - t_start
+            st.run_total += run
+            st.run_max = max(st.run_max, run)
+            if ok: st.completed += 1
+            else:  st.failed += 1
+            self._running -= 1
+            self._slots.release()
+
+    # ---------- metrics ----------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "timeout_s": self.timeout_s,
+            "restarts": self._restarts,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "queue_depth_max": self._max_waiting,
+            "jobs": {name: st.as_dict() for name, st in self._jobs.items()},
+        }
+
+
+# Shared pool for the API process (started/stopped from api_server lifecycle hooks)
+POOL = WorkerPool(settings.SCAN_WORKERS, settings.SCAN_POOL_KIND, settings.SCAN_JOB_TIMEOUT_S)